@@ -1,10 +1,25 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+import numpy as np
 import pandas as pd
 
+from providers.base import CandleChunk
+
+
 class SignalAnalyzerBase(ABC):
     def __init__(self, **params):
         self.params = params
 
+    @property
+    def warmup_period(self) -> int:
+        """Сколько предыдущих баров нужно индикаторам, чтобы значение на текущем баре было полным"""
+        return 0
+
+    def iter_calculate(self, chunks: Iterable[CandleChunk]) -> Iterator[pd.DataFrame]:
+        """Считает индикаторы по кускам iter_candles и отдаёт куски уже без warm-up строк"""
+        for chunk in chunks:
+            yield chunk.drop_warmup(self.calculate(chunk.data))
+
     @abstractmethod
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
         """Добавляет индикаторы в датафрейм"""
@@ -14,3 +29,12 @@ class SignalAnalyzerBase(ABC):
     def get_signal(self, row: pd.Series) -> int:
         """На основе строки возвращает сигнал: -1, 0 или 1"""
         pass
+
+    def get_signals(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Сигналы для всех строк сразу (int8: -1, 0, 1).
+        По умолчанию — построчно через get_signal; наследники переопределяют векторной версией.
+        """
+        if df.empty:
+            return np.zeros(0, dtype=np.int8)
+        return df.apply(self.get_signal, axis=1).to_numpy(dtype=np.int8)
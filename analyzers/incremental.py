@@ -0,0 +1,152 @@
+import math
+from typing import Mapping
+
+import numpy as np
+
+
+class RollingMean:
+    """
+    Скользящее среднее за O(1) на значение: кольцевой буфер и текущая сумма.
+
+    Сумма пересчитывается из буфера при каждом обороте кольца, чтобы ошибка
+    округления не копилась на длинном потоке (амортизированно всё равно O(1)).
+    Окно из одних нулей даёт ровно 0 — иначе RSI на плоском участке не совпал бы с pandas.
+    """
+
+    __slots__ = ("period", "_buf", "_pos", "_count", "_sum", "_nonzero")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._buf = np.zeros(period)
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._nonzero = 0
+
+    def update(self, value: float) -> float:
+        old = self._buf[self._pos]
+        if self._count == self.period:
+            self._sum -= old
+            self._nonzero -= int(old != 0)
+        else:
+            self._count += 1
+        self._buf[self._pos] = value
+        self._sum += value
+        self._nonzero += int(value != 0)
+        self._pos = (self._pos + 1) % self.period
+        if self._pos == 0:
+            self._sum = float(self._buf.sum())
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self._count < self.period:
+            return math.nan
+        if self._nonzero == 0:
+            return 0.0
+        return self._sum / self.period
+
+    def snapshot(self) -> dict:
+        return {"buf": self._buf.tolist(), "pos": self._pos, "count": self._count}
+
+    def restore(self, state: Mapping) -> None:
+        self._buf = np.asarray(state["buf"], dtype=float)
+        self._pos = state["pos"]
+        self._count = state["count"]
+        window = self._buf if self._count == self.period else self._buf[:self._count]
+        self._sum = float(window.sum())
+        self._nonzero = int(np.count_nonzero(window))
+
+
+class SMA:
+    __slots__ = ("_mean",)
+
+    def __init__(self, period: int):
+        self._mean = RollingMean(period)
+
+    def update(self, bar: Mapping) -> float:
+        return self._mean.update(float(bar["close"]))
+
+    def snapshot(self) -> dict:
+        return {"mean": self._mean.snapshot()}
+
+    def restore(self, state: Mapping) -> None:
+        self._mean.restore(state["mean"])
+
+
+class RSI:
+    """RSI на простых скользящих средних прироста/потерь (как в SMARSIAnalyzer)."""
+
+    __slots__ = ("_gain", "_loss", "_prev_close")
+
+    def __init__(self, period: int):
+        self._gain = RollingMean(period)
+        self._loss = RollingMean(period)
+        self._prev_close = math.nan
+
+    def update(self, bar: Mapping) -> float:
+        close = float(bar["close"])
+        delta = close - self._prev_close  # на первом баре NaN -> 0 в обеих средних, как where() в pandas
+        self._prev_close = close
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-delta if delta < 0 else 0.0)
+        if math.isnan(gain) or math.isnan(loss) or (gain == 0 and loss == 0):
+            return math.nan
+        if loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + gain / loss))
+
+    def snapshot(self) -> dict:
+        return {"gain": self._gain.snapshot(), "loss": self._loss.snapshot(), "prev_close": self._prev_close}
+
+    def restore(self, state: Mapping) -> None:
+        self._gain.restore(state["gain"])
+        self._loss.restore(state["loss"])
+        self._prev_close = state["prev_close"]
+
+
+class ATR:
+    """ATR как скользящее среднее true range; на первом баре TR = high - low."""
+
+    __slots__ = ("_mean", "_prev_close")
+
+    def __init__(self, period: int):
+        self._mean = RollingMean(period)
+        self._prev_close = math.nan
+
+    def update(self, bar: Mapping) -> float:
+        high, low, close = float(bar["high"]), float(bar["low"]), float(bar["close"])
+        tr = high - low
+        if not math.isnan(self._prev_close):
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        return self._mean.update(tr)
+
+    def snapshot(self) -> dict:
+        return {"mean": self._mean.snapshot(), "prev_close": self._prev_close}
+
+    def restore(self, state: Mapping) -> None:
+        self._mean.restore(state["mean"])
+        self._prev_close = state["prev_close"]
+
+
+class SMARSIState:
+    """Состояние индикаторов SMARSIAnalyzer одного контракта: update(bar) -> {"sma", "rsi", "atr"}."""
+
+    __slots__ = ("sma", "rsi", "atr")
+
+    def __init__(self, sma: int, rsi: int, atr: int):
+        self.sma = SMA(sma)
+        self.rsi = RSI(rsi)
+        self.atr = ATR(atr)
+
+    def update(self, bar: Mapping) -> dict:
+        return {"sma": self.sma.update(bar), "rsi": self.rsi.update(bar), "atr": self.atr.update(bar)}
+
+    def snapshot(self) -> dict:
+        return {"sma": self.sma.snapshot(), "rsi": self.rsi.snapshot(), "atr": self.atr.snapshot()}
+
+    def restore(self, state: Mapping) -> None:
+        self.sma.restore(state["sma"])
+        self.rsi.restore(state["rsi"])
+        self.atr.restore(state["atr"])
@@ -0,0 +1,220 @@
+import hashlib
+import os
+import weakref
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.logger import get_logger
+from providers.schema import MemoryBudget
+
+log = get_logger(__name__)
+
+FINGERPRINT_COLUMNS = ("datetime", "open", "high", "low", "close", "volume")
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Отпечаток свечей: хэш сырых байт колонок OHLCV и времени — одинаковые данные дают одинаковый ключ."""
+    digest = hashlib.blake2b(digest_size=16)
+    for col in FINGERPRINT_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy()
+        if col == "datetime":
+            values = df[col].to_numpy(dtype="datetime64[ns]").view("int64")
+        digest.update(col.encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def contract_fingerprints(df: pd.DataFrame) -> dict[str, str]:
+    """Отпечатки по контрактам: {contract_code: отпечаток его строк}; без contract_code — {"ALL": отпечаток всего}."""
+    if "contract_code" not in df.columns:
+        return {"ALL": data_fingerprint(df)}
+    return {
+        str(contract): data_fingerprint(group)
+        for contract, group in df.groupby("contract_code", observed=True, sort=False)
+    }
+
+
+class IndicatorCache:
+    """
+    Кэш рассчитанных индикаторов для всей сетки параметров.
+
+    Ключ — (отпечаток данных, контракт, индикатор, параметры). Два уровня:
+    - LRU в памяти процесса (MemoryBudget);
+    - .npy-файлы в cache_dir, общие для всех воркеров (запись через tmp + os.replace).
+      Размер слоя ограничен disk_limit_mb: при превышении удаляются файлы с самым старым mtime,
+      а чтение обновляет mtime — получается LRU, общий для всех процессов. Проверка — при старте и после записи.
+    Значения отдаются только для чтения: один массив может оказаться в нескольких датафреймах.
+
+    grid — периоды сетки по индикаторам ({"sma": (20, 40), ...}): промах get_or_compute_grid считает
+    сразу все ещё не закэшированные периоды индикатора.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        memory_limit_mb: Optional[float] = 256,
+        disk_limit_mb: Optional[float] = 1024,
+        grid: Optional[dict[str, Sequence[int]]] = None,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.grid = {name: tuple(periods) for name, periods in (grid or {}).items()}
+        self.disk_limit_bytes = None if disk_limit_mb is None else int(disk_limit_mb * 1024 * 1024)
+        self._memory = MemoryBudget(memory_limit_mb)
+        # отпечатки по контрактам для каждого кадра — считаются один раз, пока кадр жив
+        self._fingerprints: dict[int, tuple[weakref.ref, dict[str, str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._disk_bytes = self.prune() if self.cache_dir is not None else 0
+
+    def fingerprints(self, df: pd.DataFrame) -> dict[str, str]:
+        """
+        contract_fingerprints(df), запомненные для этого объекта кадра: сетка параметров считает индикаторы
+        по одному и тому же кадру провайдера много раз, а хэш всех OHLCV-байт — не бесплатный.
+        Кадр после этого не должен меняться на месте.
+        """
+        key = id(df)
+        entry = self._fingerprints.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+
+        fingerprints = contract_fingerprints(df)
+        self._fingerprints[key] = (weakref.ref(df, lambda _, key=key: self._fingerprints.pop(key, None)), fingerprints)
+        return fingerprints
+
+    def prune(self) -> int:
+        """
+        Ужимает дисковый слой до disk_limit_bytes, удаляя файлы с самым старым mtime (и опустевшие каталоги
+        отпечатков). Возвращает итоговый размер слоя в байтах.
+        """
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return 0
+
+        files = []
+        for path in self.cache_dir.rglob("*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # удалён другим воркером
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if self.disk_limit_bytes is None or total <= self.disk_limit_bytes:
+            return total
+
+        removed = 0
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total <= self.disk_limit_bytes:
+                break
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        # каталоги <отпечаток>/<контракт> без файлов — от данных, которых больше нет
+        for directory in sorted(self.cache_dir.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+            if directory.is_dir():
+                try:
+                    directory.rmdir()
+                except OSError:
+                    pass
+        log.info(f"🧹 Кэш индикаторов: удалено файлов {removed}, осталось {total / 1024 / 1024:.1f} МБ")
+        return total
+
+    def _path(self, fingerprint: str, contract: str, name: str, params: tuple) -> Path:
+        params_str = "_".join(str(p) for p in params)
+        return self.cache_dir / fingerprint / contract / f"{name}_{params_str}.npy"
+
+    def get_or_compute(
+        self,
+        fingerprint: str,
+        contract: str,
+        name: str,
+        params: tuple,
+        compute: Callable[[], np.ndarray],
+    ) -> np.ndarray:
+        values = self._lookup(fingerprint, contract, name, params)
+        if values is not None:
+            self.hits += 1
+            return values
+
+        self.misses += 1
+        return self._store(fingerprint, contract, name, params, compute())
+
+    def get_or_compute_grid(
+        self,
+        fingerprint: str,
+        contract: str,
+        name: str,
+        period: int,
+        compute_many: Callable[[list[int]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Индикатор с одним параметром-периодом. При промахе compute_many(periods) -> массив (строки × периоды)
+        считает period вместе со всеми периодами grid[name], которых ещё нет в кэше, и кэширует каждый столбец:
+        следующие группы сетки с теми же данными берут свой период из кэша.
+        """
+        values = self._lookup(fingerprint, contract, name, (period,))
+        if values is not None:
+            self.hits += 1
+            return values
+
+        self.misses += 1
+        periods = [period] + [
+            p for p in dict.fromkeys(self.grid.get(name, ()))
+            if p != period and self._lookup(fingerprint, contract, name, (p,)) is None
+        ]
+        cube = np.asarray(compute_many(periods), dtype=float)
+        for j, p in enumerate(periods[1:], start=1):
+            self._store(fingerprint, contract, name, (p,), cube[:, j])
+        return self._store(fingerprint, contract, name, (period,), cube[:, 0])
+
+    def _lookup(self, fingerprint: str, contract: str, name: str, params: tuple) -> Optional[np.ndarray]:
+        key = (fingerprint, contract, name, params)
+        if key in self._memory:
+            return self._memory.get(key)
+        if self.cache_dir is None:
+            return None
+        values = self._load(self._path(fingerprint, contract, name, params))
+        if values is not None:
+            values.flags.writeable = False
+            self._memory.put(key, values, values.nbytes)
+        return values
+
+    def _store(self, fingerprint: str, contract: str, name: str, params: tuple, values: np.ndarray) -> np.ndarray:
+        values = np.ascontiguousarray(values, dtype=float)
+        if self.cache_dir is not None:
+            self._save(self._path(fingerprint, contract, name, params), values)
+        values.flags.writeable = False
+        self._memory.put((fingerprint, contract, name, params), values, values.nbytes)
+        return values
+
+    @staticmethod
+    def _load(path: Path) -> Optional[np.ndarray]:
+        try:
+            values = np.load(path)
+        except FileNotFoundError:  # нет в кэше или только что вытеснен другим воркером
+            return None
+        # чтение продлевает жизнь файла при вытеснении по mtime
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return values
+
+    def _save(self, path: Path, values: np.ndarray) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp_path, path)
+
+        self._disk_bytes += path.stat().st_size
+        if self.disk_limit_bytes is not None and self._disk_bytes > self.disk_limit_bytes:
+            # другие воркеры пишут в тот же каталог — пересчитываем размер по диску
+            self._disk_bytes = self.prune()
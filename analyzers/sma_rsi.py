@@ -1,42 +1,87 @@
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
 from analyzers.base import SignalAnalyzerBase
+from analyzers.incremental import SMARSIState
+from analyzers.indicator_cache import IndicatorCache
 from core.logger import get_logger
 
 log = get_logger(__name__)
 
 
 class SMARSIAnalyzer(SignalAnalyzerBase):
-    def __init__(self, sma=50, rsi=14, atr=14, rsi_buy=55, rsi_sell=45):
+    def __init__(self, sma=50, rsi=14, atr=14, rsi_buy=55, rsi_sell=45, cache: Optional[IndicatorCache] = None):
         super().__init__(sma=sma, rsi=rsi, atr=atr, rsi_buy=rsi_buy, rsi_sell=rsi_sell)
+        # кэш не входит в params: он не влияет на результат и идентификатор стратегии
+        self.cache = cache
+
+    @property
+    def warmup_period(self) -> int:
+        # +1: RSI и ATR используют diff/shift от предыдущего close
+        return max(self.params["sma"], self.params["rsi"], self.params["atr"]) + 1
+
+    def incremental_state(self) -> SMARSIState:
+        """Состояние для побарного обновления (один на контракт): state.update(bar) -> sma/rsi/atr."""
+        return SMARSIState(self.params["sma"], self.params["rsi"], self.params["atr"])
 
     def calculate(self, df: pd.DataFrame) -> pd.DataFrame:
+        # отпечатки — по входному кадру: для одного и того же кадра провайдера они считаются один раз на всю сетку
+        fingerprints = self.cache.fingerprints(df) if self.cache is not None else None
         df = df.copy()
         if "contract_code" not in df.columns:
             log.warning(
                 "⚠️ contract_code отсутствует в датафрейме — показатели SMA/RSI будут считаться сквозным образом.")
 
-            return self._calculate_indicators(df)
+            return self._calculate_indicators(df, fingerprints)
 
-        return df.groupby("contract_code", group_keys=False).apply(self._calculate_indicators)
+        return df.groupby("contract_code", group_keys=False, observed=True).apply(
+            lambda group: self._calculate_indicators(group, fingerprints)
+        )
 
-    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        df["sma"] = df["close"].rolling(self.params["sma"]).mean()
+    def _calculate_indicators(self, df: pd.DataFrame, fingerprints: Optional[dict[str, str]] = None) -> pd.DataFrame:
+        indicators = {
+            "sma": (self.params["sma"], self._sma),
+            "rsi": (self.params["rsi"], self._rsi),
+            "atr": (self.params["atr"], self._atr),
+        }
+        if self.cache is None or not len(df):
+            for name, (period, compute) in indicators.items():
+                df[name] = compute(df, period)
+            return df
+
+        contract = str(df["contract_code"].iloc[0]) if "contract_code" in df.columns else "ALL"
+        fingerprint = fingerprints[contract]
+        for name, (period, compute) in indicators.items():
+            # промах считает все периоды сетки теми же формулами pandas, что и без кэша: значения бит в бит
+            # совпадают с некэшированным расчётом, и сигналы на равенствах close == sma не зависят от кэша
+            df[name] = self.cache.get_or_compute_grid(
+                fingerprint, contract, name, period,
+                lambda periods, compute=compute: np.column_stack([compute(df, p).to_numpy(dtype=float) for p in periods]),
+            )
+        return df
 
+    @staticmethod
+    def _sma(df: pd.DataFrame, period: int) -> pd.Series:
+        return df["close"].rolling(period).mean()
+
+    @staticmethod
+    def _rsi(df: pd.DataFrame, period: int) -> pd.Series:
         delta = df["close"].diff()
-        gain = delta.where(delta > 0, 0).rolling(self.params["rsi"]).mean()
-        loss = -delta.where(delta < 0, 0).rolling(self.params["rsi"]).mean()
+        gain = delta.where(delta > 0, 0).rolling(period).mean()
+        loss = -delta.where(delta < 0, 0).rolling(period).mean()
         rs = gain / loss
-        df["rsi"] = 100 - (100 / (1 + rs))
+        return 100 - (100 / (1 + rs))
 
+    @staticmethod
+    def _atr(df: pd.DataFrame, period: int) -> pd.Series:
         tr = pd.concat([
             df["high"] - df["low"],
             (df["high"] - df["close"].shift()).abs(),
             (df["low"] - df["close"].shift()).abs()
         ], axis=1).max(axis=1)
-        df["atr"] = tr.rolling(self.params["atr"]).mean()
-
-        return df
+        return tr.rolling(period).mean()
 
     def get_signal(self, row: pd.Series) -> int:
         signal = 0
@@ -46,3 +91,12 @@ class SMARSIAnalyzer(SignalAnalyzerBase):
             signal = -1
 
         return signal
+
+    def get_signals(self, df: pd.DataFrame) -> np.ndarray:
+        # сравнения с NaN дают False — как и в get_signal, пока индикаторы не прогреты
+        close = df["close"].to_numpy(dtype=float)
+        sma = df["sma"].to_numpy(dtype=float)
+        rsi = df["rsi"].to_numpy(dtype=float)
+        buy = (close > sma) & (rsi > self.params["rsi_buy"])
+        sell = (close < sma) & (rsi < self.params["rsi_sell"])
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
@@ -1,12 +1,17 @@
 from typing import Optional, Type, Union
 from datetime import timedelta
+import numpy as np
 import pandas as pd
 
 from core.logger import get_logger
+from core.strategy import StrategyBatch
+from core.walk_forward import Fold, load_fold_candles
 from providers.base import AbstractCandleProvider
 
 log = get_logger(__name__)
 
+BAR = timedelta(hours=1)
+
 
 class BacktestRunner:
     def __init__(
@@ -17,8 +22,14 @@ class BacktestRunner:
         stride_days: Optional[int] = None,
         exclude_days_start: int = 0,
         exclude_days_end: int = 0,
-        tickers: Optional[Union[str, list[str]]] = None
+        tickers: Optional[Union[str, list[str]]] = None,
+        stream_chunk_days: Optional[int] = None
     ):
+        """
+        stream_chunk_days: если задан, обычные (не rollover и не портфельные) прогоны без окон идут
+        потоком кусков по столько дней через data_provider.iter_candles.
+        """
+        self.stream_chunk_days = stream_chunk_days
         self.exclude_days_end = exclude_days_end
         self.exclude_days_start = exclude_days_start
         self.strategy_class = strategy_class
@@ -33,32 +44,45 @@ class BacktestRunner:
 
         strategy = self.strategy_class()
         is_rollover = getattr(strategy.simulator, "rollover_aware", False)
+        is_portfolio = getattr(strategy.simulator, "portfolio_aware", False)
 
         tickers_to_run = self.tickers or self.data_provider.get_available_tickers()
 
-        # Rollover работает как один общий контракт
-        if is_rollover:
+        # Rollover работает как один общий контракт, портфель — как все инструменты сразу с общим капиталом
+        if is_rollover or is_portfolio:
+            label = "Portfolio" if is_portfolio else "Rollover"
             ticker = tickers_to_run  # список или один тикер
             raw_hourly = self.data_provider.get_hourly_candles(ticker=ticker)
             if raw_hourly.empty:
-                log.warning("⚠️ Нет данных для Rollover стратегии")
+                log.warning(f"⚠️ Нет данных для {label} стратегии")
                 return
 
             start = raw_hourly["datetime"].min() + timedelta(days=self.exclude_days_start)
             end = raw_hourly["datetime"].max() - timedelta(days=self.exclude_days_end)
 
-            minute_df = self.data_provider.get_minute_candles(ticker=ticker, from_dt=start, to_dt=end)
-            hourly_df = self.data_provider.get_hourly_candles(ticker=ticker, from_dt=start, to_dt=end)
+            minute_df, hourly_df = self._load_candles(ticker, start, end)
 
             if self.window_days:
-                self._run_rolling_windows(minute_df, hourly_df, "Rollover")
+                self._run_rolling_windows(minute_df, hourly_df, label)
             else:
-                self._run_full(minute_df, hourly_df, "Rollover")
+                self._run_full(minute_df, hourly_df, label)
 
             return
 
         # Обычные стратегии по каждому тикеру
         for ticker in tickers_to_run:
+            # пакет стратегий идёт обычным прогоном: потоковая симуляция — по одной стратегии
+            if self.stream_chunk_days and not self.window_days and not isinstance(strategy, StrategyBatch):
+                # границы — из get_time_range, чтобы не загружать ради них всю историю
+                first, last = self.data_provider.get_time_range(ticker)
+                if first is None:
+                    log.warning(f"⚠️ Нет данных для контракта {ticker}")
+                    continue
+                start = first + timedelta(days=self.exclude_days_start)
+                end = last - timedelta(days=self.exclude_days_end)
+                self._run_stream(ticker, start, end)
+                continue
+
             raw_hourly = self.data_provider.get_hourly_candles(ticker=ticker)
             if raw_hourly.empty:
                 log.warning(f"⚠️ Нет данных для контракта {ticker}")
@@ -67,8 +91,7 @@ class BacktestRunner:
             start = raw_hourly["datetime"].min() + timedelta(days=self.exclude_days_start)
             end = raw_hourly["datetime"].max() - timedelta(days=self.exclude_days_end)
 
-            minute_df = self.data_provider.get_minute_candles(ticker=ticker, from_dt=start, to_dt=end)
-            hourly_df = self.data_provider.get_hourly_candles(ticker=ticker, from_dt=start, to_dt=end)
+            minute_df, hourly_df = self._load_candles(ticker, start, end)
 
             if minute_df.empty or hourly_df.empty:
                 log.warning(f"⚠️ Нет свечей в окне {start} → {end} для контракта {ticker}")
@@ -79,6 +102,16 @@ class BacktestRunner:
             else:
                 self._run_full(minute_df, hourly_df, ticker)
 
+    def _load_candles(self, ticker, start, end) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Минутки и часовые бары от start до конца бара, открытого в end, включительно.
+        Бары запрашиваются до end + 1 бар (to_dt для баров исключающий), минутки — до последней минуты того же бара.
+        """
+        bar_end = end + BAR
+        minute_df = self.data_provider.get_minute_candles(ticker=ticker, from_dt=start, to_dt=bar_end - pd.Timedelta(1, "ns"))
+        hourly_df = self.data_provider.get_hourly_candles(ticker=ticker, from_dt=start, to_dt=bar_end)
+        return minute_df, hourly_df
+
     def _run_full(self, minute_df: pd.DataFrame, hourly_df: pd.DataFrame, contract_code: str):
         strategy = self.strategy_class()
         self.strategy_id = strategy.strategy_id
@@ -87,21 +120,46 @@ class BacktestRunner:
         start = hourly_df["datetime"].min()
         end = hourly_df["datetime"].max()
 
-        result = self._make_result(minute_df, hourly_df, strategy, contract_code, contract_name, start, end)
-        self.results.append(result)
+        self.results.extend(self._make_results(minute_df, hourly_df, strategy, contract_code, contract_name, start, end))
+
+    def _run_stream(self, ticker: str, start, end):
+        strategy = self.strategy_class()
+        self.strategy_id = strategy.strategy_id
+
+        chunks = self.data_provider.iter_candles(
+            ticker=ticker,
+            from_dt=start,
+            to_dt=end,
+            chunk=timedelta(days=self.stream_chunk_days),
+            warmup=strategy.analyzer.warmup_period,
+            timeframe="1h",
+        )
+        result = strategy.run_stream(chunks)
+        self.results.append(self._annotate(result, strategy, ticker, f"{ticker} (stream)", start, end))
 
     def _run_rolling_windows(self, minute_df: pd.DataFrame, hourly_df: pd.DataFrame, contract_code: str):
-        start = hourly_df["datetime"].min()
-        end = hourly_df["datetime"].max()
+        """
+        Индикаторы считаются один раз по всему ряду, границы окон — searchsorted по отсортированному времени.
+        Окно получает срез iloc уже посчитанного ряда: индикаторы на его первых барах прогреты историей
+        до окна, а отбор строк не требует масок по всей длине на каждое окно.
+        """
+        hourly_df, hour_ns = self._sorted_by_time(self.strategy_class().analyzer.calculate(hourly_df))
+        minute_df, minute_ns = self._sorted_by_time(minute_df)
+        if hourly_df.empty:
+            return
+
+        start = hourly_df["datetime"].iloc[0]
+        end = hourly_df["datetime"].iloc[-1]
         window = timedelta(days=self.window_days)
         stride = timedelta(days=self.stride_days or self.window_days)
 
         current = start
         while current + window <= end:
-            min_window = minute_df[(minute_df["datetime"] >= current) & (minute_df["datetime"] < current + window)]
-            hour_window = hourly_df[(hourly_df["datetime"] >= current) & (hourly_df["datetime"] < current + window)]
+            bounds = [current.value, (current + window).value]
+            lo, hi = np.searchsorted(hour_ns, bounds, side="left")
+            minute_lo, minute_hi = np.searchsorted(minute_ns, bounds, side="left")
 
-            if hour_window.empty or min_window.empty:
+            if hi <= lo or minute_hi <= minute_lo:
                 current += stride
                 continue
 
@@ -110,11 +168,68 @@ class BacktestRunner:
 
             contract_name = f"{contract_code} ({current.date()} → {(current + window).date()})"
 
-            result = self._make_result(min_window, hour_window, strategy, contract_code, contract_name, current, current + window)
-            self.results.append(result)
+            self.results.extend(self._make_results(
+                minute_df.iloc[minute_lo:minute_hi], hourly_df.iloc[lo:hi], strategy,
+                contract_code, contract_name, current, current + window, calculated=True,
+            ))
             current += stride
 
-    def _make_result(
+    def run_fold(self, fold: Fold, hourly_df: Optional[pd.DataFrame] = None, minute_df: Optional[pd.DataFrame] = None):
+        """
+        Ступень walk-forward по всем тикерам сразу: индикаторы считаются один раз на [train_start, test_end),
+        обучающее и проверочное окна — срезы этого расчёта (проверочное прогрето историей обучающего).
+        hourly_df/minute_df — уже загруженные свечи ступени (см. load_fold_candles), иначе читаются из провайдера.
+        Результаты помечены fold и phase ("train" / "test").
+        """
+        if hourly_df is None:
+            hourly_df, minute_df = load_fold_candles(self.data_provider, fold, self.tickers)
+
+        strategy = self.strategy_class()
+        simulator = strategy.simulator
+        if getattr(simulator, "portfolio_aware", False):
+            label = "Portfolio"
+        elif getattr(simulator, "rollover_aware", False):
+            label = "Rollover"
+        else:
+            label = "All"
+
+        hourly_df, hour_ns = self._sorted_by_time(strategy.analyzer.calculate(hourly_df))
+        minute_df, minute_ns = self._sorted_by_time(minute_df)
+        bounds = [fold.train_start.value, fold.test_start.value, fold.test_end.value]
+        hour_bounds = np.searchsorted(hour_ns, bounds, side="left")
+        minute_bounds = np.searchsorted(minute_ns, bounds, side="left")
+
+        phases = (("train", fold.train_start, fold.test_start), ("test", fold.test_start, fold.test_end))
+        for k, (phase, start, end) in enumerate(phases):
+            lo, hi = hour_bounds[k], hour_bounds[k + 1]
+            if hi <= lo:
+                log.warning(f"⚠️ Ступень {fold.index}: нет свечей в окне {phase} {start} → {end}")
+                continue
+
+            if phase == "test":
+                strategy = self.strategy_class()
+            self.strategy_id = strategy.strategy_id
+            contract_name = f"{label} {phase} ({start.date()} → {end.date()})"
+
+            results = self._make_results(
+                minute_df.iloc[minute_bounds[k]:minute_bounds[k + 1]], hourly_df.iloc[lo:hi], strategy,
+                label, contract_name, start, end, calculated=True,
+            )
+            for result in results:
+                result["fold"] = fold.index
+                result["phase"] = phase
+            self.results.extend(results)
+
+    @staticmethod
+    def _sorted_by_time(df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+        """Свечи по возрастанию времени (устойчиво, без копии, если уже отсортированы) и их время в нс UTC."""
+        ns = df["datetime"].to_numpy(dtype="datetime64[ns]").view("int64")
+        if len(ns) and np.any(ns[1:] < ns[:-1]):
+            order = np.argsort(ns, kind="stable")
+            return df.iloc[order], ns[order]
+        return df, ns
+
+    def _make_results(
         self,
         minute_df: pd.DataFrame,
         hourly_df: pd.DataFrame,
@@ -122,9 +237,22 @@ class BacktestRunner:
         contract_code: str,
         contract_name: str,
         start,
-        end
-    ) -> dict:
-        result = strategy.run(hourly_df, minute_df=minute_df)
+        end,
+        calculated: bool = False
+    ) -> list[dict]:
+        """calculated: индикаторы в hourly_df уже посчитаны — стратегия их не пересчитывает."""
+        run = strategy.run_calculated if calculated else strategy.run
+        if isinstance(strategy, StrategyBatch):
+            # пакет: один проход симулятора, результат на каждую стратегию
+            results = run(hourly_df, minute_df=minute_df)
+            return [
+                self._annotate(result, member, contract_code, contract_name, start, end)
+                for result, member in zip(results, strategy.strategies)
+            ]
+        result = run(hourly_df, minute_df=minute_df)
+        return [self._annotate(result, strategy, contract_code, contract_name, start, end)]
+
+    def _annotate(self, result: dict, strategy, contract_code: str, contract_name: str, start, end) -> dict:
         result["contract"] = contract_name
         result["strategy"] = strategy
         result["strategy_id"] = strategy.strategy_id
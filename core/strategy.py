@@ -1,8 +1,11 @@
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+import numpy as np
 import pandas as pd
 
 from analyzers.base import SignalAnalyzerBase
+from providers.base import CandleChunk
 from evaluators.strategy_evaluator import StrategyEvaluator
+from simulators.ledger import TradeLedger
 from core.logger import get_logger
 
 log = get_logger(__name__)
@@ -12,21 +15,91 @@ class BasicStrategy:
     def __init__(self, analyzer: SignalAnalyzerBase, simulator):
         self.analyzer = analyzer
         self.simulator = simulator
-        self.trades = []
+        self.trades = TradeLedger()
         self.evaluator = StrategyEvaluator()
         self.strategy_id = self.generate_strategy_id()
 
     def run(self, hourly_df: pd.DataFrame, minute_df: Optional[pd.DataFrame] = None) -> dict:
-        hourly_df = hourly_df.copy()
-        hourly_df = self.analyzer.calculate(hourly_df)
-        hourly_df["signal"] = hourly_df.apply(self.analyzer.get_signal, axis=1)
+        # calculate() сам возвращает новый датафрейм — отдельная копия входа не нужна
+        return self.run_calculated(self.analyzer.calculate(hourly_df), minute_df=minute_df)
 
-        self.trades = self.simulator.simulate(hourly_df, hourly_df["signal"], minute_df=minute_df)
+    def run_calculated(self, hourly_df: pd.DataFrame, minute_df: Optional[pd.DataFrame] = None) -> dict:
+        """Прогон по свечам с уже посчитанными индикаторами (например, срез общего расчёта); вход не меняется."""
+        self.trades = self.simulator.simulate(hourly_df, self._signals(hourly_df), minute_df=minute_df)
 
         result = self.evaluator.evaluate(self.trades)
         result["trades_df"] = self.trades.copy()
+        # симуляторы с общим капиталом (PortfolioSimulator) отдают и кривую капитала
+        equity = getattr(self.simulator, "equity", None)
+        if equity is not None:
+            result["equity"] = equity
         return result
 
+    def run_stream(self, chunks: Iterable[CandleChunk]) -> dict:
+        """
+        Прогон по потоку кусков провайдера (iter_candles с warmup=analyzer.warmup_period):
+        индикаторы, симуляция и метрики считаются кусок за куском.
+        """
+        trade_chunks = []
+
+        def signal_frames() -> Iterator[pd.DataFrame]:
+            for df in self.analyzer.iter_calculate(chunks):
+                df["signal"] = self._signals(df)
+                yield df
+
+        def collected(trades: Iterable[TradeLedger]) -> Iterator[TradeLedger]:
+            for ledger in trades:
+                trade_chunks.append(ledger)
+                yield ledger
+
+        result = self.evaluator.evaluate_stream(collected(self.simulator.simulate_stream(signal_frames())))
+        self.trades = TradeLedger.concat(trade_chunks)
+        result["trades_df"] = self.trades
+        return result
+
+    def _signals(self, hourly_df: pd.DataFrame) -> pd.Series:
+        # get_signals у анализатора векторный, если он его переопределил; иначе построчный get_signal
+        return pd.Series(self.analyzer.get_signals(hourly_df), index=hourly_df.index)
+
     def generate_strategy_id(self) -> str:
         params_str = "_".join(f"{k}{v}" for k, v in self.analyzer.params.items())
         return f"{self.analyzer.__class__.__name__}_{params_str}"
+
+
+class StrategyBatch:
+    """
+    Пакет BasicStrategy, различающихся только порогами сигналов (например, rsi_buy/rsi_sell при общих sma/rsi).
+
+    Индикаторы считает анализатор первой стратегии — у всех стратегий пакета они должны совпадать;
+    сигналы складываются в матрицу (строки × стратегии), и симулятор первой стратегии прогоняет её
+    одним simulate_batch. run() возвращает по результату на каждую стратегию, в их порядке.
+    """
+
+    def __init__(self, strategies: list[BasicStrategy]):
+        if not strategies:
+            raise ValueError("Пустой пакет стратегий")
+        self.strategies = strategies
+        self.analyzer = strategies[0].analyzer
+        self.simulator = strategies[0].simulator
+        self.strategy_id = ", ".join(strategy.strategy_id for strategy in strategies)
+
+    def run(self, hourly_df: pd.DataFrame, minute_df: Optional[pd.DataFrame] = None) -> list[dict]:
+        return self.run_calculated(self.analyzer.calculate(hourly_df), minute_df=minute_df)
+
+    def run_calculated(self, hourly_df: pd.DataFrame, minute_df: Optional[pd.DataFrame] = None) -> list[dict]:
+        signal_matrix = np.empty((len(hourly_df), len(self.strategies)), dtype=np.int8)
+        for j, strategy in enumerate(self.strategies):
+            signal_matrix[:, j] = strategy.analyzer.get_signals(hourly_df)
+
+        trades = self.simulator.simulate_batch(hourly_df, signal_matrix, minute_df=minute_df)
+        curves = getattr(self.simulator, "equity_curves", None)
+
+        results = []
+        for j, (strategy, ledger) in enumerate(zip(self.strategies, trades)):
+            strategy.trades = ledger
+            result = strategy.evaluator.evaluate(ledger)
+            result["trades_df"] = ledger.copy()
+            if curves is not None:
+                result["equity"] = curves[j]
+            results.append(result)
+        return results
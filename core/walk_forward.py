@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from core.logger import get_logger
+from providers.base import AbstractCandleProvider
+from simulators.ledger import TradeLedger, as_ledger
+
+log = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Fold:
+    """Ступень walk-forward: подбор параметров на [train_start, test_start), проверка на [test_start, test_end)."""
+    index: int
+    train_start: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+def make_folds(start, end, train_days: int, test_days: int) -> list[Fold]:
+    """
+    Ступени подряд: обучающее окно train_days, за ним проверочное test_days; сдвиг — на test_days,
+    так что проверочные окна не перекрываются и склеиваются в одну непрерывную out-of-sample историю.
+    """
+    train, test = timedelta(days=train_days), timedelta(days=test_days)
+    folds = []
+    current = pd.Timestamp(start)
+    while current + train + test <= end:
+        folds.append(Fold(len(folds), current, current + train, current + train + test))
+        current += test
+    return folds
+
+
+def load_fold_candles(
+    provider: AbstractCandleProvider,
+    fold: Fold,
+    tickers: Optional[Union[str, list[str]]] = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Часовые и минутные свечи всех тикеров на [train_start, test_end) ступени — (hourly, minute)."""
+    tickers = tickers or provider.get_available_tickers()
+    hourly_df = provider.get_hourly_candles(ticker=tickers, from_dt=fold.train_start, to_dt=fold.test_end)
+    minute_df = provider.get_minute_candles(ticker=tickers, from_dt=fold.train_start, to_dt=fold.test_end)
+    return hourly_df, minute_df
+
+
+def _score(value) -> float:
+    return float(value) if value is not None and pd.notna(value) else -np.inf
+
+
+def walk_forward_report(results: list[dict], metric: str = "pnl_net") -> tuple[pd.DataFrame, TradeLedger]:
+    """
+    Итог walk-forward по результатам BacktestRunner.run_fold всех ступеней и параметров (в любом порядке).
+
+    На каждой ступени победитель — strategy_id с лучшей metric на обучающем окне (при равенстве — первый
+    по strategy_id); в отчёт идёт его результат на проверочном окне. Возвращает таблицу ступеней и
+    склеенный журнал out-of-sample сделок по времени выхода — накопленный pnl_net по нему и есть
+    кривая капитала out-of-sample.
+    """
+    train, test = {}, {}
+    for result in results:
+        if result["phase"] == "train":
+            train.setdefault(result["fold"], []).append(result)
+        else:
+            test[(result["fold"], result["strategy_id"])] = result
+
+    rows, ledgers = [], []
+    for fold in sorted(train):
+        candidates = sorted(train[fold], key=lambda r: r["strategy_id"])
+        best = max(candidates, key=lambda r: _score(r.get(metric)))
+        oos = test.get((fold, best["strategy_id"]))
+        if oos is None:
+            log.warning(f"⚠️ Ступень {fold}: нет результата на проверочном окне для {best['strategy_id']}")
+            continue
+
+        rows.append({
+            "fold": fold,
+            "train_start": best["start"],
+            "test_start": oos["start"],
+            "test_end": oos["end"],
+            "strategy_id": best["strategy_id"],
+            f"train_{metric}": best.get(metric),
+            "pnl_net": oos["pnl_net"],
+            "sharpe": oos["sharpe"],
+            "drawdown": oos["drawdown"],
+            "trades": oos["trades"],
+        })
+        ledgers.append(as_ledger(oos.get("trades_df")))
+
+    oos_trades = TradeLedger.concat(ledgers)
+    if not oos_trades.empty:
+        oos_trades = _sorted_by_exit(oos_trades)
+    return pd.DataFrame(rows), oos_trades
+
+
+def _sorted_by_exit(trades: TradeLedger) -> TradeLedger:
+    order = np.argsort(trades.array("exit_time"), kind="stable")
+    if np.all(order[1:] > order[:-1]):
+        return trades
+    return TradeLedger.from_frame(trades.to_frame().iloc[order])
@@ -1,6 +1,7 @@
 import pandas as pd
 from typing import List
 from evaluators.metrics import sharpe_ratio, profit_factor, winrate, expectancy, max_drawdown
+from simulators.ledger import TradeLedger, as_ledger
 
 def aggregate_by_strategy(results: List[dict]) -> pd.DataFrame:
     df = pd.DataFrame(results)
@@ -12,7 +13,7 @@ def aggregate_by_strategy(results: List[dict]) -> pd.DataFrame:
 
     for strategy_id, group in strategy_groups:
         # Объединяем все сделки по всем окнам
-        all_trades = pd.concat(group["trades_df"].tolist(), ignore_index=True)
+        all_trades = TradeLedger.concat(as_ledger(trades) for trades in group["trades_df"])
 
         pnl_raw_total = group["pnl_raw"].sum()
         pnl_net_total = group["pnl_net"].sum()
@@ -1,11 +1,22 @@
+from typing import Union
+
 import pandas as pd
 import numpy as np
 
+from kernels.backend import get_backend
+from simulators.ledger import TradeLedger
+
+# Сделки — таблица или журнал: метрикам нужна только колонка pnl_net
+Trades = Union[pd.DataFrame, TradeLedger]
+
+
+def _pnl_net(trades: Trades) -> np.ndarray:
+    return np.asarray(trades["pnl_net"], dtype=float)
+
+
 def max_drawdown(pnl_series: pd.Series) -> float:
     """Максимальная просадка equity"""
-    cumulative = pnl_series.cumsum()
-    drawdown = cumulative.cummax() - cumulative
-    return float(drawdown.max())
+    return float(get_backend().max_drawdown(np.asarray(pnl_series, dtype=float)))
 
 def sharpe_ratio(pnl_series: pd.Series, risk_free_rate: float = 0.0) -> float:
     """Sharpe ratio: assumes pnl in points per trade"""
@@ -16,30 +27,102 @@ def sharpe_ratio(pnl_series: pd.Series, risk_free_rate: float = 0.0) -> float:
         return np.nan
     return float(np.mean(excess_returns) / std) * np.sqrt(len(returns))
 
-def winrate(trades_df: pd.DataFrame) -> float:
+def winrate(trades: Trades) -> float:
     """Процент прибыльных сделок"""
-    total = len(trades_df)
+    total = len(trades)
     if total == 0:
         return np.nan
-    wins = trades_df[trades_df["pnl_net"] > 0]
-    return float(len(wins)) / total * 100
+    wins = np.count_nonzero(_pnl_net(trades) > 0)
+    return float(wins) / total * 100
 
-def profit_factor(trades_df: pd.DataFrame) -> float:
+def profit_factor(trades: Trades) -> float:
     """Отношение прибыли к убыткам"""
-    gross_profit = trades_df[trades_df["pnl_net"] > 0]["pnl_net"].sum()
-    gross_loss = abs(trades_df[trades_df["pnl_net"] < 0]["pnl_net"].sum())
+    pnl = _pnl_net(trades)
+    gross_profit = pnl[pnl > 0].sum()
+    gross_loss = abs(pnl[pnl < 0].sum())
     if gross_loss == 0:
         return np.nan
     return float(gross_profit / gross_loss)
 
-def expectancy(trades_df: pd.DataFrame) -> float:
+def expectancy(trades: Trades) -> float:
     """Ожидаемая прибыль на сделку"""
-    total = len(trades_df)
+    total = len(trades)
     if total == 0:
         return np.nan
-    wins = trades_df[trades_df["pnl_net"] > 0]
-    losses = trades_df[trades_df["pnl_net"] <= 0]
-    avg_win = wins["pnl_net"].mean() if not wins.empty else 0.0
-    avg_loss = losses["pnl_net"].mean() if not losses.empty else 0.0
+    pnl = _pnl_net(trades)
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl <= 0]
+    avg_win = wins.mean() if len(wins) else 0.0
+    avg_loss = losses.mean() if len(losses) else 0.0
     win_ratio = len(wins) / total
     return win_ratio * avg_win + (1 - win_ratio) * avg_loss
+
+
+class RunningMetrics:
+    """Те же метрики, что и выше, но накапливаемые по кускам сделок без хранения всей истории"""
+
+    def __init__(self):
+        self.count = 0
+        self.pnl_raw = 0.0
+        self.pnl_net = 0.0
+        self.wins = 0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self.gross_loss = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.equity = 0.0
+        self.peak = -np.inf
+        self.drawdown = 0.0
+
+    def update(self, trades: Trades) -> None:
+        if trades.empty:
+            return
+        net = _pnl_net(trades)
+        n = len(net)
+
+        self.pnl_raw += float(np.sum(trades["pnl_raw"]))
+        self.pnl_net += float(net.sum())
+        win_mask = net > 0
+        self.wins += int(win_mask.sum())
+        self.win_sum += float(net[win_mask].sum())
+        self.loss_sum += float(net[~win_mask].sum())
+        self.gross_loss += float(-net[net < 0].sum())
+
+        # Объединение среднего и суммы квадратов отклонений (Chan et al.)
+        chunk_mean = float(net.mean())
+        chunk_m2 = float(((net - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+        cumulative = self.equity + np.cumsum(net)
+        peaks = np.maximum.accumulate(np.maximum(cumulative, self.peak))
+        self.drawdown = max(self.drawdown, float((peaks - cumulative).max()))
+        self.peak = float(peaks[-1])
+        self.equity = float(cumulative[-1])
+
+    def sharpe_ratio(self) -> float:
+        std = np.sqrt(self.m2 / self.count) if self.count else np.nan
+        if self.count == 0 or std == 0 or np.isnan(std):
+            return np.nan
+        return float(self.mean / std) * np.sqrt(self.count)
+
+    def winrate(self) -> float:
+        return float(self.wins) / self.count * 100 if self.count else np.nan
+
+    def profit_factor(self) -> float:
+        if self.gross_loss == 0:
+            return np.nan
+        return float(self.win_sum / self.gross_loss)
+
+    def expectancy(self) -> float:
+        if self.count == 0:
+            return np.nan
+        losses = self.count - self.wins
+        avg_win = self.win_sum / self.wins if self.wins else 0.0
+        avg_loss = self.loss_sum / losses if losses else 0.0
+        win_ratio = self.wins / self.count
+        return win_ratio * avg_win + (1 - win_ratio) * avg_loss
@@ -1,12 +1,17 @@
+from typing import Iterable
+
 from evaluators import metrics
-import pandas as pd
+from evaluators.metrics import Trades
+from simulators.ledger import TradeLedger
+import numpy as np
 
 class StrategyEvaluator:
     def __init__(self):
         pass
 
-    def evaluate(self, trades_df: pd.DataFrame) -> dict:
-        if trades_df.empty:
+    def evaluate(self, trades: Trades) -> dict:
+        """Метрики по сделкам — журналу TradeLedger или таблице сделок"""
+        if trades.empty:
             return {
                 "pnl_raw": 0.0,
                 "pnl_net": 0.0,
@@ -18,16 +23,36 @@ class StrategyEvaluator:
                 "expectancy": 0.0
             }
 
-        pnl_raw_series = trades_df["pnl_raw"]
-        pnl_net_series = trades_df["pnl_net"]
+        pnl_raw = np.asarray(trades["pnl_raw"], dtype=float)
+        pnl_net = np.asarray(trades["pnl_net"], dtype=float)
+
+        return {
+            "pnl_raw": round(pnl_raw.sum(), 2),
+            "pnl_net": round(pnl_net.sum(), 2),
+            "trades": len(trades),
+            "winrate": round(metrics.winrate(trades), 2),
+            "drawdown": round(metrics.max_drawdown(pnl_net), 2),
+            "sharpe": round(metrics.sharpe_ratio(pnl_net), 2),
+            "profit_factor": round(metrics.profit_factor(trades), 2),
+            "expectancy": round(metrics.expectancy(trades), 2)
+        }
+
+    def evaluate_stream(self, trade_chunks: Iterable[Trades]) -> dict:
+        """То же, что evaluate, но по потоку кусков сделок — вся история в памяти не нужна"""
+        running = metrics.RunningMetrics()
+        for trades in trade_chunks:
+            running.update(trades)
+
+        if running.count == 0:
+            return self.evaluate(TradeLedger())
 
         return {
-            "pnl_raw": round(pnl_raw_series.sum(), 2),
-            "pnl_net": round(pnl_net_series.sum(), 2),
-            "trades": len(trades_df),
-            "winrate": round(metrics.winrate(trades_df), 2),
-            "drawdown": round(metrics.max_drawdown(pnl_net_series), 2),
-            "sharpe": round(metrics.sharpe_ratio(pnl_net_series), 2),
-            "profit_factor": round(metrics.profit_factor(trades_df), 2),
-            "expectancy": round(metrics.expectancy(trades_df), 2)
+            "pnl_raw": round(running.pnl_raw, 2),
+            "pnl_net": round(running.pnl_net, 2),
+            "trades": running.count,
+            "winrate": round(running.winrate(), 2),
+            "drawdown": round(running.drawdown, 2),
+            "sharpe": round(running.sharpe_ratio(), 2),
+            "profit_factor": round(running.profit_factor(), 2),
+            "expectancy": round(running.expectancy(), 2)
         }
@@ -0,0 +1,60 @@
+import importlib
+from types import ModuleType
+from typing import Optional
+
+import numpy as np
+
+from core.logger import get_logger
+
+log = get_logger(__name__)
+
+BACKENDS = {
+    "numpy": "kernels.numpy_backend",
+    "numba": "kernels.numba_backend",
+}
+DEFAULT_BACKEND = "numpy"
+
+_active: Optional[ModuleType] = None
+
+
+def load_backend(name: str) -> ModuleType:
+    """Модуль бэкенда по имени; ImportError, если его зависимость не установлена."""
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд ядер {name!r}, доступны: {', '.join(BACKENDS)}")
+    return importlib.import_module(BACKENDS[name])
+
+
+def available_backends() -> list[str]:
+    names = []
+    for name in BACKENDS:
+        try:
+            load_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name: str) -> ModuleType:
+    """Выбирает бэкенд процесса; если JIT-бэкенд недоступен, остаётся NumPy."""
+    global _active
+    try:
+        _active = load_backend(name)
+    except ImportError as e:
+        log.warning(f"⚠️ Бэкенд ядер {name!r} недоступен ({e}), используется {DEFAULT_BACKEND}")
+        _active = load_backend(DEFAULT_BACKEND)
+    return _active
+
+
+def get_backend() -> ModuleType:
+    if _active is None:
+        return set_backend(DEFAULT_BACKEND)
+    return _active
+
+
+def segment_starts(codes: np.ndarray) -> np.ndarray:
+    """Для каждой строки — индекс первой строки её отрезка (строки одного контракта идут подряд)."""
+    n = len(codes)
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    return np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
@@ -0,0 +1,75 @@
+"""
+Ядра в виде простых циклов по массивам.
+
+Это эталон для numba-бэкенда (он компилирует ровно эти функции) и для тестов
+паритета. Никакого pandas и Python-объектов внутри — только numpy-массивы и скаляры.
+"""
+import numpy as np
+
+
+def rolling_mean_cube(values, periods, seg_start):
+    """
+    rolling(period).mean() внутри отрезков для каждого периода: массив (строки × периоды).
+    seg_start[i] — индекс первой строки отрезка, которому принадлежит строка i.
+    Окно из одинаковых значений даёт ровно это значение (как в pandas).
+    """
+    n = values.shape[0]
+    out = np.full((n, periods.shape[0]), np.nan)
+    for j in range(periods.shape[0]):
+        period = periods[j]
+        total = 0.0
+        run = 0
+        ref = 0.0
+        for i in range(n):
+            start = seg_start[i]
+            if i == start:
+                ref = values[i]
+                total = 0.0
+                run = 0
+            total += values[i] - ref
+            if i - period >= start:
+                total -= values[i - period] - ref
+            if i > start and values[i] == values[i - 1]:
+                run += 1
+            else:
+                run = 1
+            if i - start + 1 >= period:
+                if run >= period:
+                    out[i, j] = values[i]
+                else:
+                    out[i, j] = ref + total / period
+    return out
+
+
+def lagged_position(signals, seg_start):
+    """
+    Позиция, в которой стоит простой симулятор на каждом баре: последний ненулевой
+    сигнал до текущего бара (сигнал исполняется на следующем баре), внутри отрезка; иначе 0.
+    """
+    n = signals.shape[0]
+    out = np.zeros(n, dtype=np.int8)
+    current = 0
+    for i in range(n):
+        if i == seg_start[i]:
+            current = 0
+        out[i] = current
+        if signals[i] != 0:
+            current = signals[i]
+    return out
+
+
+def max_drawdown(pnl):
+    """Максимальная просадка кривой cumsum(pnl) от её текущего максимума; NaN для пустого ряда."""
+    n = pnl.shape[0]
+    if n == 0:
+        return np.nan
+    equity = 0.0
+    peak = -np.inf
+    worst = 0.0
+    for i in range(n):
+        equity += pnl[i]
+        if equity > peak:
+            peak = equity
+        if peak - equity > worst:
+            worst = peak - equity
+    return worst
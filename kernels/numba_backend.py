@@ -0,0 +1,10 @@
+"""JIT-бэкенд: те же циклы из kernels.loops, скомпилированные numba. Импортируется, только если numba установлена."""
+import numba
+
+from kernels import loops
+
+NAME = "numba"
+
+rolling_mean_cube = numba.njit(cache=True)(loops.rolling_mean_cube)
+lagged_position = numba.njit(cache=True)(loops.lagged_position)
+max_drawdown = numba.njit(cache=True)(loops.max_drawdown)
@@ -0,0 +1,49 @@
+"""Эталонный бэкенд: векторные реализации ядер на NumPy."""
+import numpy as np
+
+NAME = "numpy"
+
+
+def rolling_mean_cube(values: np.ndarray, periods: np.ndarray, seg_start: np.ndarray) -> np.ndarray:
+    """
+    Все периоды из одной кумулятивной суммы: среднее окна — разность сдвинутых префиксных сумм.
+    Суммы считаются от первого значения отрезка, чтобы не терять точность на больших ценах.
+    """
+    n = len(values)
+    idx = np.arange(n)
+
+    ref = values[seg_start]
+    cumsum = np.concatenate([[0.0], np.cumsum(values - ref)])
+
+    same = np.zeros(n, dtype=bool)
+    same[1:] = values[1:] == values[:-1]
+    same[seg_start == idx] = False
+    run = idx - np.maximum.accumulate(np.where(same, 0, idx)) + 1
+
+    cube = np.full((n, len(periods)), np.nan)
+    for j, period in enumerate(periods):
+        lo = idx + 1 - period
+        valid = lo >= seg_start
+        lo = np.maximum(lo, 0)
+        mean = ref + (cumsum[idx + 1] - cumsum[lo]) / period
+        mean = np.where(run >= period, values, mean)
+        cube[valid, j] = mean[valid]
+    return cube
+
+
+def lagged_position(signals: np.ndarray, seg_start: np.ndarray) -> np.ndarray:
+    n = len(signals)
+    idx = np.arange(n)
+    last = np.maximum.accumulate(np.where(signals != 0, idx, -1))
+    prev = np.empty(n, dtype=np.int64)
+    prev[:1] = -1
+    prev[1:] = last[:-1]
+    valid = prev >= seg_start
+    return np.where(valid, signals[np.maximum(prev, 0)], 0).astype(np.int8)
+
+
+def max_drawdown(pnl: np.ndarray) -> float:
+    if len(pnl) == 0:
+        return np.nan
+    equity = np.cumsum(pnl)
+    return float((np.maximum.accumulate(equity) - equity).max())
@@ -0,0 +1,107 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import pandas as pd
+from tinkoff.invest import CandleInterval
+from tinkoff.invest.sandbox.async_client import AsyncSandboxClient
+
+from core.catalogs.futures_catalog import ARCHIVE_FUTURES
+from loaders.data_loader import TOKEN, load_candles
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов: rate токенов в секунду, не более capacity подряд."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def with_retry(
+    call: Callable[[], Awaitable[T]],
+    retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    label: str = "",
+) -> T:
+    """Повтор с экспоненциальной задержкой и джиттером; после retries неудач пробрасывает исключение."""
+    for attempt in range(retries + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+            print(f"🔁 {label}: {type(e).__name__}: {e} — повтор {attempt + 1}/{retries} через {delay:.1f} с")
+            await asyncio.sleep(delay)
+
+
+async def download_archive_futures(
+    days: int = 365,
+    interval: CandleInterval = CandleInterval.CANDLE_INTERVAL_HOUR,
+    tickers: Optional[list[str]] = None,
+    client=None,
+    concurrency: int = 4,
+    requests_per_second: float = 2.0,
+    retries: int = 5,
+    base_delay: float = 1.0,
+) -> dict[str, pd.DataFrame]:
+    """
+    Докачивает свечи всех фьючерсов из ARCHIVE_FUTURES (или tickers) через одну сессию клиента.
+
+    - concurrency: сколько FIGI качается одновременно (asyncio.Semaphore)
+    - requests_per_second: общий лимит частоты запросов к API для всех задач (TokenBucket; токен — на каждый
+      запрос GetCandles, а не на FIGI)
+    - retries/base_delay: повторы с backoff; уже сохранённые части при повторе не перекачиваются
+    client — открытый AsyncClient или подмена с get_all_candles; по умолчанию открывается песочница.
+    """
+    tickers = tickers or list(ARCHIVE_FUTURES)
+    if client is None:
+        async with AsyncSandboxClient(TOKEN) as sandbox_client:
+            return await download_archive_futures(
+                days, interval, tickers, sandbox_client, concurrency, requests_per_second, retries, base_delay,
+            )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(requests_per_second)
+
+    async def fetch(ticker: str) -> tuple[str, Optional[pd.DataFrame]]:
+        figi = ARCHIVE_FUTURES[ticker]["figi"]
+
+        async def attempt() -> pd.DataFrame:
+            return await load_candles(figi, days, interval, client=client, limiter=bucket)
+
+        async with semaphore:
+            try:
+                return ticker, await with_retry(attempt, retries, base_delay, label=f"{ticker} ({figi})")
+            except Exception as e:
+                print(f"❌ {ticker} ({figi}): не удалось загрузить свечи: {e}")
+                return ticker, None
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(fetch(ticker) for ticker in tickers))
+    loaded = {ticker: df for ticker, df in results if df is not None}
+    print(f"✅ Загружено {len(loaded)}/{len(tickers)} фьючерсов за {time.monotonic() - started:.1f} с")
+    return loaded
+
+
+if __name__ == "__main__":
+    asyncio.run(download_archive_futures())
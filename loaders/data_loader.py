@@ -1,3 +1,4 @@
+import json
 import os
 from typing import Optional
 
@@ -9,6 +10,7 @@ from tinkoff.invest.utils import now
 from dotenv import load_dotenv
 
 from core.catalogs.futures_catalog import ARCHIVE_FUTURES
+from loaders.spec_cache import InstrumentSpecCache, quotation_to_float
 
 load_dotenv()
 TOKEN = os.getenv("TOKEN_SANDBOX")
@@ -17,92 +19,253 @@ CANDLE_DIR = "../data/candles"
 os.makedirs(CANDLE_DIR, exist_ok=True)
 
 
-async def get_futures_spec(ticker: str):
-    async with AsyncClient(TOKEN) as client:
-        response = await client.instruments.futures()
-        for fut in response.instruments:
-            if fut.ticker == ticker:
-                print(f"Найден: {fut.ticker} | FIGI: {fut.figi} | Название: {fut.name}")
-                return {
-                    "figi": fut.figi,
-                    "step_price": (
-                        (fut.min_price_increment_amount.units + fut.min_price_increment_amount.nano / 1e9) /
-                        (fut.min_price_increment.units + fut.min_price_increment.nano / 1e9)
-                    ),
-                    "lot": fut.lot
-                }
+async def _lookup_spec(ticker: str, client=None, cache: Optional[InstrumentSpecCache] = None) -> Optional[dict]:
+    cache = cache or InstrumentSpecCache()
+    spec = cache.get(ticker)
+    if spec is not None:
+        return spec
+    if client is None:
+        async with AsyncClient(TOKEN) as own_client:
+            return await cache.lookup(ticker, own_client)
+    return await cache.lookup(ticker, client)
+
+
+async def get_futures_spec(ticker: str, client=None, cache: Optional[InstrumentSpecCache] = None):
+    spec = await _lookup_spec(ticker, client, cache)
+    if spec is None:
         print(f"Не найдено совпадений для {ticker}")
         return None
+    print(f"Найден: {ticker} | FIGI: {spec['figi']} | Название: {spec['name']}")
+    return {"figi": spec["figi"], "step_price": spec["step_price"], "lot": spec["lot"]}
+
+
+MAX_STORE_PARTS = 32  # после стольких дозагрузок части хранилища сливаются в одну
+COVERAGE_FILE = "coverage.json"  # уже запрошенный у API диапазон [from, to) — рядом с частями
+
+# Наибольший период одного запроса GetCandles по интервалу: отрезок такой длины — ровно один запрос к API
+MAX_REQUEST_PERIOD = {
+    "CANDLE_INTERVAL_1_MIN": timedelta(days=1),
+    "CANDLE_INTERVAL_5_MIN": timedelta(days=1),
+    "CANDLE_INTERVAL_15_MIN": timedelta(days=1),
+    "CANDLE_INTERVAL_HOUR": timedelta(days=7),
+    "CANDLE_INTERVAL_DAY": timedelta(days=365),
+}
+
+
+def _store_dir(figi: str, interval: CandleInterval) -> str:
+    """Одно хранилище на (FIGI, интервал) — независимо от глубины запроса в днях."""
+    return os.path.join(CANDLE_DIR, f"{figi}_{interval.name.lower()}")
+
+
+def _store_parts(store_dir: str) -> list[str]:
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(
+        os.path.join(store_dir, name)
+        for name in os.listdir(store_dir)
+        if name.startswith("part-") and name.endswith(".parquet")
+    )
+
+
+def _read_store(store_dir: str) -> pd.DataFrame:
+    parts = _store_parts(store_dir)
+    if not parts:
+        return pd.DataFrame()
+    # части не пересекаются, но после прерванного слияния или перекачки могут остаться дубли —
+    # побеждает свеча из более поздней записанной части
+    parts.sort(key=os.path.getmtime)
+    df = pd.concat([pd.read_parquet(p) for p in parts])
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+def _read_coverage(store_dir: str) -> Optional[tuple[pd.Timestamp, pd.Timestamp]]:
+    path = os.path.join(store_dir, COVERAGE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return pd.Timestamp(data["from"], tz="UTC"), pd.Timestamp(data["to"], tz="UTC")
+
+
+def _write_coverage(store_dir: str, from_, to) -> None:
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, COVERAGE_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"from": pd.Timestamp(from_).value, "to": pd.Timestamp(to).value}, f)
+    os.replace(tmp_path, path)
+
+
+def _commit_part(store_dir: str, df: pd.DataFrame) -> str:
+    """Атомарно дописывает новую часть: tmp-файл + os.replace, чтение видит либо всю часть, либо ничего."""
+    os.makedirs(store_dir, exist_ok=True)
+    first, last = df.index[0].value, df.index[-1].value
+    path = os.path.join(store_dir, f"part-{first:019d}-{last:019d}.parquet")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return path
 
 
-async def _download_candles(figi: str, days: int, interval: CandleInterval) -> pd.DataFrame:
+def _compact_store(store_dir: str) -> None:
+    parts = _store_parts(store_dir)
+    if len(parts) <= MAX_STORE_PARTS:
+        return
+    merged_path = _commit_part(store_dir, _read_store(store_dir))
+    for part in parts:
+        if part != merged_path:
+            os.remove(part)
+    print(f"🧹 Хранилище {store_dir}: {len(parts)} частей слиты в одну")
+
+
+async def _download_candles(client, figi: str, from_, to, interval: CandleInterval, limiter=None) -> pd.DataFrame:
+    """
+    Свечи за [from_, to) из client.get_all_candles; колонка is_complete — для отделения текущей свечи.
+    Диапазон режется на отрезки по одному запросу к API (MAX_REQUEST_PERIOD), и перед каждым берётся
+    токен limiter (объект с async acquire(), например TokenBucket) — лимит действует на запросы, а не на задачи.
+    """
+    step = MAX_REQUEST_PERIOD.get(interval.name, timedelta(days=1))
     candles = []
-    async with AsyncSandboxClient(TOKEN) as client:
-        async for candle in client.get_all_candles(
-            figi=figi,
-            from_=now() - timedelta(days=days),
-            interval=interval,
-        ):
-            candles.append({
-                "time": candle.time,
-                "open": candle.open.units + candle.open.nano / 1e9,
-                "high": candle.high.units + candle.high.nano / 1e9,
-                "low": candle.low.units + candle.low.nano / 1e9,
-                "close": candle.close.units + candle.close.nano / 1e9,
-                "volume": candle.volume,
-            })
+    chunk_from = from_
+    while chunk_from < to:
+        chunk_to = min(chunk_from + step, to)
+        if limiter is not None:
+            await limiter.acquire()
+        async for candle in client.get_all_candles(figi=figi, from_=chunk_from, to=chunk_to, interval=interval):
+            candles.append(_candle_row(candle))
+        chunk_from = chunk_to
 
     if not candles:
-        print(f"⚠️ Нет доступных свечей для FIGI {figi} за {days} дней")
-        return pd.DataFrame()  # безопасно вернёт пустой DataFrame
+        return pd.DataFrame()
 
     df = pd.DataFrame(candles).set_index("time")
-    return df
+    df.index = pd.to_datetime(df.index, utc=True)
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+def _candle_row(candle) -> dict:
+    return {
+        "time": candle.time,
+        "open": quotation_to_float(candle.open),
+        "high": quotation_to_float(candle.high),
+        "low": quotation_to_float(candle.low),
+        "close": quotation_to_float(candle.close),
+        "volume": candle.volume,
+        "is_complete": getattr(candle, "is_complete", True),
+    }
+
+
+async def _fetch_missing(
+    client,
+    store_dir: str,
+    figi: str,
+    from_,
+    to,
+    interval: CandleInterval,
+    refresh: bool = False,
+    limiter=None,
+) -> pd.DataFrame:
+    """
+    Докачивает диапазоны вне уже покрытого хранилищем.
+
+    Покрытие [from, to) лежит в coverage.json: голова, которую API уже отдал пустой (контракт моложе
+    окна), повторно не запрашивается; конец покрытия — начало первой незаконченной свечи.
+    Законченные свечи атомарно дописываются в хранилище, незаконченные (текущая) возвращаются отдельно.
+    refresh — окно качается целиком, а старые части удаляются только после записи новых.
+    """
+    old_parts = _store_parts(store_dir) if refresh else []
+    stored = pd.DataFrame() if refresh else _read_store(store_dir)
+    coverage = None if refresh else _read_coverage(store_dir)
+    if coverage is None and not stored.empty:
+        coverage = (stored.index[0], stored.index[-1])  # хранилище без coverage.json
+
+    if coverage is None:
+        gaps = [(from_, to)]
+        covered_from, covered_to = from_, to
+    else:
+        covered_from, covered_to = coverage
+        gaps = []
+        if from_ < covered_from:
+            gaps.append((from_, covered_from))   # запрошено глубже, чем было покрыто
+        gaps.append((covered_to, to))            # хвост: с конца покрытия
+
+    incomplete, committed = [], []
+    for gap_from, gap_to in gaps:
+        covered_from = min(covered_from, gap_from)
+        if gap_from >= gap_to:
+            continue
+        df = await _download_candles(client, figi, gap_from, gap_to, interval, limiter)
+        if gap_to == to:
+            covered_to = to
+        if df.empty:
+            continue
+        if not stored.empty:
+            # стык: свечи, которые уже есть в хранилище, не дублируются
+            df = df[~df.index.isin(stored.index)]
+        complete = df[df.pop("is_complete")]
+        if len(complete) < len(df):
+            incomplete.append(df.drop(complete.index))
+            covered_to = min(covered_to, incomplete[-1].index[0])
+        if not complete.empty:
+            committed.append(_commit_part(store_dir, complete))
+            print(f"➕ Дописано {len(complete)} свечей в {store_dir}")
+
+    for part in old_parts:
+        if part not in committed:
+            os.remove(part)
+    _write_coverage(store_dir, covered_from, covered_to)
+
+    _compact_store(store_dir)
+    return pd.concat(incomplete) if incomplete else pd.DataFrame()
 
 
 async def load_candles(
     figi: str,
     days: int = 365,
     interval: CandleInterval = CandleInterval.CANDLE_INTERVAL_HOUR,
-    force_refresh: bool = False
+    force_refresh: bool = False,
+    client=None,
+    limiter=None,
 ) -> pd.DataFrame:
-    filename = os.path.join(CANDLE_DIR, f"{figi}_{days}d_{interval.name.lower()}.parquet")
+    """
+    Свечи за последние days дней из инкрементального хранилища.
 
-    # Чтение из кэша, если файл существует и не форсирован перезапрос
-    if os.path.exists(filename) and not force_refresh:
-        print(f"📂 Загрузка свечей из кэша: {filename}")
-        return pd.read_parquet(filename)
+    Из API запрашиваются только непокрытые диапазоны; force_refresh перекачивает окно целиком
+    (прерванная перекачка оставляет прежнее хранилище).
+    client — уже открытый AsyncClient (или его подмена с get_all_candles); по умолчанию открывается песочница.
+    limiter — общий ограничитель частоты запросов (async acquire()), токен берётся на каждый запрос к API.
+    """
+    store_dir = _store_dir(figi, interval)
+    to = now()
+    from_ = to - timedelta(days=days)
 
-    print(f"🌐 Загрузка свечей из API для FIGI {figi} на {days} дней")
-    df = await _download_candles(figi, days, interval)
+    print(f"🌐 Дозагрузка свечей из API для FIGI {figi} на {days} дней")
+    if client is None:
+        async with AsyncSandboxClient(TOKEN) as sandbox_client:
+            incomplete = await _fetch_missing(sandbox_client, store_dir, figi, from_, to, interval, force_refresh, limiter)
+    else:
+        incomplete = await _fetch_missing(client, store_dir, figi, from_, to, interval, force_refresh, limiter)
 
+    df = _read_store(store_dir)
+    if not incomplete.empty:
+        df = pd.concat([df, incomplete]).sort_index()
     if df.empty:
-        print(f"⚠️ Не сохраняем кэш: пустой датафрейм для FIGI {figi}")
+        print(f"⚠️ Нет доступных свечей для FIGI {figi} за {days} дней")
         return df
 
-    df.to_parquet(filename)
-    print(f"💾 Свечи сохранены в кэш: {filename}")
+    df = df[df.index >= from_]
+    print(f"📂 Свечи из хранилища {store_dir}: {len(df)} шт.")
     return df
 
-async def get_active_futures_spec(ticker: str):
-    async with AsyncClient(TOKEN) as client:
-        response = await client.instruments.futures()
-        for fut in response.instruments:
-            if fut.ticker == ticker:
-                print(f"🔍 Активный: {fut.ticker} | FIGI: {fut.figi}")
-                step_price = ((fut.min_price_increment_amount.units + fut.min_price_increment_amount.nano / 1e9)
-                              / (fut.min_price_increment.units + fut.min_price_increment.nano / 1e9))
-                print(f"step_price: {step_price}")
-                return {
-                    "figi": fut.figi,
-                    "step_price": (
-                        (fut.min_price_increment_amount.units + fut.min_price_increment_amount.nano / 1e9)
-                        / (fut.min_price_increment.units + fut.min_price_increment.nano / 1e9)
-                    ),
-                    "lot": fut.lot,
-                    "name": fut.name,
-                }
-    return None
+async def get_active_futures_spec(ticker: str, client=None, cache: Optional[InstrumentSpecCache] = None):
+    spec = await _lookup_spec(ticker, client, cache)
+    if spec is None:
+        return None
+    print(f"🔍 Активный: {ticker} | FIGI: {spec['figi']}")
+    print(f"step_price: {spec['step_price']}")
+    return dict(spec)
 
 
 def get_spec_from_archive(ticker: str) -> Optional[dict]:
@@ -0,0 +1,73 @@
+import json
+import os
+import time
+from typing import Optional
+
+SPEC_CACHE_PATH = "../data/instruments/futures_spec.json"
+SPEC_CACHE_TTL = 24 * 60 * 60  # секунд; спецификации фьючерсов меняются редко
+
+
+def quotation_to_float(q) -> float:
+    return q.units + q.nano / 1e9
+
+
+def spec_from_future(fut) -> dict:
+    """Спецификация из объекта Future (instruments.futures())."""
+    return {
+        "figi": fut.figi,
+        "step_price": quotation_to_float(fut.min_price_increment_amount) / quotation_to_float(fut.min_price_increment),
+        "lot": fut.lot,
+        "name": fut.name,
+    }
+
+
+class InstrumentSpecCache:
+    """
+    Локальный JSON-кэш спецификаций фьючерсов с TTL.
+
+    Вся вселенная фьючерсов запрашивается одним вызовом instruments.futures()
+    и переиспользуется, пока кэш не устарел.
+    """
+
+    def __init__(self, path: str = SPEC_CACHE_PATH, ttl: float = SPEC_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._data: Optional[dict] = None
+
+    def _load(self) -> dict:
+        if self._data is None:
+            if os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+            else:
+                self._data = {"fetched_at": 0, "futures": {}}
+        return self._data
+
+    def is_stale(self) -> bool:
+        return time.time() - self._load()["fetched_at"] > self.ttl
+
+    def get(self, ticker: str) -> Optional[dict]:
+        if self.is_stale():
+            return None
+        return self._load()["futures"].get(ticker)
+
+    async def refresh(self, client) -> None:
+        response = await client.instruments.futures()
+        self._data = {
+            "fetched_at": time.time(),
+            "futures": {fut.ticker: spec_from_future(fut) for fut in response.instruments},
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        print(f"🗂️ Кэш спецификаций обновлён: {len(self._data['futures'])} фьючерсов")
+
+    async def lookup(self, ticker: str, client) -> Optional[dict]:
+        """Спецификация из кэша; при устаревшем кэше или промахе — одно обновление через client."""
+        spec = self.get(ticker)
+        if spec is None:
+            await self.refresh(client)
+            spec = self._load()["futures"].get(ticker)
+        return spec
@@ -0,0 +1,110 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.logger import get_logger
+from providers.fingerprint import file_hash, file_signature
+
+log = get_logger(__name__)
+
+# Поддерживаемые таймфреймы → правило pandas resample
+TIMEFRAMES = {
+    "5m": "5min",
+    "15m": "15min",
+    "1h": "1h",
+    "4h": "4h",
+    "1d": "1D",
+}
+
+OHLCV_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+_META_KEY = b"bar_cache"
+
+
+def resample_candles(minute_df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """Агрегирует минутные свечи одного контракта в OHLCV-бары по правилу resample."""
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in minute_df.columns}
+    if "contract_code" in minute_df.columns:
+        agg["contract_code"] = "first"
+    return (
+        minute_df.set_index("datetime")
+        .resample(rule)
+        .agg(agg)
+        .dropna(subset=["open", "high", "low", "close"])
+        .reset_index()
+    )
+
+
+class BarCache:
+    """
+    Материализованные OHLCV-бары 5m/15m/1h/4h/1d для минутных parquet-файлов.
+
+    Бары каждого источника лежат рядом с ним: ``<stem>.bars_<tf>.parquet``.
+    Отпечаток источника (size, mtime, sha256) хранится в метаданных parquet;
+    кэш считается устаревшим, если размер или mtime источника изменились,
+    а при ``verify_hash=True`` — ещё и если изменился хэш содержимого.
+    """
+
+    def __init__(self, verify_hash: bool = False):
+        self.verify_hash = verify_hash
+
+    @staticmethod
+    def bars_path(source: Path, timeframe: str) -> Path:
+        return source.with_name(f"{source.stem}.bars_{timeframe}.parquet")
+
+    def _stored_fingerprint(self, path: Path) -> Optional[dict]:
+        if not path.exists():
+            return None
+        metadata = pq.read_schema(path).metadata or {}
+        raw = metadata.get(_META_KEY)
+        return json.loads(raw) if raw else None
+
+    def is_valid(self, source: Path, timeframe: str) -> bool:
+        stored = self._stored_fingerprint(self.bars_path(source, timeframe))
+        if stored is None:
+            return False
+        current = file_signature(source)
+        if stored["size"] != current["size"] or stored["mtime_ns"] != current["mtime_ns"]:
+            return False
+        if self.verify_hash and stored["sha256"] != file_hash(source):
+            return False
+        return True
+
+    def build(self, source: Path) -> None:
+        """Один раз читает источник и сохраняет бары всех таймфреймов."""
+        log.info(f"🧱 Построение кэша баров для {source.name}")
+        fingerprint = {**file_signature(source), "sha256": file_hash(source)}
+
+        df = pd.read_parquet(source, columns=["datetime", *OHLCV_AGG])
+        df["datetime"] = pd.to_datetime(df["datetime"], unit="ns")
+        df = df.sort_values("datetime", kind="stable")
+
+        for timeframe, rule in TIMEFRAMES.items():
+            bars = resample_candles(df, rule)
+            table = pa.Table.from_pandas(bars, preserve_index=False)
+            metadata = {**(table.schema.metadata or {}), _META_KEY: json.dumps(fingerprint).encode()}
+            table = table.replace_schema_metadata(metadata)
+
+            target = self.bars_path(source, timeframe)
+            tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, target)
+
+    def load(self, source: Path, timeframe: str) -> pd.DataFrame:
+        """Бары источника; при устаревшем кэше пересобирает все таймфреймы."""
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Неизвестный таймфрейм {timeframe!r}, доступны: {', '.join(TIMEFRAMES)}")
+        if not self.is_valid(source, timeframe):
+            self.build(source)
+        return pd.read_parquet(self.bars_path(source, timeframe))
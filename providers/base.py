@@ -1,8 +1,32 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Optional, Union
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Union
 import pandas as pd
 
+from providers.bar_cache import TIMEFRAMES, resample_candles
+
+
+@dataclass
+class CandleChunk:
+    """
+    One time-ordered chunk yielded by iter_candles.
+    - data: `warmup` rows carried over from the previous chunk, followed by the new rows
+    - warmup: number of leading carried-over rows
+    """
+    data: pd.DataFrame
+    warmup: int
+
+    @property
+    def body(self) -> pd.DataFrame:
+        return self.data.iloc[self.warmup:]
+
+    def drop_warmup(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop warm-up rows from a frame derived from `data` (matched by index, order may differ)."""
+        if not self.warmup:
+            return df
+        return df[~df.index.isin(self.data.index[:self.warmup])]
+
 
 class AbstractCandleProvider(ABC):
     @abstractmethod
@@ -31,6 +55,91 @@ class AbstractCandleProvider(ABC):
         optionally filtered by ticker(s) and time range.
         """
 
+    def get_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        timeframe: str = "1h",
+    ) -> pd.DataFrame:
+        """
+        Return candles of the given timeframe: "1m" or one of TIMEFRAMES.
+        Minutes are filtered to [from_dt, to_dt]; bars of other timeframes to those opened in [from_dt, to_dt).
+        Default implementation resamples minute candles contract by contract.
+        """
+        if timeframe == "1m":
+            return self.get_minute_candles(ticker, from_dt, to_dt)
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unknown timeframe {timeframe!r}")
+        # the last bar opened before to_dt is built from all of its minutes, like a stored bar
+        minute_to = None if to_dt is None else pd.Timestamp(to_dt).ceil(TIMEFRAMES[timeframe]) - pd.Timedelta(1, "ns")
+        minute_df = self.get_minute_candles(ticker, from_dt, minute_to)
+        if minute_df.empty or "contract_code" not in minute_df.columns:
+            return self._clip_bars(resample_candles(minute_df, TIMEFRAMES[timeframe]), from_dt, to_dt)
+        frames = [resample_candles(group, TIMEFRAMES[timeframe]) for _, group in minute_df.groupby("contract_code")]
+        bars = pd.concat(frames, ignore_index=True).sort_values("datetime", kind="stable").reset_index(drop=True)
+        return self._clip_bars(bars, from_dt, to_dt)
+
+    @staticmethod
+    def _clip_bars(bars: pd.DataFrame, from_dt: Optional[datetime], to_dt: Optional[datetime]) -> pd.DataFrame:
+        """Drop bars opened before from_dt or at/after to_dt: they would be built from only part of their minutes."""
+        if bars.empty:
+            return bars
+        keep = pd.Series(True, index=bars.index)
+        if from_dt is not None:
+            keep &= bars["datetime"] >= pd.Timestamp(from_dt)
+        if to_dt is not None:
+            keep &= bars["datetime"] < pd.Timestamp(to_dt)
+        return bars if keep.all() else bars[keep].reset_index(drop=True)
+
+    def get_time_range(
+        self,
+        ticker: Union[str, list[str], None] = None,
+    ) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Return (first, last) minute timestamp for the ticker(s), or (None, None) if there is no data."""
+        df = self.get_minute_candles(ticker)
+        if df.empty:
+            return None, None
+        return df["datetime"].iloc[0], df["datetime"].iloc[-1]
+
+    def iter_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        chunk: timedelta = timedelta(days=30),
+        warmup: int = 0,
+        timeframe: str = "1m",
+    ) -> Iterator[CandleChunk]:
+        """
+        Stream candles in time-ordered chunks of `chunk` length instead of one DataFrame.
+        Every chunk starts with the last `warmup` rows of each contract seen so far,
+        so rolling indicators stay correct across chunk edges.
+        Only one chunk is materialized at a time.
+        """
+        first, last = self.get_time_range(ticker)
+        if first is None:
+            return
+
+        current = pd.Timestamp(from_dt) if from_dt is not None else first
+        end = pd.Timestamp(to_dt) if to_dt is not None else last
+        step = pd.Timedelta(chunk)
+        tail = None
+
+        while current <= end:
+            upper = min(current + step - pd.Timedelta(1, "ns"), end)
+            # бары, открытые до current, get_candles не возвращает — они уже отданы в предыдущем куске
+            body = self.get_candles(ticker, current, upper, timeframe=timeframe)
+
+            if not body.empty:
+                warm = tail if tail is not None else body.iloc[:0]
+                frame = pd.concat([warm, body], ignore_index=True)
+                yield CandleChunk(frame, len(warm))
+                if warmup:
+                    tail = frame.groupby("contract_code", observed=True).tail(warmup)
+
+            current = upper + pd.Timedelta(1, "ns")
+
     @abstractmethod
     def get_available_tickers(self) -> list[str]:
         """Return list of available contract codes (tickers) in dataset."""
@@ -0,0 +1,230 @@
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core.logger import get_logger
+from providers.fingerprint import sources_signature
+from providers.schema import MemoryBudget, candle_dtypes, concat_contract_codes, contract_column
+
+log = get_logger(__name__)
+
+STORE_VERSION = 1
+META_FILE = "meta.json"
+
+
+def to_ns(dt: Optional[datetime]) -> Optional[int]:
+    """Переводит момент времени в int64 наносекунды UTC (naive считается UTC)."""
+    if dt is None:
+        return None
+    ts = pd.Timestamp(dt)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.value)
+
+
+def slice_bounds(times: np.ndarray, from_ns: Optional[int], to_ns_: Optional[int]) -> tuple[int, int]:
+    """Границы [lo, hi) отсортированного массива времён для интервала [from, to] включительно."""
+    lo = 0 if from_ns is None else int(np.searchsorted(times, from_ns, side="left"))
+    hi = len(times) if to_ns_ is None else int(np.searchsorted(times, to_ns_, side="right"))
+    return lo, max(lo, hi)
+
+
+def bar_slice_bounds(times: np.ndarray, from_ns: Optional[int], to_ns_: Optional[int]) -> tuple[int, int]:
+    """
+    Границы [lo, hi) баров старшего таймфрейма, открытых в [from, to): бар, начавшийся до from,
+    и бар, открытый в to, собраны бы не из всех своих минуток интервала — в выборку они не попадают.
+    """
+    lo = 0 if from_ns is None else int(np.searchsorted(times, from_ns, side="left"))
+    hi = len(times) if to_ns_ is None else int(np.searchsorted(times, to_ns_, side="left"))
+    return lo, max(lo, hi)
+
+
+def frame_from_arrays(arrays: dict[str, np.ndarray], tz: Optional[str] = None) -> pd.DataFrame:
+    """Собирает DataFrame поверх массивов без копирования ценовых колонок."""
+    data = {}
+    for name, values in arrays.items():
+        if name == "datetime":
+            dt = pd.DatetimeIndex(values.view("datetime64[ns]"))
+            data[name] = dt.tz_localize("UTC").tz_convert(tz) if tz else dt
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def empty_candle_frame() -> pd.DataFrame:
+    """Пустой датафрейм свечей с корректными типами колонок."""
+    arrays = {col: np.empty(0, dtype="int64" if col in ("datetime", "volume") else "float64")
+              for col in CandleStore.COLUMNS}
+    return frame_from_arrays(arrays).assign(contract_code=pd.Series(dtype=object))
+
+
+def merge_sorted_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Объединяет отсортированные по времени срезы контрактов в один поток по datetime."""
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return empty_candle_frame()
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    codes = concat_contract_codes(frames)
+    if codes is not None:
+        df["contract_code"] = codes
+    return df.sort_values("datetime", kind="stable").reset_index(drop=True)
+
+
+class CandleStore:
+    """
+    Отсортированное по времени поколоночное хранилище минутных свечей.
+
+    Каждый контракт лежит в своей папке ``<store_dir>/<contract_code>/`` набором
+    .npy-файлов (по одному на колонку), которые открываются через memory-map.
+    Срез по времени — бинарный поиск по колонке ``datetime`` и view без копии.
+
+    ``compact=True`` хранит цены во float32, объём в int32 и отдаёт contract_code
+    категорией; ``budget`` ограничивает число одновременно отображённых контрактов.
+    """
+
+    COLUMNS = ("datetime", "open", "high", "low", "close", "volume")
+
+    def __init__(self, store_dir: Path, compact: bool = False, budget: Optional[MemoryBudget] = None):
+        self.store_dir = Path(store_dir)
+        self.compact = compact
+        self._meta: Optional[dict] = None
+        self._arrays = budget if budget is not None else MemoryBudget()
+
+    # --- построение ---
+
+    def _read_meta(self) -> dict:
+        meta_path = self.store_dir / META_FILE
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("version") == STORE_VERSION:
+                return meta
+        return {"version": STORE_VERSION, "compact": self.compact, "contracts": {}}
+
+    def _write_meta(self, meta: dict) -> None:
+        tmp_path = self.store_dir / f"{META_FILE}.tmp"
+        tmp_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        tmp_path.replace(self.store_dir / META_FILE)
+
+    def build(self, sources: dict[str, list[Path]], force: bool = False) -> None:
+        """
+        Пересобирает контракты, у которых изменились исходные parquet-файлы.
+        - sources: contract_code → список исходных *_minute.parquet
+        """
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        meta = self._read_meta()
+        if meta.get("compact") != self.compact:
+            meta, force = {"version": STORE_VERSION, "compact": self.compact, "contracts": {}}, True
+        contracts = meta["contracts"]
+
+        for code in list(contracts):
+            if code not in sources:
+                self._arrays.pop(self._key(code))
+                shutil.rmtree(self.store_dir / code, ignore_errors=True)
+                del contracts[code]
+
+        for code, paths in sorted(sources.items()):
+            signature = sources_signature(paths)
+            entry = contracts.get(code)
+            if not force and entry is not None and entry["sources"] == signature:
+                continue
+
+            log.info(f"🗂️ Сборка хранилища свечей для {code} ({len(paths)} файлов)")
+            self._arrays.pop(self._key(code))
+            contracts[code] = self._build_contract(code, paths, signature)
+
+        self._write_meta(meta)
+        self._meta = meta
+
+    def _build_contract(self, code: str, paths: list[Path], signature: list[dict]) -> dict:
+        dfs = [pd.read_parquet(p, columns=list(self.COLUMNS)) for p in sorted(paths)]
+        df = pd.concat(dfs, ignore_index=True)
+        dt = pd.to_datetime(df["datetime"], unit="ns")
+        tz = str(dt.dt.tz) if dt.dt.tz is not None else None
+        if tz:
+            dt = dt.dt.tz_convert("UTC").dt.tz_localize(None)
+
+        times = dt.to_numpy(dtype="datetime64[ns]").view("int64")
+        order = np.argsort(times, kind="stable")
+
+        tmp_dir = self.store_dir / f"{code}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / "datetime.npy", times[order])
+        dtypes = candle_dtypes(self.compact)
+        for col in self.COLUMNS[1:]:
+            np.save(tmp_dir / f"{col}.npy", df[col].to_numpy()[order].astype(dtypes[col], copy=False))
+
+        target = self.store_dir / code
+        shutil.rmtree(target, ignore_errors=True)
+        tmp_dir.replace(target)
+
+        return {"sources": signature, "rows": int(len(df)), "tz": tz}
+
+    # --- чтение ---
+
+    @property
+    def meta(self) -> dict:
+        if self._meta is None:
+            self._meta = self._read_meta()
+        return self._meta
+
+    def is_fresh(self, sources: dict[str, list[Path]]) -> bool:
+        contracts = self.meta["contracts"]
+        if self.meta.get("compact") != self.compact or set(contracts) != set(sources):
+            return False
+        return all(contracts[code]["sources"] == sources_signature(paths) for code, paths in sources.items())
+
+    def contracts(self) -> list[str]:
+        return sorted(self.meta["contracts"])
+
+    def tz(self, contract_code: str) -> Optional[str]:
+        return self.meta["contracts"][contract_code]["tz"]
+
+    def _key(self, contract_code: str) -> tuple:
+        return "store", str(self.store_dir), contract_code
+
+    def _contract_arrays(self, contract_code: str) -> dict[str, np.ndarray]:
+        key = self._key(contract_code)
+        if key in self._arrays:
+            return self._arrays.get(key)
+        contract_dir = self.store_dir / contract_code
+        arrays = {
+            col: np.load(contract_dir / f"{col}.npy", mmap_mode="r").view(np.ndarray)
+            for col in self.COLUMNS
+        }
+        self._arrays.put(key, arrays, sum(values.nbytes for values in arrays.values()))
+        return arrays
+
+    def arrays(
+        self,
+        contract_code: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+    ) -> dict[str, np.ndarray]:
+        """Read-only views колонок контракта в интервале [from_dt, to_dt]."""
+        if contract_code not in self.meta["contracts"]:
+            return {}
+        arrays = self._contract_arrays(contract_code)
+        lo, hi = slice_bounds(arrays["datetime"], to_ns(from_dt), to_ns(to_dt))
+        return {col: values[lo:hi] for col, values in arrays.items()}
+
+    def frame(
+        self,
+        contract_code: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """DataFrame-срез контракта; ценовые колонки — read-only views на memory-map."""
+        arrays = self.arrays(contract_code, from_dt, to_dt)
+        if not arrays:
+            return empty_candle_frame()
+        df = frame_from_arrays(arrays, self.tz(contract_code))
+        df["contract_code"] = contract_column(contract_code, len(df), self.compact)
+        return df
@@ -0,0 +1,168 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.logger import get_logger
+from providers.fingerprint import sources_signature
+
+log = get_logger(__name__)
+
+BUILDER_VERSION = 1
+ADJUSTMENTS = (None, "panama", "ratio")
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+_META_KEY = b"continuous_contract"
+
+
+class ContinuousContractBuilder:
+    """
+    Склейка контрактов в непрерывный ряд за один векторный проход.
+
+    Контракт i берётся со строк, у которых datetime > (max datetime контракта i-1 − 1 мин),
+    либо — если передан момент перехода из календаря ролловеров — ровно с этого момента,
+    а контракт i-1 обрезается по нему же.
+    Опционально делает обратную корректировку цен на точках склейки:
+    - "panama": к старым контрактам прибавляется разница close нового и старого контракта;
+    - "ratio": старые контракты умножаются на отношение этих close.
+    Результат можно сохранить в parquet с отпечатком входных файлов (см. load_or_build).
+    """
+
+    def __init__(self, adjustment: Optional[str] = None, cache_dir: Optional[Path] = None):
+        if adjustment not in ADJUSTMENTS:
+            raise ValueError(f"Неизвестный тип корректировки {adjustment!r}, доступны: {ADJUSTMENTS}")
+        self.adjustment = adjustment
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+    def build(
+        self,
+        sorted_contracts: List[Tuple[str, pd.DataFrame]],
+        switch_times: Optional[Dict[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        sorted_contracts — контракты, упорядоченные по первой дате (как в tag_and_sort_contracts).
+        switch_times — {контракт: момент перехода на следующий} (см. providers.rollover_calendar).
+        """
+        sorted_contracts = [(code, df) for code, df in sorted_contracts if not df.empty]
+        if not sorted_contracts:
+            return pd.DataFrame()
+
+        frames = [df for _, df in sorted_contracts]
+        lengths = np.array([len(df) for df in frames])
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        ordinal = np.repeat(np.arange(len(frames)), lengths)
+
+        # Строки каждого контракта упорядочиваются по времени одной сортировкой
+        combined = pd.concat(frames, ignore_index=True)
+        times = combined["datetime"].to_numpy(dtype="datetime64[ns]").view("int64")
+        within = np.lexsort((times, ordinal))
+        combined = combined.take(within).reset_index(drop=True)
+        times = times[within]
+
+        # Нижняя граница каждого контракта — максимум предыдущего минус минута (включительно +1 нс)
+        maxima = times[ends - 1]
+        lower = np.concatenate([[np.iinfo(np.int64).min], maxima[:-1] - pd.Timedelta(minutes=1).value + 1])
+        upper = np.full(len(frames), np.iinfo(np.int64).max)
+
+        # Моменты перехода из календаря заменяют эвристику: старый контракт до него, новый — с него
+        if switch_times:
+            for k, (code, _) in enumerate(sorted_contracts[:-1]):
+                switch = switch_times.get(code)
+                if switch is not None:
+                    upper[k] = lower[k + 1] = pd.Timestamp(switch).value
+        keep = (times >= lower[ordinal]) & (times < upper[ordinal])
+
+        if self.adjustment is not None and len(frames) > 1:
+            combined = self._back_adjust(combined, times, ordinal, starts, ends, upper)
+
+        kept = np.flatnonzero(keep)
+        order = kept[np.argsort(times[kept], kind="stable")]
+        return combined.take(order).reset_index(drop=True)
+
+    def _back_adjust(
+        self,
+        combined: pd.DataFrame,
+        times: np.ndarray,
+        ordinal: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        upper: np.ndarray,
+    ) -> pd.DataFrame:
+        close = combined["close"].to_numpy(dtype=float)
+
+        # На каждой склейке: последний close старого контракта и первый close нового на этот момент или позже
+        old_pos = np.array([
+            max(start, start + np.searchsorted(times[start:end], bound, side="left") - 1)
+            for start, end, bound in zip(starts[:-1], ends[:-1], upper[:-1])
+        ])
+        old_close = close[old_pos]
+        stitch_times = times[old_pos]
+        new_pos = np.array([
+            start + np.searchsorted(times[start:end], stitch, side="left")
+            for start, end, stitch in zip(starts[1:], ends[1:], stitch_times)
+        ])
+        new_close = close[np.minimum(new_pos, ends[1:] - 1)]
+
+        combined = combined.copy()
+        if self.adjustment == "panama":
+            gaps = new_close - old_close
+            # контракт k сдвигается на сумму всех последующих разрывов
+            offsets = np.concatenate([np.cumsum(gaps[::-1])[::-1], [0.0]])
+            for col in PRICE_COLUMNS:
+                combined[col] = combined[col].to_numpy(dtype=float) + offsets[ordinal]
+        else:
+            ratios = new_close / old_close
+            factors = np.concatenate([np.cumprod(ratios[::-1])[::-1], [1.0]])
+            for col in PRICE_COLUMNS:
+                combined[col] = combined[col].to_numpy(dtype=float) * factors[ordinal]
+        return combined
+
+    # --- персистентность ---
+
+    def _fingerprint(self, sources: List[Path]) -> str:
+        return json.dumps({
+            "version": BUILDER_VERSION,
+            "adjustment": self.adjustment,
+            "sources": sources_signature(sources),
+        }, sort_keys=True)
+
+    def cache_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}_{self.adjustment or 'raw'}.parquet"
+
+    def load_or_build(
+        self,
+        name: str,
+        sources: List[Path],
+        load_contracts: Callable[[], List[Tuple[str, pd.DataFrame]]],
+        switch_times: Optional[Dict[str, pd.Timestamp]] = None,
+    ) -> pd.DataFrame:
+        """
+        Готовый ряд из кэша, если отпечаток входных файлов совпадает; иначе строит и сохраняет.
+        load_contracts вызывается только при перестройке; файл календаря, если он есть, передаётся в sources.
+        """
+        if self.cache_dir is None:
+            return self.build(load_contracts(), switch_times)
+
+        path = self.cache_path(name)
+        fingerprint = self._fingerprint(sources)
+        if path.exists():
+            metadata = pq.read_schema(path).metadata or {}
+            if metadata.get(_META_KEY, b"").decode() == fingerprint:
+                return pd.read_parquet(path)
+
+        log.info(f"🔗 Сборка непрерывного ряда {name} ({len(sources)} файлов, корректировка: {self.adjustment})")
+        combined = self.build(load_contracts(), switch_times)
+
+        table = pa.Table.from_pandas(combined, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: fingerprint.encode()})
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return combined
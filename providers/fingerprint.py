@@ -0,0 +1,27 @@
+import hashlib
+from pathlib import Path
+from typing import Iterable
+
+
+def file_signature(path: Path) -> dict:
+    """Return a cheap signature of a source file: name, size and mtime."""
+    stat = Path(path).stat()
+    return {
+        "name": Path(path).name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def sources_signature(paths: Iterable[Path]) -> list[dict]:
+    """Signatures of several source files in a stable (sorted by name) order."""
+    return [file_signature(p) for p in sorted(paths, key=lambda p: Path(p).name)]
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """sha256 of the file contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -3,31 +3,57 @@ from pathlib import Path
 from typing import Optional, Union
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 from .base import AbstractCandleProvider
+from .bar_cache import TIMEFRAMES, BarCache
+from .candle_store import CandleStore, bar_slice_bounds, empty_candle_frame, merge_sorted_frames, to_ns
+from .schema import MemoryBudget, frame_nbytes, to_compact
 
 
 class ParquetCandleProvider(AbstractCandleProvider):
-    def __init__(self, data_dir: Path):
-        self.data_dir = data_dir
-        self._minute_cache: Optional[pd.DataFrame] = None
+    def __init__(
+        self,
+        data_dir: Path,
+        store_dir: Optional[Path] = None,
+        verify_hash: bool = False,
+        compact: bool = False,
+        memory_budget_mb: Optional[float] = None,
+    ):
+        """
+        - compact: float32 цены, int32 объём, категориальный contract_code
+        - memory_budget_mb: предел памяти под отображённые контракты и кэш баров (LRU)
+        """
+        self.data_dir = Path(data_dir)
+        default_store = ".candle_store_compact" if compact else ".candle_store"
+        self.store_dir = Path(store_dir) if store_dir is not None else self.data_dir / default_store
+        self.compact = compact
+        self._budget = MemoryBudget(memory_budget_mb)
+        self._store: Optional[CandleStore] = None
+        self._sources: Optional[dict[str, list[Path]]] = None
+        self._bar_cache = BarCache(verify_hash=verify_hash)
 
     def _extract_contract_code(self, filename: str) -> str:
         match = re.match(r"(FUTRTS\d{6})", filename)
         return match.group(1) if match else "UNKNOWN"
 
-    def _load_minute_data(self) -> pd.DataFrame:
-        if self._minute_cache is None:
-            all_files = sorted(self.data_dir.glob("*_minute.parquet"))
-            dfs = []
-            for file in all_files:
-                df = pd.read_parquet(file)
-                df = df.copy()
-                df["datetime"] = pd.to_datetime(df["datetime"], unit="ns")
-                df["contract_code"] = self._extract_contract_code(file.name)
-                dfs.append(df)
-            self._minute_cache = pd.concat(dfs, ignore_index=True)
-        return self._minute_cache
+    def _source_files(self) -> dict[str, list[Path]]:
+        if self._sources is None:
+            sources: dict[str, list[Path]] = {}
+            for file in sorted(self.data_dir.glob("*_minute.parquet")):
+                sources.setdefault(self._extract_contract_code(file.name), []).append(file)
+            self._sources = sources
+        return self._sources
+
+    def _get_store(self) -> CandleStore:
+        """Memory-mapped хранилище, отсортированное один раз; пересобирается при изменении исходников."""
+        if self._store is None:
+            store = CandleStore(self.store_dir, compact=self.compact, budget=self._budget)
+            sources = self._source_files()
+            if not store.is_fresh(sources):
+                store.build(sources)
+            self._store = store
+        return self._store
 
     def _normalize_tickers(self, ticker: Union[str, list[str], None]) -> Optional[list[str]]:
         if ticker is None:
@@ -36,14 +62,32 @@ class ParquetCandleProvider(AbstractCandleProvider):
             return [ticker]
         return ticker  # assume already list[str]
 
-    def _filter(self, df: pd.DataFrame, tickers: Optional[list[str]], from_dt: Optional[datetime], to_dt: Optional[datetime]) -> pd.DataFrame:
-        if tickers:
-            df = df[df["contract_code"].isin(tickers)]
-        if from_dt:
-            df = df[df["datetime"] >= from_dt]
-        if to_dt:
-            df = df[df["datetime"] <= to_dt]
-        return df.sort_values("datetime")
+    def _load_bars(self, contract_code: str, timeframe: str) -> tuple[np.ndarray, pd.DataFrame]:
+        key = ("bars", contract_code, timeframe)
+        if key not in self._budget:
+            frames = [self._bar_cache.load(path, timeframe) for path in self._source_files().get(contract_code, [])]
+            if frames:
+                bars = pd.concat(frames, ignore_index=True).sort_values("datetime", kind="stable")
+                bars = bars.reset_index(drop=True)
+                bars["contract_code"] = contract_code
+                if self.compact:
+                    bars = to_compact(bars)
+            else:
+                bars = empty_candle_frame()
+            times = bars["datetime"].to_numpy(dtype="datetime64[ns]").view("int64")
+            self._budget.put(key, (times, bars), frame_nbytes(bars) + times.nbytes)
+        return self._budget.get(key)
+
+    def _bars_slice(
+        self,
+        contract_code: str,
+        timeframe: str,
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+    ) -> pd.DataFrame:
+        times, bars = self._load_bars(contract_code, timeframe)
+        lo, hi = bar_slice_bounds(times, to_ns(from_dt), to_ns(to_dt))
+        return bars.iloc[lo:hi].reset_index(drop=True)
 
     def get_minute_candles(
         self,
@@ -51,9 +95,24 @@ class ParquetCandleProvider(AbstractCandleProvider):
         from_dt: Optional[datetime] = None,
         to_dt: Optional[datetime] = None
     ) -> pd.DataFrame:
-        tickers = self._normalize_tickers(ticker)
-        df = self._load_minute_data()
-        return self._filter(df.copy(), tickers, from_dt, to_dt)
+        tickers = self._normalize_tickers(ticker) or self.get_available_tickers()
+        store = self._get_store()
+        return merge_sorted_frames([store.frame(code, from_dt, to_dt) for code in tickers])
+
+    def get_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        timeframe: str = "1h",
+    ) -> pd.DataFrame:
+        """Свечи любого таймфрейма: "1m" — из хранилища, остальные — из кэша баров."""
+        if timeframe == "1m":
+            return self.get_minute_candles(ticker, from_dt, to_dt)
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Неизвестный таймфрейм {timeframe!r}, доступны: 1m, {', '.join(TIMEFRAMES)}")
+        tickers = self._normalize_tickers(ticker) or self.get_available_tickers()
+        return merge_sorted_frames([self._bars_slice(code, timeframe, from_dt, to_dt) for code in tickers])
 
     def get_hourly_candles(
         self,
@@ -61,23 +120,19 @@ class ParquetCandleProvider(AbstractCandleProvider):
         from_dt: Optional[datetime] = None,
         to_dt: Optional[datetime] = None
     ) -> pd.DataFrame:
-        minute_df = self.get_minute_candles(ticker, from_dt, to_dt)
-        resampled = (
-            minute_df.set_index("datetime")
-            .resample("1h")
-            .agg({
-                "open": "first",
-                "high": "max",
-                "low": "min",
-                "close": "last",
-                "volume": "sum",
-                "contract_code": "first"
-            })
-            .dropna(subset=["open", "high", "low", "close"])
-            .reset_index()
-        )
-        return resampled
+        return self.get_candles(ticker, from_dt, to_dt, timeframe="1h")
+
+    def get_time_range(
+        self,
+        ticker: Union[str, list[str], None] = None,
+    ) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        store = self._get_store()
+        tickers = self._normalize_tickers(ticker) or self.get_available_tickers()
+        frames = [store.frame(code) for code in tickers]
+        bounds = [(df["datetime"].iloc[0], df["datetime"].iloc[-1]) for df in frames if not df.empty]
+        if not bounds:
+            return None, None
+        return min(b[0] for b in bounds), max(b[1] for b in bounds)
 
     def get_available_tickers(self) -> list[str]:
-        df = self._load_minute_data()
-        return sorted(df["contract_code"].unique())
+        return self._get_store().contracts()
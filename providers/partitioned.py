@@ -0,0 +1,184 @@
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from core.logger import get_logger
+from providers.base import AbstractCandleProvider
+from providers.candle_store import empty_candle_frame, to_ns
+
+log = get_logger(__name__)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("contract_code", pa.string()), ("trade_month", pa.string())]),
+    flavor="hive",
+)
+CANDLE_COLUMNS = ["datetime", "open", "high", "low", "close", "volume"]
+_TIMESTAMP = pa.timestamp("ns", tz="UTC")
+# Файлы с префиксом "_" pyarrow.dataset не считает частью датасета
+META_FILE = "_dataset_meta.json"
+
+
+def _read_meta(out_dir: Path) -> dict:
+    meta_path = Path(out_dir) / META_FILE
+    if meta_path.exists():
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    return {"contracts": {}}
+
+
+def _write_meta(out_dir: Path, meta: dict) -> None:
+    tmp_path = Path(out_dir) / f"{META_FILE}.tmp"
+    tmp_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    tmp_path.replace(Path(out_dir) / META_FILE)
+
+
+def write_partitioned_dataset(provider: AbstractCandleProvider, out_dir: Path) -> None:
+    """
+    Раскладывает минутные свечи провайдера по партициям
+    ``contract_code=<code>/trade_month=<YYYY-MM>/part-0.parquet``.
+
+    Внутри файла строки отсортированы по времени, и каждая торговая дата —
+    отдельная row group, так что статистика min/max по ``datetime``
+    позволяет читать только нужные дни.
+    Время хранится в UTC, исходная таймзона контракта (None для наивного времени)
+    записывается в ``_dataset_meta.json`` и восстанавливается при чтении.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    meta = _read_meta(out_dir)
+    for code in provider.get_available_tickers():
+        df = provider.get_minute_candles(code)
+        if df.empty:
+            continue
+
+        contract_dir = out_dir / f"contract_code={code}"
+        shutil.rmtree(contract_dir, ignore_errors=True)
+
+        times = df["datetime"]
+        tz = str(times.dt.tz) if times.dt.tz is not None else None
+        times = times.dt.tz_convert("UTC") if tz else times.dt.tz_localize("UTC")
+        df = df[CANDLE_COLUMNS].assign(datetime=times)
+        months = times.dt.strftime("%Y-%m")
+        dates = times.dt.floor("D")
+
+        for month, month_df in df.groupby(months, sort=True):
+            month_dir = contract_dir / f"trade_month={month}"
+            month_dir.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(month_df, preserve_index=False)
+            with pq.ParquetWriter(month_dir / "part-0.parquet", table.schema, write_statistics=True) as writer:
+                for _, day_idx in month_df.groupby(dates.loc[month_df.index], sort=True).indices.items():
+                    writer.write_table(table.take(day_idx))
+
+        meta["contracts"][code] = {"tz": tz}
+        _write_meta(out_dir, meta)
+        log.info(f"🗃️ Контракт {code} разложен по партициям в {contract_dir}")
+
+
+class PartitionedCandleProvider(AbstractCandleProvider):
+    """
+    Провайдер поверх партиционированного датасета (см. write_partitioned_dataset).
+
+    ``ticker``, ``from_dt`` и ``to_dt`` превращаются в фильтры pyarrow.dataset:
+    лишние партиции отсекаются по ключам, лишние row groups — по статистике,
+    а ``columns`` ограничивает набор читаемых колонок.
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self._dataset: Optional[ds.Dataset] = None
+        self._meta: Optional[dict] = None
+
+    def _get_dataset(self) -> ds.Dataset:
+        if self._dataset is None:
+            self._dataset = ds.dataset(self.data_dir, format="parquet", partitioning=PARTITIONING)
+        return self._dataset
+
+    def _source_tz(self, tickers: list[str]) -> Optional[str]:
+        """Таймзона исходных данных; у контрактов с разными таймзонами время остаётся в UTC."""
+        if self._meta is None:
+            self._meta = _read_meta(self.data_dir)
+        zones = {self._meta["contracts"].get(code, {}).get("tz", "UTC") for code in tickers}
+        return zones.pop() if len(zones) == 1 else "UTC"
+
+    def _restore_tz(self, times: pd.Series, tickers: list[str]) -> pd.Series:
+        tz = self._source_tz(tickers)
+        return times.dt.tz_convert(tz) if tz else times.dt.tz_localize(None)
+
+    def _build_filter(
+        self,
+        tickers: Optional[list[str]],
+        from_dt: Optional[datetime],
+        to_dt: Optional[datetime],
+    ) -> Optional[ds.Expression]:
+        conditions = []
+        if tickers:
+            conditions.append(ds.field("contract_code").isin(tickers))
+        if from_dt is not None:
+            from_ns = to_ns(from_dt)
+            conditions.append(ds.field("trade_month") >= pd.Timestamp(from_ns).strftime("%Y-%m"))
+            conditions.append(ds.field("datetime") >= pa.scalar(from_ns, type=_TIMESTAMP))
+        if to_dt is not None:
+            to_ns_ = to_ns(to_dt)
+            conditions.append(ds.field("trade_month") <= pd.Timestamp(to_ns_).strftime("%Y-%m"))
+            conditions.append(ds.field("datetime") <= pa.scalar(to_ns_, type=_TIMESTAMP))
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+    def get_minute_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        columns: Optional[list[str]] = None,
+    ) -> pd.DataFrame:
+        """Минутные свечи; columns — проекция (datetime и contract_code читаются всегда)."""
+        tickers = [ticker] if isinstance(ticker, str) else ticker
+        wanted = columns or CANDLE_COLUMNS[1:]
+        projection = ["datetime", *[c for c in wanted if c not in ("datetime", "contract_code")], "contract_code"]
+
+        table = self._get_dataset().to_table(columns=projection, filter=self._build_filter(tickers, from_dt, to_dt))
+        if table.num_rows == 0:
+            return empty_candle_frame()[projection]
+        table = table.sort_by([("datetime", "ascending")])
+        df = table.to_pandas()
+        df["contract_code"] = df["contract_code"].astype(object)
+        df["datetime"] = self._restore_tz(df["datetime"], df["contract_code"].unique())
+        return df
+
+    def get_hourly_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        return self.get_candles(ticker, from_dt, to_dt, timeframe="1h")
+
+    def get_time_range(
+        self,
+        ticker: Union[str, list[str], None] = None,
+    ) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Границы по времени читаются только из колонки datetime нужных партиций."""
+        tickers = [ticker] if isinstance(ticker, str) else ticker
+        table = self._get_dataset().to_table(columns=["datetime"], filter=self._build_filter(tickers, None, None))
+        if table.num_rows == 0:
+            return None, None
+        bounds = pc.min_max(table.column("datetime"))
+        times = pd.Series([bounds["min"].as_py(), bounds["max"].as_py()])
+        times = self._restore_tz(times, tickers or self.get_available_tickers())
+        return times.iloc[0], times.iloc[1]
+
+    def get_available_tickers(self) -> list[str]:
+        return sorted(
+            p.name.split("=", 1)[1] for p in self.data_dir.glob("contract_code=*") if p.is_dir()
+        )
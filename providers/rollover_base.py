@@ -1,25 +1,53 @@
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import pandas as pd
 import re
 
-from providers.parquet import ParquetDataProvider
+from providers.continuous import ContinuousContractBuilder
+from providers.rollover_calendar import load_rollover_calendar, rollover_switch_times
+from providers.parquet import ParquetCandleProvider
 
 
-class RolloverProviderBase(ParquetDataProvider):
-    def __init__(self, data_dir: Path, source_name: str = "ROLL_COMBINED", debug_output: bool = False):
+class RolloverProviderBase(ParquetCandleProvider):
+    def __init__(
+        self,
+        data_dir: Path,
+        source_name: str = "ROLL_COMBINED",
+        debug_output: bool = False,
+        adjustment: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        calendar_path: Optional[Path] = None,
+    ):
+        """
+        - adjustment: None | "panama" | "ratio" — обратная корректировка цен на склейках
+        - cache_dir: куда сохранять готовый непрерывный ряд (по умолчанию data_dir/.continuous)
+        - calendar_path: календарь ролловеров (scripts/detect_rollover_points.py); склейка идёт по его моментам перехода
+        """
         super().__init__(data_dir)
         self.source_name = source_name
         self.debug_output = debug_output
+        self.calendar_path = Path(calendar_path) if calendar_path is not None else None
         self._cached_df = None
+        self.builder = ContinuousContractBuilder(
+            adjustment=adjustment,
+            cache_dir=cache_dir if cache_dir is not None else self.data_dir / ".continuous",
+        )
 
     def get_dataframes(self) -> List[Tuple[str, pd.DataFrame]]:
         if self._cached_df is not None:
             return [(self.source_name, self._cached_df)]
 
-        raw = self.load_raw_dataframes()
-        sorted_contracts = self.tag_and_sort_contracts(raw)
-        combined_df = self.combine_contracts(sorted_contracts)
+        # Ряд, уже собранный любым процессом, грузится с диска; перестраивается только при смене исходников
+        calendar = self.rollover_calendar()
+        sources = self.raw_source_paths()
+        if calendar is not None:
+            sources = [*sources, self.calendar_path]
+        combined_df = self.builder.load_or_build(
+            self.source_name,
+            sources,
+            lambda: self.tag_and_sort_contracts(self.load_raw_dataframes()),
+            rollover_switch_times(calendar, tz="UTC"),
+        )
 
         if self.debug_output:
             debug_path = Path("../data/debug") / f"{self.source_name}.csv"
@@ -30,8 +58,16 @@ class RolloverProviderBase(ParquetDataProvider):
         self._cached_df = combined_df
         return [(self.source_name, combined_df)]
 
+    def rollover_calendar(self) -> Optional[pd.DataFrame]:
+        if self.calendar_path is None:
+            return None
+        return load_rollover_calendar(self.calendar_path)
+
+    def raw_source_paths(self) -> List[Path]:
+        raise NotImplementedError("Subclasses must implement raw_source_paths")
+
     def load_raw_dataframes(self) -> List[Tuple[str, pd.DataFrame]]:
-        raise NotImplementedError("Subclasses must implement load_raw_dataframes")
+        return [(p.stem, pd.read_parquet(p)) for p in self.raw_source_paths()]
 
     def tag_and_sort_contracts(self, raw: List[Tuple[str, pd.DataFrame]]) -> List[Tuple[str, pd.DataFrame]]:
         contract_dfs = []
@@ -45,18 +81,7 @@ class RolloverProviderBase(ParquetDataProvider):
         return sorted(contract_dfs, key=lambda x: x[1]["datetime"].min())
 
     def combine_contracts(self, sorted_contracts: List[Tuple[str, pd.DataFrame]]) -> pd.DataFrame:
-        combined = []
-        for i, (code, df) in enumerate(sorted_contracts):
-            df = df.copy()
-            if i == 0:
-                combined.append(df)
-                continue
-
-            prev_max_dt = combined[-1]["datetime"].max()
-            filtered = df[df["datetime"] > (prev_max_dt - pd.Timedelta(minutes=1))]
-            combined.append(filtered)
-
-        return pd.concat(combined).sort_values("datetime").reset_index(drop=True)
+        return self.builder.build(sorted_contracts, rollover_switch_times(self.rollover_calendar(), tz="UTC"))
 
     def _extract_contract_code(self, source: str) -> str:
         match = re.match(r"(FUTRTS\d{6})", source)
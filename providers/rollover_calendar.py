@@ -0,0 +1,120 @@
+import re
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from core.logger import get_logger
+
+log = get_logger(__name__)
+
+CALENDAR_FILENAME = "rollover_calendar.parquet"
+CALENDAR_COLUMNS = ["current", "next", "expiry", "switch_date", "days_before_expiry", "switch_time"]
+
+_CONTRACT_RE = re.compile(r"(FUTRTS\d{6})")
+
+
+def contract_expiry(contract_code: str) -> pd.Timestamp:
+    """Конец месяца экспирации из кода вида FUTRTS<MM><YY>00 (FUTRTS032200 → 2022-03-31)."""
+    month = int(contract_code[6:8])
+    year = 2000 + int(contract_code[8:10])
+    return pd.Timestamp(year=year, month=month, day=1) + pd.offsets.MonthEnd(0)
+
+
+def load_daily_volume(data_dir: Path) -> pd.DataFrame:
+    """
+    Дневной объём всех контрактов: колонки date, contract_code, volume.
+    Берётся из *_daily_volume.parquet (scripts/ingest_contracts.py), иначе агрегируется из часовых файлов.
+    """
+    data_dir = Path(data_dir)
+    frames = []
+    volume_files = sorted(data_dir.glob("FUTRTS*_daily_volume.parquet"))
+    for path in volume_files:
+        df = pd.read_parquet(path, columns=["date", "volume"])
+        frames.append(df.assign(contract_code=_CONTRACT_RE.match(path.name).group(1)))
+
+    if not volume_files:
+        for path in sorted(data_dir.glob("FUTRTS*_candle_interval_hour.parquet")):
+            df = pd.read_parquet(path, columns=["datetime", "volume"])
+            dates = pd.to_datetime(df["datetime"], utc=True).dt.date.rename("date")
+            daily = df.groupby(dates)["volume"].sum().reset_index()
+            frames.append(daily.assign(contract_code=_CONTRACT_RE.match(path.name).group(1)))
+
+    if not frames:
+        return pd.DataFrame(columns=["date", "contract_code", "volume"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_rollover_calendar(daily_volume: pd.DataFrame, rolling_days: int = 1) -> pd.DataFrame:
+    """
+    Календарь переходов по пересечению объёмов — одним векторным проходом по всем контрактам.
+
+    Матрица дата × контракт (контракты по дате экспирации); для каждой соседней пары
+    ищется первый день, когда объём следующего контракта выше текущего rolling_days
+    общих торговых дней подряд. Пересечение известно только по итогам дня, поэтому
+    switch_time — начало следующих суток (UTC).
+    """
+    if daily_volume.empty:
+        return pd.DataFrame(columns=CALENDAR_COLUMNS)
+
+    contracts = sorted(daily_volume["contract_code"].unique(), key=contract_expiry)
+    pivot = daily_volume.pivot_table(index="date", columns="contract_code", values="volume", aggfunc="sum")
+    pivot = pivot.reindex(columns=contracts).sort_index()
+    volume = pivot.to_numpy(dtype=float)
+
+    curr, nxt = volume[:, :-1], volume[:, 1:]
+    common = ~np.isnan(curr) & ~np.isnan(nxt)
+    ahead = common & (nxt > curr)
+
+    # длина серии "следующий впереди" в днях, где торговались оба контракта
+    ordinal = np.cumsum(common, axis=0)
+    last_miss = np.maximum.accumulate(np.where(common & ~ahead, ordinal, 0), axis=0)
+    hit = ahead & (ordinal - last_miss >= rolling_days)
+
+    found = hit.any(axis=0)
+    first = hit.argmax(axis=0)
+
+    dates = pivot.index.to_numpy()
+    calendar = pd.DataFrame({
+        "current": contracts[:-1],
+        "next": contracts[1:],
+        "expiry": [contract_expiry(code).date() for code in contracts[:-1]],
+        "switch_date": [dates[i] if ok else None for i, ok in zip(first, found)],
+    })
+    switch_date = pd.to_datetime(calendar["switch_date"])
+    calendar["days_before_expiry"] = (pd.to_datetime(calendar["expiry"]) - switch_date).dt.days
+    calendar["switch_time"] = (switch_date + pd.Timedelta(days=1)).dt.tz_localize("UTC")
+    return calendar[CALENDAR_COLUMNS]
+
+
+def save_rollover_calendar(calendar: pd.DataFrame, path: Path) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    calendar.to_parquet(path, index=False)
+    log.info(f"🗓️ Календарь ролловеров сохранён: {path} ({len(calendar)} переходов)")
+
+
+def load_rollover_calendar(path: Path) -> Optional[pd.DataFrame]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+def rollover_switch_times(
+    calendar: Union[pd.DataFrame, Path, None],
+    tz=None,
+) -> dict[str, pd.Timestamp]:
+    """
+    {контракт: момент, начиная с которого можно переходить на следующий}.
+    Контракты без найденного пересечения в словарь не попадают.
+    tz — таймзона колонки datetime, с которой будут сравниваться моменты (None — наивное UTC-время).
+    """
+    if calendar is None or isinstance(calendar, (str, Path)):
+        calendar = load_rollover_calendar(calendar) if calendar is not None else None
+    if calendar is None or calendar.empty:
+        return {}
+    calendar = calendar.dropna(subset=["switch_time"])
+    times = pd.to_datetime(calendar["switch_time"], utc=True)
+    times = times.dt.tz_convert(tz) if tz is not None else times.dt.tz_localize(None)
+    return dict(zip(calendar["current"], times))
@@ -1,15 +1,19 @@
 from pathlib import Path
-from typing import List, Tuple
-import pandas as pd
-import re
+from typing import List, Optional
 
 from providers.rollover_base import RolloverProviderBase  # ← твой новый базовый класс
 
 class RolloverHourlyProvider(RolloverProviderBase):
-    def __init__(self, data_dir: Path, source_name: str = "ROLL_HOURLY_COMBINED", debug_output: bool = False):
-        super().__init__(data_dir, source_name, debug_output)
+    def __init__(
+        self,
+        data_dir: Path,
+        source_name: str = "ROLL_HOURLY_COMBINED",
+        debug_output: bool = False,
+        adjustment: Optional[str] = None,
+        calendar_path: Optional[Path] = None,
+    ):
+        super().__init__(data_dir, source_name, debug_output, adjustment, calendar_path=calendar_path)
 
-    def load_raw_dataframes(self) -> List[Tuple[str, pd.DataFrame]]:
-        """Загружает только часовые parquet-файлы."""
-        hour_files = list(self.data_dir.glob("*_candle_interval_hour.parquet"))
-        return [(p.stem, pd.read_parquet(p)) for p in hour_files]
+    def raw_source_paths(self) -> List[Path]:
+        """Только часовые parquet-файлы."""
+        return sorted(self.data_dir.glob("*_candle_interval_hour.parquet"))
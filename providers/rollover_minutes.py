@@ -8,8 +8,15 @@ log = get_logger(__name__)
 
 
 class RolloverMinuteProvider(RolloverHourlyProvider):
-    def __init__(self, data_dir: Path, source_name: str = "ROLL_MINUTE_COMBINED", debug_output: bool = False):
-        super().__init__(data_dir, source_name, debug_output)
+    def __init__(
+        self,
+        data_dir: Path,
+        source_name: str = "ROLL_MINUTE_COMBINED",
+        debug_output: bool = False,
+        adjustment: Optional[str] = None,
+        calendar_path: Optional[Path] = None,
+    ):
+        super().__init__(data_dir, source_name, debug_output, adjustment, calendar_path=calendar_path)
         self._cached_minute_df: Optional[pd.DataFrame] = None
 
     def load_minute_data(self):
@@ -41,7 +48,8 @@ class RolloverMinuteProvider(RolloverHourlyProvider):
         return self._cached_minute_df
 
     def get_minute_slice(self, contract_code: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
-        """Возвращает минутные свечи по указанному контракту и временному диапазону."""
-        df = self.load_minute_data()
-        mask = (df["contract_code"] == contract_code) & (df["datetime"] >= start) & (df["datetime"] <= end)
-        return df.loc[mask].copy()
+        """
+        Возвращает минутные свечи по указанному контракту и временному диапазону.
+        Срез берётся бинарным поиском из memory-mapped хранилища — колонки read-only, без копии.
+        """
+        return self._get_store().frame(contract_code, start, end)
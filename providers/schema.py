@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from core.logger import get_logger
+
+log = get_logger(__name__)
+
+# Стандартная схема свечей: float64 цены, int64 объём, contract_code — object
+STANDARD_DTYPES = {
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.int64,
+}
+
+# Компактная схема: вдвое меньше памяти на цены и объём.
+# datetime остаётся datetime64[ns] — это и есть int64 epoch-наносекунды.
+COMPACT_DTYPES = {
+    "open": np.float32,
+    "high": np.float32,
+    "low": np.float32,
+    "close": np.float32,
+    "volume": np.int32,
+}
+
+
+def candle_dtypes(compact: bool) -> dict:
+    return COMPACT_DTYPES if compact else STANDARD_DTYPES
+
+
+def contract_column(contract_code: str, length: int, compact: bool):
+    """Колонка contract_code: в компактной схеме — категория с int8-кодами вместо строки на каждой строке."""
+    if compact:
+        return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[contract_code])
+    return contract_code
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Приводит датафрейм свечей к компактной схеме (лишние колонки не трогает)."""
+    casts = {col: dtype for col, dtype in COMPACT_DTYPES.items() if col in df.columns and df[col].dtype != dtype}
+    if casts:
+        df = df.astype(casts)
+    if "contract_code" in df.columns and not isinstance(df["contract_code"].dtype, pd.CategoricalDtype):
+        df = df.assign(contract_code=df["contract_code"].astype("category"))
+    return df
+
+
+def concat_contract_codes(frames: list[pd.DataFrame]) -> Optional[pd.Categorical]:
+    """Склейка категориальных contract_code разных контрактов без перехода в object."""
+    columns = [df["contract_code"] for df in frames if "contract_code" in df.columns]
+    if len(columns) != len(frames) or not all(isinstance(c.dtype, pd.CategoricalDtype) for c in columns):
+        return None
+    return union_categoricals(columns)
+
+
+class MemoryBudget:
+    """
+    LRU-кэш с бюджетом по памяти.
+
+    Значения вытесняются в порядке давности использования, пока суммарный
+    размер не уложится в ``limit_mb``. ``limit_mb=None`` — без ограничения.
+    """
+
+    def __init__(self, limit_mb: Optional[float] = None):
+        self.limit_bytes = None if limit_mb is None else int(limit_mb * 1024 * 1024)
+        self.used_bytes = 0
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable) -> Any:
+        value, _ = self._items[key]
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        if key in self._items:
+            self.used_bytes -= self._items.pop(key)[1]
+        self._items[key] = (value, nbytes)
+        self.used_bytes += nbytes
+        self._evict(keep=key)
+
+    def pop(self, key: Hashable) -> None:
+        if key in self._items:
+            self.used_bytes -= self._items.pop(key)[1]
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.used_bytes = 0
+
+    def _evict(self, keep: Hashable) -> None:
+        if self.limit_bytes is None:
+            return
+        # только что добавленный ключ последний в очереди и вытесняется последним
+        while self.used_bytes > self.limit_bytes and len(self._items) > 1:
+            key = next(iter(self._items))
+            self.used_bytes -= self._items.pop(key)[1]
+        if self.used_bytes > self.limit_bytes:
+            log.warning(f"⚠️ Объект {keep} ({self.used_bytes / 2**20:.1f} МБ) больше бюджета памяти целиком")
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=False).sum())
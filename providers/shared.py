@@ -0,0 +1,193 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.logger import get_logger
+from providers.base import AbstractCandleProvider
+from providers.candle_store import (
+    bar_slice_bounds,
+    empty_candle_frame,
+    frame_from_arrays,
+    merge_sorted_frames,
+    slice_bounds,
+    to_ns,
+)
+from providers.schema import MemoryBudget, contract_column
+
+log = get_logger(__name__)
+
+_META_KEY = b"shared_candles"
+_VALUE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _shm_root() -> Path:
+    """/dev/shm там, где он есть (Linux), иначе временная папка ОС."""
+    shm = Path("/dev/shm")
+    return shm if shm.is_dir() else Path(tempfile.gettempdir())
+
+
+class SharedCandleDataset:
+    """
+    Набор свечей, один раз выгруженный родительским процессом в Arrow IPC файлы.
+
+    На каждый таймфрейм — свой файл ``<tf>.arrow``: строки отсортированы по
+    (contract_code, datetime), а диапазоны строк контрактов лежат в метаданных схемы.
+    Воркеры открывают файлы через memory-map (см. SharedCandleProvider), поэтому
+    данные читаются с диска один раз и делят одни и те же страницы памяти.
+    Схема колонок — как у провайдера-источника: у компактного (compact=True) цены и объём публикуются
+    в float32/int32, а воркеры собирают contract_code категорией.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @classmethod
+    def publish(
+        cls,
+        provider: AbstractCandleProvider,
+        timeframes: tuple[str, ...] = ("1m", "1h"),
+        root: Optional[Path] = None,
+    ) -> "SharedCandleDataset":
+        # минутки публикуются всегда — из них провайдер досчитывает прочие таймфреймы
+        timeframes = ("1m", *(tf for tf in timeframes if tf != "1m"))
+        path = Path(root or _shm_root()) / f"candles_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        path.mkdir(parents=True)
+        tickers = provider.get_available_tickers()
+        compact = bool(getattr(provider, "compact", False))
+
+        for timeframe in timeframes:
+            columns = {name: [] for name in ("datetime", *_VALUE_COLUMNS)}
+            index, offset = {}, 0
+            tz = None
+            for code in tickers:
+                df = provider.get_candles(code, timeframe=timeframe)
+                if df.empty:
+                    continue
+                if df["datetime"].dt.tz is not None:
+                    tz = str(df["datetime"].dt.tz)
+                columns["datetime"].append(df["datetime"].to_numpy(dtype="datetime64[ns]").view("int64"))
+                for name in _VALUE_COLUMNS:
+                    columns[name].append(df[name].to_numpy())
+                index[code] = [offset, offset + len(df)]
+                offset += len(df)
+
+            table = pa.table({
+                name: pa.array(np.concatenate(parts) if parts else np.empty(0))
+                for name, parts in columns.items()
+            })
+            meta = {"contracts": index, "tz": tz, "compact": compact}
+            table = table.replace_schema_metadata({_META_KEY: json.dumps(meta).encode()})
+
+            with pa.OSFile(str(path / f"{timeframe}.arrow"), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        log.info(f"📤 Свечи {len(tickers)} контрактов выгружены в общую память: {path}")
+        return cls(path)
+
+    def close(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "SharedCandleDataset":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SharedCandleProvider(AbstractCandleProvider):
+    """
+    Провайдер поверх SharedCandleDataset: memory-map Arrow-файлов, срезы без копирования.
+    - memory_budget_mb: предел памяти под отображённые таймфреймы (LRU), как у ParquetCandleProvider
+    """
+
+    def __init__(self, path: Path, memory_budget_mb: Optional[float] = None):
+        self.path = Path(path)
+        self._tables = MemoryBudget(memory_budget_mb)
+
+    def _load(self, timeframe: str) -> Optional[tuple[dict[str, np.ndarray], dict]]:
+        if timeframe not in self._tables:
+            file = self.path / f"{timeframe}.arrow"
+            if not file.exists():
+                return None
+            table = pa.ipc.open_file(pa.memory_map(str(file), "r")).read_all()
+            meta = json.loads(table.schema.metadata[_META_KEY])
+            arrays = {}
+            for name in table.column_names:
+                column = table.column(name)
+                chunk = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+                arrays[name] = chunk.to_numpy(zero_copy_only=True)
+            self._tables.put(timeframe, (arrays, meta), sum(values.nbytes for values in arrays.values()))
+        return self._tables.get(timeframe)
+
+    def _normalize_tickers(self, ticker: Union[str, list[str], None]) -> list[str]:
+        if ticker is None:
+            return self.get_available_tickers()
+        if isinstance(ticker, str):
+            return [ticker]
+        return ticker
+
+    def _slice(self, timeframe: str, code: str, from_dt: Optional[datetime], to_dt: Optional[datetime]) -> pd.DataFrame:
+        arrays, meta = self._load(timeframe)
+        bounds = meta["contracts"].get(code)
+        if bounds is None:
+            return empty_candle_frame()
+        start, stop = bounds
+        times = arrays["datetime"][start:stop]
+        # минутки — [from, to] включительно, бары старших таймфреймов — открытые в [from, to), как в ParquetCandleProvider
+        bounds_of = slice_bounds if timeframe == "1m" else bar_slice_bounds
+        lo, hi = bounds_of(times, to_ns(from_dt), to_ns(to_dt))
+        df = frame_from_arrays({name: values[start + lo:start + hi] for name, values in arrays.items()}, meta["tz"])
+        df["contract_code"] = contract_column(code, len(df), meta.get("compact", False))
+        return df
+
+    def get_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        timeframe: str = "1h",
+    ) -> pd.DataFrame:
+        if self._load(timeframe) is None:
+            return super().get_candles(ticker, from_dt, to_dt, timeframe)
+        tickers = self._normalize_tickers(ticker)
+        return merge_sorted_frames([self._slice(timeframe, code, from_dt, to_dt) for code in tickers])
+
+    def get_minute_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        return self.get_candles(ticker, from_dt, to_dt, timeframe="1m")
+
+    def get_hourly_candles(
+        self,
+        ticker: Union[str, list[str], None] = None,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        return self.get_candles(ticker, from_dt, to_dt, timeframe="1h")
+
+    def get_time_range(
+        self,
+        ticker: Union[str, list[str], None] = None,
+    ) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        frames = [self._slice("1m", code, None, None) for code in self._normalize_tickers(ticker)]
+        bounds = [(df["datetime"].iloc[0], df["datetime"].iloc[-1]) for df in frames if not df.empty]
+        if not bounds:
+            return None, None
+        return min(b[0] for b in bounds), max(b[1] for b in bounds)
+
+    def get_available_tickers(self) -> list[str]:
+        _, meta = self._load("1m")
+        return sorted(meta["contracts"])
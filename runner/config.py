@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class StrategyConfig:
@@ -15,6 +16,34 @@ class StrategyConfig:
     debug_data_provider: bool = False
     max_workers: int = 8
 
+    # Компактная схема свечей (float32/int32/category) и предел памяти провайдера, МБ
+    compact_candles: bool = False
+    memory_budget_mb: Optional[float] = None
+
+    # Кэш индикаторов, общий для всей сетки и всех воркеров (data/candles_filtered/.indicator_cache)
+    indicator_cache: bool = True
+
+    # Бэкенд численных ядер: "numpy" (эталон) или "numba" (JIT, если установлен)
+    kernel_backend: str = "numpy"
+
+    # Исполнение: "hourly" — ролловер-симулятор по open часовых баров;
+    # "intrabar" — по контрактам, со стопом/тейком/трейлингом в ATR по минутным high/low (None — уровень выключен);
+    # "portfolio" — все инструменты одним проходом с общим капиталом, размер позиции по lot/step_price из каталога
+    execution: str = "hourly"
+    stop_atr: Optional[float] = 2.0
+    target_atr: Optional[float] = 3.0
+    trailing_atr: Optional[float] = None
+    initial_capital: float = 1_000_000
+    position_fraction: float = 0.1
+    max_positions: Optional[int] = None
+
+    # Walk-forward: параметры подбираются по selection_metric на train_days и проверяются на следующих test_days;
+    # все ступени × группы параметров уходят в пул одной очередью
+    walk_forward: bool = False
+    train_days: int = 120
+    test_days: int = 30
+    selection_metric: str = "sharpe"
+
     def __post_init__(self):
         if self.mode == "debug":
             self.sma_values = (20,)
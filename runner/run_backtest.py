@@ -1,22 +1,38 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 import itertools
 from tqdm import tqdm
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from core.backtester import BacktestRunner
-from core.strategy import BasicStrategy
+from core.strategy import BasicStrategy, StrategyBatch
+from core.walk_forward import Fold, load_fold_candles, make_folds, walk_forward_report
 from providers.parquet import ParquetCandleProvider
+from providers.shared import SharedCandleDataset, SharedCandleProvider
 from simulators.basic import BasicTradeSimulator
 from analyzers.sma_rsi import SMARSIAnalyzer
+from analyzers.indicator_cache import IndicatorCache
 from simulators.rollover import RolloverTradeSimulator
-from writers.md_writer import save_summary_table, save_strategy_summary, save_markdown_table
+from simulators.intrabar import IntrabarTradeSimulator
+from simulators.portfolio import PortfolioSimulator
+from writers.md_writer import (
+    save_equity_curve,
+    save_markdown_table,
+    save_strategy_summary,
+    save_summary_table,
+    save_walk_forward_summary,
+)
 from evaluators.aggregator import aggregate_by_strategy
+from evaluators.strategy_evaluator import StrategyEvaluator
+from kernels.backend import set_backend
 from config import StrategyConfig
 
 
 # Глобальные параметры
 ROOT_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT_DIR / "data" / "candles_filtered"
+INDICATOR_CACHE_DIR = DATA_DIR / ".indicator_cache"
 fixed_atr = 14
 config = StrategyConfig(mode="stupid")
 
@@ -30,26 +46,97 @@ param_grid = [
 
 ]
 
+# Одна задача пула — все пороги для пары (sma, rsi): индикаторы общие, сигналы идут одной матрицей в simulate_batch
+param_groups = {}
+for sma, rsi, rsi_buy, rsi_sell in param_grid:
+    param_groups.setdefault((sma, rsi), []).append((rsi_buy, rsi_sell))
 
-def run_one_strategy(args):
-    sma, rsi, rsi_buy, rsi_sell = args
-    strategy_id = f"SMARSI_sma{sma}_rsi{rsi}_atr{fixed_atr}_buy{rsi_buy}_sell{rsi_sell}"
+def make_provider() -> ParquetCandleProvider:
+    return ParquetCandleProvider(
+        data_dir=DATA_DIR,
+        compact=config.compact_candles,
+        memory_budget_mb=config.memory_budget_mb,
+    )
 
-    provider = ParquetCandleProvider(data_dir=DATA_DIR)
 
-    def strategy_class():
-        analyzer = SMARSIAnalyzer(
-            sma=sma,
-            rsi=rsi,
-            atr=fixed_atr,
-            rsi_buy=rsi_buy,
-            rsi_sell=rsi_sell,
+# Провайдер воркера: подключается к общему датасету один раз при старте процесса
+_worker_provider: Optional[SharedCandleProvider] = None
+# Кэш индикаторов воркера: LRU процесса поверх общего дискового слоя
+_indicator_cache: Optional[IndicatorCache] = None
+
+
+def make_indicator_cache() -> Optional[IndicatorCache]:
+    if not config.indicator_cache:
+        return None
+    # первая группа сетки, промахнувшаяся по индикатору, считает его периоды для всех групп разом
+    grid = {"sma": config.sma_values, "rsi": config.rsi_values, "atr": (fixed_atr,)}
+    return IndicatorCache(INDICATOR_CACHE_DIR, grid=grid)
+
+
+def init_worker(dataset_path: Path):
+    global _worker_provider, _indicator_cache
+    # схема (compact) приходит с опубликованным набором, бюджет памяти — тот же, что у провайдера родителя
+    _worker_provider = SharedCandleProvider(dataset_path, memory_budget_mb=config.memory_budget_mb)
+    _indicator_cache = make_indicator_cache()
+    set_backend(config.kernel_backend)
+
+
+def make_simulator():
+    if config.execution == "intrabar":
+        return IntrabarTradeSimulator(
+            commission_rate=0.0004,
+            slippage=10,
+            stop_atr=config.stop_atr,
+            target_atr=config.target_atr,
+            trailing_atr=config.trailing_atr,
+        )
+    if config.execution == "portfolio":
+        return PortfolioSimulator(
+            initial_capital=config.initial_capital,
+            position_fraction=config.position_fraction,
+            max_positions=config.max_positions,
+            commission_rate=0.0004,
+            slippage=10,
         )
-        simulator = RolloverTradeSimulator(commission_rate=0.0004, slippage=10)
-        return BasicStrategy(analyzer=analyzer, simulator=simulator)
+    return RolloverTradeSimulator(commission_rate=0.0004, slippage=10)
+
+
+def make_strategy_id(sma, rsi, rsi_buy, rsi_sell) -> str:
+    return f"SMARSI_sma{sma}_rsi{rsi}_atr{fixed_atr}_buy{rsi_buy}_sell{rsi_sell}"
+
+
+def make_batch_factory(sma, rsi, thresholds, report_ids: dict):
+    """Фабрика пакета стратегий группы (sma, rsi); report_ids заполняется соответствием strategy_id -> id отчёта."""
+    indicator_cache = _indicator_cache or make_indicator_cache()
+
+    def strategy_class():
+        simulator = make_simulator()
+        strategies = []
+        for rsi_buy, rsi_sell in thresholds:
+            analyzer = SMARSIAnalyzer(
+                sma=sma,
+                rsi=rsi,
+                atr=fixed_atr,
+                rsi_buy=rsi_buy,
+                rsi_sell=rsi_sell,
+                cache=indicator_cache,
+            )
+            strategy = BasicStrategy(analyzer=analyzer, simulator=simulator)
+            report_ids[strategy.strategy_id] = make_strategy_id(sma, rsi, rsi_buy, rsi_sell)
+            strategies.append(strategy)
+        return StrategyBatch(strategies)
+
+    return strategy_class
+
+
+def run_strategy_group(args):
+    sma, rsi, thresholds = args
+
+    provider = _worker_provider or make_provider()
+    report_ids = {}
 
     bt = BacktestRunner(
-        strategy_class=strategy_class,
+        strategy_class=make_batch_factory(sma, rsi, thresholds, report_ids),
         data_provider=provider,
 
         tickers=config.tickers if hasattr(config, "tickers") else None,
@@ -60,8 +147,47 @@ def run_one_strategy(args):
 
     bt.run()
 
+    # результаты всех порогов вперемешку по окнам — раскладываем по стратегиям
+    results_by_strategy = {}
+    for row in bt.results:
+        results_by_strategy.setdefault(row["strategy_id"], []).append(row)
+
+    for analyzer_id, results in results_by_strategy.items():
+        save_reports(results, report_ids[analyzer_id])
+
+    return bt.results
+
+
+@lru_cache(maxsize=4)
+def fold_candles(fold: Fold):
+    """Свечи ступени в воркере: задачи одной ступени идут в очереди подряд и переиспользуют один срез."""
+    provider = _worker_provider or make_provider()
+    return load_fold_candles(provider, fold, config.tickers if hasattr(config, "tickers") else None)
+
+
+def run_fold_group(args):
+    fold, sma, rsi, thresholds = args
+
+    report_ids = {}
+    bt = BacktestRunner(
+        strategy_class=make_batch_factory(sma, rsi, thresholds, report_ids),
+        data_provider=_worker_provider or make_provider(),
+    )
+    bt.run_fold(fold, *fold_candles(fold))
+
+    for row in bt.results:
+        row["strategy_id"] = report_ids[row["strategy_id"]]
+        # для выбора победителя нужны только метрики обучения; сделки едут обратно лишь с проверочных окон
+        row.pop("strategy", None)
+        if row["phase"] == "train":
+            row.pop("trades_df", None)
+            row.pop("equity", None)
+    return bt.results
+
+
+def save_reports(results: list[dict], strategy_id: str):
     if config.save_individual_reports:
-        for row in bt.results:
+        for row in results:
             row["strategy_id"] = strategy_id
             trades = row.get("trades_df")
 
@@ -75,25 +201,70 @@ def run_one_strategy(args):
                     ticker=row.get("source")
                 )
 
-    save_summary_table(bt.results, strategy_id)
+            save_equity_curve(
+                row.get("equity"),
+                name=row["strategy_id"],
+                start=row.get("start"),
+                end=row.get("end"),
+                ticker=row.get("source")
+            )
 
-    return bt.results
+    save_summary_table(results, strategy_id)
+
+
+def run_walk_forward(executor, provider) -> None:
+    first, last = provider.get_time_range(config.tickers if hasattr(config, "tickers") else None)
+    if first is None:
+        print("⚠️ Нет данных для walk-forward")
+        return
+    folds = make_folds(first, last, config.train_days, config.test_days)
+    if not folds:
+        print(f"⚠️ Истории {first} → {last} не хватает на одну ступень {config.train_days} + {config.test_days} дн.")
+        return
+
+    # все ступени × группы параметров — одной очередью; задачи одной ступени подряд, чтобы воркеры делили её свечи
+    futures = [
+        executor.submit(run_fold_group, (fold, sma, rsi, thresholds))
+        for fold in folds
+        for (sma, rsi), thresholds in param_groups.items()
+    ]
+
+    all_results = []
+    for future in tqdm(as_completed(futures), total=len(futures), desc="🧪 Walk-forward folds"):
+        try:
+            all_results.extend(future.result())
+        except Exception as e:
+            print(e)
+
+    folds_df, oos_trades = walk_forward_report(all_results, config.selection_metric)
+    save_walk_forward_summary(folds_df, oos_trades, StrategyEvaluator().evaluate(oos_trades), config.selection_metric)
 
 
 def main():
     all_results = []
+    set_backend(config.kernel_backend)
+    provider = make_provider()
+
+    # Данные читаются с диска один раз и раздаются воркерам через общую память
+    with SharedCandleDataset.publish(provider) as dataset:
+        with ProcessPoolExecutor(max_workers=16, initializer=init_worker, initargs=(dataset.path,)) as executor:
+            if config.walk_forward:
+                run_walk_forward(executor, provider)
+                return
+
+            futures = {
+                executor.submit(run_strategy_group, (sma, rsi, thresholds)): (sma, rsi)
+                for (sma, rsi), thresholds in param_groups.items()
+            }
 
-    with ProcessPoolExecutor(max_workers=16) as executor:
-        futures = {executor.submit(run_one_strategy, args): args for args in param_grid}
-
-        for future in tqdm(as_completed(futures), total=len(futures), desc="🧪 Testing strategies"):
-            try:
-                results = future.result()
-                if results:
-                    all_results.extend(results)
-            except Exception as e:
-                print(e)
-                pass  # Можно логировать ошибку, если захочешь
+            for future in tqdm(as_completed(futures), total=len(futures), desc="🧪 Testing strategy groups"):
+                try:
+                    results = future.result()
+                    if results:
+                        all_results.extend(results)
+                except Exception as e:
+                    print(e)
+                    pass  # Можно логировать ошибку, если захочешь
 
     strategy_df = aggregate_by_strategy(all_results)
     save_strategy_summary(strategy_df)
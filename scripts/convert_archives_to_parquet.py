@@ -1,54 +1,114 @@
 import os
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import pandas as pd
-from io import TextIOWrapper
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 
 # Constants
 RAW_DATA_DIR = Path("../raw_data/historic_candles")
 OUTPUT_DIR = Path("../data/candles")
+MAX_WORKERS = os.cpu_count() or 4
 
 # Columns: id, datetime, open, high, low, close, volume, empty
 COLUMNS = ["id", "datetime", "open", "high", "low", "close", "volume", "_"]
-DTYPE = {
-    "open": "float",
-    "high": "float",
-    "low": "float",
-    "close": "float",
-    "volume": "int"
-}
-
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-for zip_path in RAW_DATA_DIR.glob("*.zip"):
-    all_minutes = []
-    with zipfile.ZipFile(zip_path, 'r') as z:
-        for file_name in z.namelist():
-            if not file_name.endswith(".csv"):
-                continue
-            with z.open(file_name) as f:
-                df = pd.read_csv(
-                    TextIOWrapper(f, encoding="utf-8", newline=""),
-                    sep=";",
-                    header=None,
-                    names=COLUMNS,
-                    usecols=[1, 2, 3, 4, 5, 6],
-                    dtype=DTYPE,
-                    parse_dates=["datetime"]
-                )
-                all_minutes.append(df)
-
-    if not all_minutes:
-        continue
-
-    # Combine all minutes into one DataFrame
-    minutes_df = pd.concat(all_minutes).sort_values("datetime")
-
-    # Reset index and save
-    minutes_df.reset_index(drop=True, inplace=True)
-
-    # Generate output filename from zip file name
-    base_name = zip_path.stem  # e.g., FUTRTS032200_2020
-    output_file = OUTPUT_DIR / f"{base_name}.parquet"
-    minutes_df.to_parquet(output_file, index=False)
-    print(f"Saved {output_file}")
+SCHEMA = pa.schema([
+    ("datetime", pa.timestamp("ns", tz="UTC")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.int64()),
+])
+
+READ_OPTIONS = pv.ReadOptions(column_names=COLUMNS, autogenerate_column_names=False)
+PARSE_OPTIONS = pv.ParseOptions(delimiter=";")
+CONVERT_OPTIONS = pv.ConvertOptions(
+    include_columns=SCHEMA.names,
+    column_types={field.name: field.type for field in SCHEMA},
+)
+
+
+def output_path(zip_path: Path) -> Path:
+    # e.g. FUTRTS032200_2020.zip -> FUTRTS032200_2020.parquet
+    return OUTPUT_DIR / f"{zip_path.stem}.parquet"
+
+
+def is_up_to_date(zip_path: Path) -> bool:
+    out = output_path(zip_path)
+    return out.exists() and out.stat().st_mtime >= zip_path.stat().st_mtime
+
+
+def read_csv(z: zipfile.ZipFile, file_name: str) -> pa.Table:
+    with z.open(file_name) as f:
+        data = f.read()
+    if not data.strip():
+        return SCHEMA.empty_table()
+    table = pv.read_csv(pa.BufferReader(data), READ_OPTIONS, PARSE_OPTIONS, CONVERT_OPTIONS)
+    return table.select(SCHEMA.names).sort_by("datetime")
+
+
+def convert_zip(zip_path: Path) -> tuple[str, int]:
+    """
+    Один архив -> один parquet. Каждый CSV (торговый день) читается, сортируется
+    и пишется отдельной row group, так что в памяти не больше одного дня.
+    """
+    out = output_path(zip_path)
+    tmp_out = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    rows = 0
+    last_ts = None
+    in_order = True
+
+    try:
+        with zipfile.ZipFile(zip_path, "r") as z, pq.ParquetWriter(tmp_out, SCHEMA) as writer:
+            # имена вида <uid>_<YYYYMMDD>.csv — по дате в хвосте
+            for file_name in sorted(z.namelist(), key=lambda name: name.rsplit("_", 1)[-1]):
+                if not file_name.endswith(".csv"):
+                    continue
+                table = read_csv(z, file_name)
+                if table.num_rows == 0:
+                    continue
+                bounds = pc.min_max(table.column("datetime"))
+                if last_ts is not None and bounds["min"].value < last_ts:
+                    in_order = False
+                last_ts = bounds["max"].value if last_ts is None else max(last_ts, bounds["max"].value)
+                writer.write_table(table)
+                rows += table.num_rows
+
+        if rows == 0:
+            tmp_out.unlink()
+            return f"Skipped {zip_path.name}: no candles", 0
+
+        if not in_order:
+            # дни в архиве пересекаются — редкий случай, досортировываем файл целиком
+            pq.write_table(pq.read_table(tmp_out).sort_by("datetime"), tmp_out)
+
+        os.replace(tmp_out, out)
+    except BaseException:
+        # битый CSV или сбой досортировки — недописанный временный файл не оставляем
+        tmp_out.unlink(missing_ok=True)
+        raise
+    return f"Saved {out}", rows
+
+
+def main():
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    zip_paths = sorted(RAW_DATA_DIR.glob("*.zip"))
+    pending = [p for p in zip_paths if not is_up_to_date(p)]
+    print(f"{len(zip_paths) - len(pending)} archives up to date, {len(pending)} to convert")
+
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(convert_zip, p): p for p in pending}
+        for future in as_completed(futures):
+            try:
+                message, rows = future.result()
+                print(f"{message} ({rows} rows)")
+            except Exception as e:
+                print(f"Failed {futures[future].name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
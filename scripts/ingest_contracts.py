@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from providers.fingerprint import sources_signature
+
+# Абсолютные пути
+BASE_DIR = Path(__file__).resolve().parents[1]
+INPUT_DIR = BASE_DIR / "data" / "candles"
+OUTPUT_DIR = BASE_DIR / "data" / "candles_filtered"
+MANIFEST_PATH = OUTPUT_DIR / "ingest_manifest.json"
+
+# Глубина выборки
+DAYS = 100
+INGEST_VERSION = 1
+
+# Regex для парсинга имён файлов
+pattern = re.compile(r"(?P<contract>FUTRTS\d{6})_(?P<year>\d{4})")
+
+OHLCV_AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+def output_paths(contract: str) -> dict[str, Path]:
+    return {
+        "minute": OUTPUT_DIR / f"{contract}_{DAYS}d_candle_interval_minute.parquet",
+        "hour": OUTPUT_DIR / f"{contract}_{DAYS}d_candle_interval_hour.parquet",
+        "daily_volume": OUTPUT_DIR / f"{contract}_{DAYS}d_daily_volume.parquet",
+    }
+
+
+def sources_fingerprint(paths: list[Path]) -> dict:
+    """Отпечаток входов контракта: имена, размеры и mtime исходников + параметры стадии."""
+    return {"version": INGEST_VERSION, "days": DAYS, "sources": sources_signature(paths)}
+
+
+def load_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def save_manifest(manifest: dict) -> None:
+    tmp_path = MANIFEST_PATH.with_name(f"{MANIFEST_PATH.name}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def write_atomic(df: pd.DataFrame, path: Path) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def build_artifacts(paths: list[Path]) -> tuple[dict[str, pd.DataFrame], pd.Timestamp, pd.Timestamp]:
+    """Один проход по исходникам контракта: минутки за DAYS дней, часовые бары и дневной объём."""
+    full_df = pd.concat([pd.read_parquet(p) for p in paths], ignore_index=True)
+    full_df["datetime"] = pd.to_datetime(full_df["datetime"], utc=True)
+    full_df = full_df.sort_values("datetime", kind="stable")
+
+    # Обрезка по дате
+    end_date = full_df["datetime"].max()
+    start_date = end_date - pd.Timedelta(days=DAYS)
+    minute_df = full_df[full_df["datetime"] >= start_date].reset_index(drop=True)
+
+    hour_df = (
+        minute_df.set_index("datetime")
+        .resample("1h")
+        .agg(OHLCV_AGG)
+        .dropna(subset=["open", "high", "low", "close"])
+        .reset_index()
+    )
+
+    daily_volume_df = (
+        minute_df.groupby(minute_df["datetime"].dt.date.rename("date"))["volume"]
+        .sum()
+        .reset_index()
+    )
+
+    return {"minute": minute_df, "hour": hour_df, "daily_volume": daily_volume_df}, start_date, end_date
+
+
+def main():
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    files_by_contract = {}
+    for path in INPUT_DIR.glob("FUTRTS*.parquet"):
+        match = pattern.match(path.stem)
+        if not match:
+            continue
+        files_by_contract.setdefault(match.group("contract"), []).append((int(match.group("year")), path))
+
+    manifest = load_manifest()
+    for contract, entries in sorted(files_by_contract.items()):
+        paths = [path for _, path in sorted(entries)]
+        fingerprint = sources_fingerprint(paths)
+        outputs = output_paths(contract)
+
+        if manifest.get(contract) == fingerprint and all(p.exists() for p in outputs.values()):
+            print(f"⏭️ {contract}: исходники не менялись")
+            continue
+
+        artifacts, start_date, end_date = build_artifacts(paths)
+        for name, df in artifacts.items():
+            write_atomic(df, outputs[name])
+
+        # манифест обновляется после каждого контракта — прерванный прогон продолжится с места остановки
+        manifest[contract] = fingerprint
+        save_manifest(manifest)
+        print(
+            f"✅ {contract}: {len(artifacts['minute'])} минут, {len(artifacts['hour'])} часов, "
+            f"{len(artifacts['daily_volume'])} дней с {start_date.date()} по {end_date.date()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,35 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+import numpy as np
 import pandas as pd
 
+from simulators.ledger import TradeLedger
+
 class TradeSimulatorBase(ABC):
     rollover_aware = False
     @abstractmethod
-    def simulate(self, df: pd.DataFrame, signals: pd.Series) -> pd.DataFrame:
-        """Возвращает DataFrame сделок"""
+    def simulate(self, df: pd.DataFrame, signals: pd.Series) -> TradeLedger:
+        """Возвращает журнал сделок (TradeLedger)"""
         pass
+
+    def simulate_stream(self, frames: Iterable[pd.DataFrame]) -> Iterator[TradeLedger]:
+        """
+        Симуляция по потоку кусков с колонкой signal (см. SignalAnalyzerBase.iter_calculate).
+        Базовая реализация собирает куски целиком; симуляторы с переносимым состоянием её переопределяют.
+        """
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return
+        df = pd.concat(frames)
+        yield self.simulate(df, df["signal"])
+
+    def simulate_batch(self, df: pd.DataFrame, signal_matrix: np.ndarray, minute_df: pd.DataFrame = None) -> list[TradeLedger]:
+        """
+        Сделки для каждого столбца матрицы сигналов (строки df × стратегии) на общих ценах.
+        Базовая реализация — simulate по столбцу; векторные симуляторы делают это одним проходом.
+        """
+        signal_matrix = np.asarray(signal_matrix)
+        return [
+            self.simulate(df, pd.Series(signal_matrix[:, j], index=df.index), minute_df=minute_df)
+            for j in range(signal_matrix.shape[1])
+        ]
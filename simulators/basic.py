@@ -1,42 +1,122 @@
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
 import pandas as pd
 from simulators.base import TradeSimulatorBase
 from core.logger import get_logger
+from kernels.backend import get_backend
+from simulators.batch import Segment, sweep, trades_by_strategy
+from simulators.ledger import TradeLedger
 
 log = get_logger(__name__)
 
 
 class BasicTradeSimulator(TradeSimulatorBase):
-    def __init__(self, commission_rate: float = 0.0004, slippage: float = 10):
+    def __init__(self, commission_rate: float = 0.0004, slippage: float = 10, vectorized: bool = True):
+        """
+        - vectorized: сделки из массивов (позиция = последний ненулевой сигнал с лагом в один бар);
+          False — построчный проход, эталон для сверки
+        """
         self.commission_rate = commission_rate
         self.slippage = slippage
-        self.trades = []
-
-    def simulate(self, hourly_df: pd.DataFrame, signals: pd.Series, minute_df: pd.DataFrame = None) -> pd.DataFrame:
-        self.trades = []
+        self.vectorized = vectorized
+        self.trades = TradeLedger()
 
+    def simulate(self, hourly_df: pd.DataFrame, signals: pd.Series, minute_df: pd.DataFrame = None) -> TradeLedger:
         if "contract_code" not in hourly_df.columns:
             log.warning("⚠️ contract_code отсутствует — симуляция будет выполнена без группировки.")
-            return self._simulate_one_contract(hourly_df, signals)
-
-        for contract_code, group_df in hourly_df.groupby("contract_code"):
+            self.trades = self._simulate_one_contract(hourly_df, signals)
+            return self.trades
+
+        if self.vectorized:
+            signal_values = np.asarray(signals, dtype=np.int8)
+            positions = hourly_df.groupby("contract_code", observed=True).indices
+            self.trades = TradeLedger.concat(
+                self._simulate_arrays(hourly_df.iloc[rows], signal_values[rows], contract_code, {})
+                for contract_code, rows in positions.items()
+            )
+            return self.trades
+
+        ledgers = []
+        for contract_code, group_df in hourly_df.groupby("contract_code", observed=True):
             group_df = group_df.copy()
             group_signals = signals.loc[group_df.index]
-
-            trades_df = self._simulate_one_contract(group_df, group_signals, contract_code)
-            self.trades.extend(trades_df.to_dict(orient="records"))
-
-        return pd.DataFrame(self.trades)
-
-    def _simulate_one_contract(self, hourly_df: pd.DataFrame, signals: pd.Series, contract_code: str = "UNKNOWN") -> pd.DataFrame:
-        trades = []
-        in_position = False
-        direction = 0
-        entry_price = 0
-        entry_time = None
-
-        for i in range(1, len(hourly_df)):
+            ledgers.append(self._simulate_one_contract(group_df, group_signals, contract_code))
+
+        self.trades = TradeLedger.concat(ledgers)
+        return self.trades
+
+    def simulate_batch(self, hourly_df: pd.DataFrame, signal_matrix: np.ndarray, minute_df: pd.DataFrame = None) -> list[TradeLedger]:
+        """Сделки для каждого столбца матрицы сигналов за один проход (участки — контракты, лаг в один бар)."""
+        signal_matrix = np.asarray(signal_matrix, dtype=np.int8)
+        if not self.vectorized:
+            return super().simulate_batch(hourly_df, signal_matrix, minute_df=minute_df)
+
+        if "contract_code" in hourly_df.columns:
+            positions = hourly_df.groupby("contract_code", observed=True).indices
+        else:
+            positions = {"UNKNOWN": np.arange(len(hourly_df))}
+        code_names = list(positions)
+        segments = []
+        for code, rows in enumerate(positions.values()):
+            # решение на баре i принимается по сигналу бара i - 1
+            signal_rows = np.concatenate([[-1], rows[:-1]])
+            segments.append(Segment(rows=rows, signal_rows=signal_rows, code=code))
+
+        return trades_by_strategy(
+            sweep(signal_matrix, segments),
+            signal_matrix.shape[1],
+            hourly_df["datetime"].reset_index(drop=True),
+            hourly_df["open"].to_numpy(dtype=float),
+            hourly_df["close"].to_numpy(dtype=float),
+            code_names,
+            self.commission_rate,
+            self.slippage,
+        )
+
+    def simulate_stream(self, frames: Iterable[pd.DataFrame]) -> Iterator[TradeLedger]:
+        """Потоковая симуляция: состояние позиции по каждому контракту переносится между кусками."""
+        states = {}
+        for df in frames:
+            if df.empty:
+                continue
+            if "contract_code" not in df.columns:
+                yield self._simulate_one_contract(df, df["signal"], state=states.setdefault("UNKNOWN", {}))
+                continue
+
+            yield TradeLedger.concat(
+                self._simulate_one_contract(group_df, group_df["signal"], contract_code, states.setdefault(contract_code, {}))
+                for contract_code, group_df in df.groupby("contract_code", observed=True)
+            )
+
+    def _simulate_one_contract(
+        self,
+        hourly_df: pd.DataFrame,
+        signals: pd.Series,
+        contract_code: str = "UNKNOWN",
+        state: Optional[dict] = None,
+    ) -> TradeLedger:
+        """
+        state — состояние с конца предыдущего куска того же контракта (для потоковой симуляции);
+        обновляется на месте.
+        """
+        state = {} if state is None else state
+        if self.vectorized:
+            return self._simulate_arrays(hourly_df, np.asarray(signals, dtype=np.int8), contract_code, state)
+
+        trades = TradeLedger()
+        in_position = state.get("in_position", False)
+        direction = state.get("direction", 0)
+        entry_price = state.get("entry_price", 0)
+        entry_time = state.get("entry_time")
+        prev_signal = state.get("prev_signal")
+
+        for i in range(len(hourly_df)):
             row = hourly_df.iloc[i]
-            signal = signals.iloc[i - 1]
+            # Решение на баре i принимается по сигналу бара i - 1
+            signal, prev_signal = prev_signal, signals.iloc[i]
+            if signal is None:
+                continue
 
             # --- Открытие позиции ---
             if not in_position and signal != 0:
@@ -44,33 +124,96 @@ class BasicTradeSimulator(TradeSimulatorBase):
 
             # --- Перезаход в другую сторону ---
             elif in_position and signal != 0 and signal != direction:
-                trades.append(self._close_trade(row, direction, entry_price, entry_time, contract_code, "signal_change"))
+                self._close_trade(trades, row, direction, entry_price, entry_time, contract_code, "signal_change")
                 in_position, direction, entry_price, entry_time = self._open_trade(signal, row)
 
-        return pd.DataFrame(trades)
+        state.update(
+            in_position=in_position,
+            direction=direction,
+            entry_price=entry_price,
+            entry_time=entry_time,
+            prev_signal=prev_signal,
+        )
+        return trades
+
+    def _simulate_arrays(
+        self,
+        hourly_df: pd.DataFrame,
+        signals: np.ndarray,
+        contract_code: str,
+        state: dict,
+    ) -> TradeLedger:
+        """
+        Векторная версия построчного прохода с тем же состоянием.
+
+        Ряд y = [направление из состояния, сигнал с прошлого куска, сигналы куска]:
+        позиция после бара i — последний ненулевой элемент y[0..i+1], до бара i — y[0..i].
+        Бары, где они различаются, — входы; каждый следующий вход закрывает предыдущую сделку
+        по open этого бара, последняя открытая позиция остаётся в состоянии.
+        """
+        n = len(signals)
+        if n == 0:
+            return TradeLedger()
+        direction0 = int(state.get("direction", 0)) if state.get("in_position", False) else 0
+        prev_signal = state.get("prev_signal")
+
+        y = np.empty(n + 2, dtype=np.int8)
+        y[0] = direction0
+        y[1] = 0 if prev_signal is None else prev_signal
+        y[2:] = signals
+        positions = get_backend().lagged_position(y, np.zeros(n + 2, dtype=np.int64))
+        before, after = positions[1:-1], positions[2:]
+        entries = np.flatnonzero(before != after)
+
+        opens = hourly_df["open"].to_numpy(dtype=float)
+        times = hourly_df["datetime"].reset_index(drop=True)
+        entry_prices = opens[entries]
+        entry_directions = after[entries]
+        entry_times = times.iloc[entries[:-1]]
+
+        if direction0 != 0:
+            trade_entry_price = np.concatenate([[float(state["entry_price"])], entry_prices[:-1]])
+            entry_times = pd.concat([pd.Series([state["entry_time"]], dtype=times.dtype), entry_times])
+            trade_direction = np.concatenate([[direction0], entry_directions[:-1]])
+            exits = entries
+        else:
+            trade_entry_price = entry_prices[:-1]
+            trade_direction = entry_directions[:-1]
+            exits = entries[1:]
+
+        if len(entries):
+            last = entries[-1]
+            state.update(entry_price=float(opens[last]), entry_time=times.iloc[last])
+        state.update(
+            in_position=bool(after[-1] != 0),
+            direction=int(after[-1]),
+            prev_signal=signals[-1],
+        )
+        if len(exits) == 0:
+            return TradeLedger()
+
+        trades = TradeLedger(capacity=len(exits))
+        exit_price = opens[exits]
+        trades.extend(
+            entry_times,
+            times.iloc[exits],
+            trade_direction,
+            trade_entry_price,
+            exit_price,
+            (np.abs(trade_entry_price) + np.abs(exit_price)) * self.commission_rate,
+            self.slippage * 2,
+            contract_code,
+            "signal_change",
+        )
+        return trades
 
     def _open_trade(self, signal, row):
-        return True, signal, row["open"], row["datetime"]
-
-    def _close_trade(self, row, direction, entry_price, entry_time, contract_code, exit_reason):
-        exit_price = row["open"]
-        exit_time = row["datetime"]
+        return True, signal, float(row["open"]), row["datetime"]
 
-        gross_pnl = (exit_price - entry_price) * direction
+    def _close_trade(self, trades: TradeLedger, row, direction, entry_price, entry_time, contract_code, exit_reason):
+        exit_price = float(row["open"])
         commission = (abs(entry_price) + abs(exit_price)) * self.commission_rate
-        slippage_cost = self.slippage * 2
-        net_pnl = gross_pnl - commission - slippage_cost
-
-        return {
-            "entry_time": entry_time,
-            "exit_time": exit_time,
-            "side": "long" if direction == 1 else "short",
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "pnl_raw": gross_pnl,
-            "commission": commission,
-            "slippage": slippage_cost,
-            "pnl_net": net_pnl,
-            "contract_code": contract_code,
-            "exit_reason": exit_reason
-        }
+        trades.append(
+            entry_time, row["datetime"], direction, entry_price, exit_price,
+            commission, self.slippage * 2, contract_code, exit_reason,
+        )
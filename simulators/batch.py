@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from kernels.backend import get_backend
+from simulators.ledger import TradeLedger
+
+# Предел ячеек (стратегии × строки) на один вызов ядра: большие сетки режутся по стратегиям
+SWEEP_CELLS = 1 << 24
+
+
+@dataclass
+class Segment:
+    """
+    Участок, на котором позиция держится непрерывно: контракт целиком или активный контракт между ролловерами.
+    - rows: строки, на которых принимаются решения (сделки — по open этих строк);
+    - signal_rows: строка, чей сигнал решает на каждой из rows (-1 — сигнала ещё нет);
+    - code: индекс кода контракта;
+    - close_row: строка, по close которой закрывается открытая к концу участка позиция (ролловер);
+      None — позиция остаётся открытой и в сделки не попадает.
+    """
+    rows: np.ndarray
+    signal_rows: np.ndarray
+    code: int
+    close_row: Optional[int] = None
+
+
+def sweep(signal_matrix: np.ndarray, segments: list[Segment]) -> dict[str, np.ndarray]:
+    """
+    Сделки всех стратегий (столбцов signal_matrix) за один вызов lagged_position на кусок сетки.
+
+    Каждая пара (стратегия, участок) — отдельный отрезок ядра [0, сигналы..., 0]: позиция до строки —
+    последний ненулевой сигнал до неё, после — с ней включительно; где они различаются — вход.
+    Следующий вход той же пары закрывает сделку по open, последний — по close_row участка, если он есть.
+    Колонки отсортированы по стратегии, внутри — по входу: strategy, entry_row, exit_row,
+    direction, exit_on_close, code.
+    """
+    signal_matrix = np.asarray(signal_matrix, dtype=np.int8)
+    if signal_matrix.ndim == 1:
+        signal_matrix = signal_matrix[:, None]
+    n_strategies = signal_matrix.shape[1]
+
+    segments = [seg for seg in segments if len(seg.rows)]
+    parts = []
+    if segments and n_strategies:
+        width = max(1, SWEEP_CELLS // (sum(len(seg.rows) + 2 for seg in segments)))
+        for first in range(0, n_strategies, width):
+            part = _sweep_part(signal_matrix[:, first:first + width], segments)
+            part["strategy"] += first
+            parts.append(part)
+
+    if not parts:
+        return {
+            "strategy": np.zeros(0, dtype=np.int64),
+            "entry_row": np.zeros(0, dtype=np.int64),
+            "exit_row": np.zeros(0, dtype=np.int64),
+            "direction": np.zeros(0, dtype=np.int8),
+            "exit_on_close": np.zeros(0, dtype=bool),
+            "code": np.zeros(0, dtype=np.int64),
+        }
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _sweep_part(signal_matrix: np.ndarray, segments: list[Segment]) -> dict[str, np.ndarray]:
+    n_strategies = signal_matrix.shape[1]
+    lengths = np.array([len(seg.rows) for seg in segments], dtype=np.int64)
+    rows = np.concatenate([seg.rows for seg in segments]).astype(np.int64)
+    signal_rows = np.concatenate([seg.signal_rows for seg in segments]).astype(np.int64)
+    seg_of = np.repeat(np.arange(len(segments)), lengths)
+    close_rows = np.array([-1 if seg.close_row is None else seg.close_row for seg in segments], dtype=np.int64)
+    seg_codes = np.array([seg.code for seg in segments], dtype=np.int64)
+
+    # раскладка строки стратегии: участок i занимает lengths[i] + 2 ячейки, крайние — нули
+    slots = np.arange(len(rows)) + 2 * seg_of + 1
+    block_len = lengths + 2
+    width = int(block_len.sum())
+    block_start = np.repeat(np.cumsum(block_len) - block_len, block_len)
+
+    padded = np.zeros((n_strategies, width), dtype=np.int8)
+    has_signal = signal_rows >= 0
+    padded[:, slots[has_signal]] = signal_matrix[signal_rows[has_signal]].T
+    seg_start = (np.arange(n_strategies, dtype=np.int64)[:, None] * width + block_start[None, :]).ravel()
+
+    positions = get_backend().lagged_position(padded.ravel(), seg_start).reshape(n_strategies, width)
+    before, after = positions[:, slots], positions[:, slots + 1]
+    strategy, k = np.nonzero(before != after)
+    direction = after[strategy, k]
+
+    block = strategy * len(segments) + seg_of[k]
+    next_same = np.zeros(len(k), dtype=bool)
+    next_same[:-1] = block[1:] == block[:-1]
+    next_k = np.empty_like(k)
+    next_k[:-1] = k[1:]
+    next_k[-1:] = k[-1:]
+    close_row = close_rows[seg_of[k]]
+
+    is_trade = next_same | (close_row >= 0)
+    return {
+        "strategy": strategy[is_trade].astype(np.int64),
+        "entry_row": rows[k][is_trade],
+        "exit_row": np.where(next_same, rows[next_k], close_row)[is_trade],
+        "direction": direction[is_trade],
+        "exit_on_close": ~next_same[is_trade],
+        "code": seg_codes[seg_of[k]][is_trade],
+    }
+
+
+def trades_by_strategy(
+    swept: dict[str, np.ndarray],
+    n_strategies: int,
+    times: pd.Series,
+    opens: np.ndarray,
+    closes: np.ndarray,
+    code_names: np.ndarray,
+    commission_rate: float,
+    slippage: float,
+) -> list[TradeLedger]:
+    """Журналы сделок по стратегиям из результата sweep: срезы одного общего журнала, без копий."""
+    entry_idx, exit_idx, direction = swept["entry_row"], swept["exit_row"], swept["direction"]
+    exit_on_close = swept["exit_on_close"]
+    entry_price = opens[entry_idx]
+    exit_price = np.where(exit_on_close, closes[exit_idx], opens[exit_idx])
+
+    ledger = TradeLedger(capacity=len(entry_idx), tz=getattr(times.dtype, "tz", None))
+    ledger.extend(
+        times.array[entry_idx],
+        times.array[exit_idx],
+        direction,
+        entry_price,
+        exit_price,
+        (np.abs(entry_price) + np.abs(exit_price)) * commission_rate,
+        slippage * 2,
+        np.asarray(code_names, dtype=object)[swept["code"]],
+        np.where(exit_on_close, "rollover", "signal_change"),
+    )
+
+    bounds = np.searchsorted(swept["strategy"], np.arange(n_strategies + 1), side="left")
+    return [ledger.slice(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:])]
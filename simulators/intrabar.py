@@ -0,0 +1,204 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from simulators.base import TradeSimulatorBase
+from simulators.ledger import TradeLedger
+from core.logger import get_logger
+
+log = get_logger(__name__)
+
+def _next_index(mask: np.ndarray) -> np.ndarray:
+    """Для каждой позиции i — первая позиция j >= i, где mask[j]; len(mask), если такой нет (с хвостовым элементом)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    out = np.empty(n + 1, dtype=np.int64)
+    out[:n] = np.minimum.accumulate(idx[::-1])[::-1]
+    out[n] = n
+    return out
+
+
+class _ContractPrices:
+    """
+    Цены одного контракта: часовые бары и минутки с индексом смещений.
+    Минуты бара i — строки [starts[i], starts[i + 1]) минуток (searchsorted по времени открытия баров),
+    так что окно позиции от бара e до бара r — один срез [starts[e], starts[r]) без фильтрации датафреймов.
+    """
+
+    def __init__(self, code: str, hourly_df: pd.DataFrame, minute_df: Optional[pd.DataFrame], atr_column: str):
+        self.code = code
+        self.times = hourly_df["datetime"].reset_index(drop=True)
+        self.opens = hourly_df["open"].to_numpy(dtype=float)
+        self.atr = hourly_df[atr_column].to_numpy(dtype=float)
+
+        # без минуток уровни проверяются по high/low самих часовых баров
+        bars = hourly_df
+        if minute_df is not None:
+            bars = minute_df.iloc[np.argsort(minute_df["datetime"].to_numpy(dtype="datetime64[ns]"), kind="stable")]
+        self.minute_times = bars["datetime"].reset_index(drop=True)
+        self.minute_open = bars["open"].to_numpy(dtype=float)
+        self.minute_high = bars["high"].to_numpy(dtype=float)
+        self.minute_low = bars["low"].to_numpy(dtype=float)
+
+        minute_ns = self.minute_times.to_numpy(dtype="datetime64[ns]").view("int64")
+        hourly_ns = self.times.to_numpy(dtype="datetime64[ns]").view("int64")
+        self.starts = np.append(np.searchsorted(minute_ns, hourly_ns, side="left"), len(minute_ns))
+
+
+class IntrabarTradeSimulator(TradeSimulatorBase):
+    def __init__(
+        self,
+        commission_rate: float = 0.0004,
+        slippage: float = 10,
+        stop_atr: Optional[float] = 2.0,
+        target_atr: Optional[float] = 3.0,
+        trailing_atr: Optional[float] = None,
+        atr_column: str = "atr",
+    ):
+        """
+        Входы и развороты — как в BasicTradeSimulator (решение на баре i по сигналу бара i - 1, по open),
+        но внутри позиции уровни проверяются по минутным high/low:
+        - stop_atr / target_atr: стоп и тейк на расстоянии k * ATR от цены входа (ATR бара сигнала);
+        - trailing_atr: трейлинг-стоп на k * ATR от лучшей цены, достигнутой до текущей минуты.
+        None отключает уровень. Если в одной минуте задеты и стоп, и тейк, считается стоп.
+        Исполнение — по уровню, при гэпе через уровень — по open минуты.
+        После выхода по уровню новый вход — не раньше следующего часового бара с ненулевым сигналом.
+        """
+        self.commission_rate = commission_rate
+        self.slippage = slippage
+        self.stop_atr = stop_atr
+        self.target_atr = target_atr
+        self.trailing_atr = trailing_atr
+        self.atr_column = atr_column
+
+    def simulate(self, hourly_df: pd.DataFrame, signals: pd.Series, minute_df: pd.DataFrame = None) -> TradeLedger:
+        return self.simulate_batch(hourly_df, np.asarray(signals, dtype=np.int8)[:, None], minute_df=minute_df)[0]
+
+    def simulate_batch(self, hourly_df: pd.DataFrame, signal_matrix: np.ndarray, minute_df: pd.DataFrame = None) -> list[TradeLedger]:
+        """Индекс смещений минуток строится один раз на все столбцы матрицы сигналов."""
+        signal_matrix = np.asarray(signal_matrix, dtype=np.int8)
+        if self.atr_column not in hourly_df.columns:
+            raise ValueError(f"В часовых свечах нет колонки {self.atr_column!r} — нужен анализатор с ATR")
+
+        if "contract_code" in hourly_df.columns:
+            positions = hourly_df.groupby("contract_code", observed=True).indices
+        else:
+            log.warning("⚠️ contract_code отсутствует — симуляция будет выполнена без группировки.")
+            positions = {"UNKNOWN": np.arange(len(hourly_df))}
+
+        minute_positions = None
+        if minute_df is not None and "contract_code" in minute_df.columns:
+            minute_positions = minute_df.groupby("contract_code", observed=True).indices
+
+        contracts = []
+        for code, rows in positions.items():
+            minutes = minute_df
+            if minute_positions is not None:
+                minutes = minute_df.iloc[minute_positions.get(code, np.zeros(0, dtype=np.int64))]
+            contracts.append((rows, _ContractPrices(code, hourly_df.iloc[rows], minutes, self.atr_column)))
+
+        results = []
+        for j in range(signal_matrix.shape[1]):
+            results.append(TradeLedger.concat(
+                self._simulate_contract(prices, signal_matrix[rows, j]) for rows, prices in contracts
+            ))
+        return results
+
+    def _simulate_contract(self, prices: _ContractPrices, signals: np.ndarray) -> TradeLedger:
+        """
+        Проход по сделкам, а не по барам: вход — следующий бар с ненулевым сигналом, разворот — следующий
+        бар с противоположным; между ними минутное окно проверяется на уровни одним векторным сканом.
+        """
+        trades = TradeLedger()
+        n = len(signals)
+        if n == 0:
+            return trades
+        # сигнал, по которому принимается решение на баре i
+        decision = np.zeros(n, dtype=np.int8)
+        decision[1:] = signals[:-1]
+        next_entry = _next_index(decision != 0)
+        next_reversal = {1: _next_index(decision == -1), -1: _next_index(decision == 1)}
+
+        i = 0
+        while True:
+            entry = int(next_entry[i])
+            if entry >= n:
+                break
+            direction = int(decision[entry])
+            entry_price = float(prices.opens[entry])
+            reversal = int(next_reversal[direction][entry + 1])
+
+            lo, hi = prices.starts[entry], prices.starts[reversal]
+            hit = self._first_exit(direction, entry_price, prices.atr[entry - 1], prices, lo, hi)
+            if hit is not None:
+                minute, exit_price, reason = hit
+                self._close_trade(trades, prices, entry, direction, entry_price, prices.minute_times.iloc[minute], exit_price, reason)
+                # перезаход — не раньше бара, следующего за баром выхода
+                i = int(np.searchsorted(prices.starts, minute, side="right"))
+                if i >= n:
+                    break
+                continue
+
+            if reversal >= n:
+                break  # открытая позиция остаётся, как и в BasicTradeSimulator
+            exit_price = float(prices.opens[reversal])
+            self._close_trade(trades, prices, entry, direction, entry_price, prices.times.iloc[reversal], exit_price, "signal_change")
+            i = reversal
+
+        return trades
+
+    def _first_exit(self, direction: int, entry_price: float, atr: float, prices: _ContractPrices, lo: int, hi: int):
+        """
+        Первая минута окна [lo, hi), где задет уровень: (строка минутки, цена исполнения, причина) или None.
+        Цены шорта зеркалятся (умножаются на direction), так что условия пишутся один раз — как для лонга.
+        """
+        levels = (self.stop_atr, self.target_atr, self.trailing_atr)
+        if hi <= lo or np.isnan(atr) or all(level is None for level in levels):
+            return None
+
+        if direction == 1:
+            favorable, adverse = prices.minute_high[lo:hi], prices.minute_low[lo:hi]
+        else:
+            favorable, adverse = -prices.minute_low[lo:hi], -prices.minute_high[lo:hi]
+        opens = prices.minute_open[lo:hi] * direction
+        entry = entry_price * direction
+
+        fixed_stop = entry - self.stop_atr * atr if self.stop_atr is not None else -np.inf
+        stop = np.full(hi - lo, fixed_stop)
+        if self.trailing_atr is not None:
+            # лучшая цена до текущей минуты: внутри минуты порядок high/low неизвестен
+            peak = np.maximum.accumulate(np.concatenate([[entry], favorable[:-1]]))
+            stop = np.maximum(stop, peak - self.trailing_atr * atr)
+        target = entry + self.target_atr * atr if self.target_atr is not None else np.inf
+
+        stop_hit = adverse <= stop
+        hits = stop_hit | (favorable >= target)
+        if not hits.any():
+            return None
+
+        k = int(np.argmax(hits))
+        if stop_hit[k]:
+            price = min(opens[k], stop[k])
+            reason = "trailing_stop" if stop[k] > fixed_stop else "stop_loss"
+        else:
+            price = max(opens[k], target)
+            reason = "take_profit"
+        return lo + k, float(price * direction), reason
+
+    def _close_trade(
+        self,
+        trades: TradeLedger,
+        prices: _ContractPrices,
+        entry: int,
+        direction: int,
+        entry_price: float,
+        exit_time,
+        exit_price: float,
+        exit_reason: str,
+    ) -> None:
+        commission = (abs(entry_price) + abs(exit_price)) * self.commission_rate
+        trades.append(
+            prices.times.iloc[entry], exit_time, direction, entry_price, exit_price,
+            commission, self.slippage * 2, prices.code, exit_reason,
+        )
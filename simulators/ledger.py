@@ -0,0 +1,280 @@
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = (
+    "entry_time", "exit_time", "side", "entry_price", "exit_price", "pnl_raw",
+    "commission", "slippage", "pnl_net", "contract_code", "exit_reason", "point_value",
+)
+
+# Колонки-массивы и их типы; side хранится направлением (+1/-1), коды контракта и причины — индексами в справочниках
+_ARRAYS = {
+    "entry_time": np.int64,
+    "exit_time": np.int64,
+    "direction": np.int8,
+    "entry_price": np.float64,
+    "exit_price": np.float64,
+    "pnl_raw": np.float64,
+    "commission": np.float64,
+    "slippage": np.float64,
+    "pnl_net": np.float64,
+    "contract_id": np.int32,
+    "reason_id": np.int8,
+    "point_value": np.float64,
+}
+
+
+def _to_ns(values) -> np.ndarray:
+    """Время (Timestamp, Series, DatetimeArray, массив datetime64) -> int64 наносекунд UTC."""
+    if isinstance(values, pd.Timestamp):
+        return np.array([values.value], dtype=np.int64)
+    return np.asarray(pd.Series(values).to_numpy(dtype="datetime64[ns]")).view(np.int64)
+
+
+def _tz_of(values):
+    if isinstance(values, pd.Timestamp):
+        return values.tz
+    return getattr(pd.Series(values).dtype, "tz", None)
+
+
+class TradeLedger:
+    """
+    Журнал сделок по колонкам: предвыделенные массивы NumPy, растущие удвоением.
+
+    Время — int64 наносекунд UTC (плюс часовой пояс журнала), сторона — направление,
+    контракт и причина выхода — индексы в справочниках. point_value — стоимость пункта всей позиции
+    (контракты × лот × шаг цены): pnl_raw = (exit - entry) * direction * point_value; 1 — PnL в пунктах. to_frame() отдаёт обычную таблицу
+    сделок (числовые колонки — представления массивов без копии); ledger["pnl_net"] — сам массив,
+    так что метрики и отчёты работают с журналом напрямую. При pickle уходят только заполненные строки.
+    """
+
+    columns = COLUMNS
+
+    def __init__(self, capacity: int = 64, tz=None):
+        self._size = 0
+        self._arrays = {name: np.empty(max(capacity, 1), dtype=dtype) for name, dtype in _ARRAYS.items()}
+        self.tz = tz
+        self.contracts: list[str] = []
+        self.reasons: list[str] = []
+        self._contract_ids: dict[str, int] = {}
+        self._reason_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = len(self._arrays["pnl_net"])
+        if needed <= capacity:
+            return
+        # пустой журнал после slice/copy/распаковки хранит массивы нулевой длины — удвоение от нуля не растёт
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        for name, values in self._arrays.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._arrays[name] = grown
+
+    def _intern(self, value, table: list, ids: dict) -> int:
+        value = str(value)
+        if value not in ids:
+            ids[value] = len(table)
+            table.append(value)
+        return ids[value]
+
+    def _intern_many(self, values, table: list, ids: dict, n: int) -> np.ndarray:
+        if np.ndim(values) == 0:
+            return np.full(n, self._intern(values, table, ids))
+        uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        mapping = np.array([self._intern(value, table, ids) for value in uniques], dtype=np.int64)
+        return mapping[inverse]
+
+    def append(
+        self,
+        entry_time,
+        exit_time,
+        direction: int,
+        entry_price: float,
+        exit_price: float,
+        commission: float,
+        slippage: float,
+        contract_code: str,
+        exit_reason: str,
+        point_value: float = 1.0,
+    ) -> None:
+        """Одна сделка; pnl_raw и pnl_net считаются здесь же (издержки — уже в деньгах позиции)."""
+        if self.tz is None:
+            self.tz = _tz_of(entry_time)
+        self._reserve(1)
+        i = self._size
+        gross_pnl = (exit_price - entry_price) * direction * point_value
+        a = self._arrays
+        a["entry_time"][i] = pd.Timestamp(entry_time).value
+        a["exit_time"][i] = pd.Timestamp(exit_time).value
+        a["direction"][i] = direction
+        a["entry_price"][i] = entry_price
+        a["exit_price"][i] = exit_price
+        a["pnl_raw"][i] = gross_pnl
+        a["commission"][i] = commission
+        a["slippage"][i] = slippage
+        a["pnl_net"][i] = gross_pnl - commission - slippage
+        a["contract_id"][i] = self._intern(contract_code, self.contracts, self._contract_ids)
+        a["reason_id"][i] = self._intern(exit_reason, self.reasons, self._reason_ids)
+        a["point_value"][i] = point_value
+        self._size += 1
+
+    def extend(
+        self,
+        entry_time,
+        exit_time,
+        direction: np.ndarray,
+        entry_price: np.ndarray,
+        exit_price: np.ndarray,
+        commission: np.ndarray,
+        slippage,
+        contract_code,
+        exit_reason,
+        point_value=1.0,
+    ) -> None:
+        """Пачка сделок из массивов; contract_code и exit_reason — массивы или одно значение на всю пачку."""
+        direction = np.asarray(direction)
+        n = len(direction)
+        if n == 0:
+            return
+        if self.tz is None:
+            self.tz = _tz_of(entry_time)
+        self._reserve(n)
+        lo, hi = self._size, self._size + n
+        gross_pnl = (np.asarray(exit_price, dtype=float) - entry_price) * direction * point_value
+        a = self._arrays
+        a["entry_time"][lo:hi] = _to_ns(entry_time)
+        a["exit_time"][lo:hi] = _to_ns(exit_time)
+        a["direction"][lo:hi] = direction
+        a["entry_price"][lo:hi] = entry_price
+        a["exit_price"][lo:hi] = exit_price
+        a["pnl_raw"][lo:hi] = gross_pnl
+        a["commission"][lo:hi] = commission
+        a["slippage"][lo:hi] = slippage
+        a["pnl_net"][lo:hi] = gross_pnl - commission - slippage
+        a["contract_id"][lo:hi] = self._intern_many(contract_code, self.contracts, self._contract_ids, n)
+        a["reason_id"][lo:hi] = self._intern_many(exit_reason, self.reasons, self._reason_ids, n)
+        a["point_value"][lo:hi] = point_value
+        self._size = hi
+
+    def array(self, name: str) -> np.ndarray:
+        """Заполненная часть внутреннего массива (представление, без копии)."""
+        return self._arrays[name][:self._size]
+
+    def _times(self, name: str) -> pd.Series:
+        times = pd.Series(self.array(name).view("datetime64[ns]"), copy=False)
+        return times.dt.tz_localize("UTC").dt.tz_convert(self.tz) if self.tz is not None else times
+
+    def __getitem__(self, name: str):
+        if name in ("entry_time", "exit_time"):
+            return self._times(name)
+        if name == "side":
+            return np.where(self.array("direction") == 1, "long", "short").astype(object)
+        if name == "contract_code":
+            return np.asarray(self.contracts, dtype=object)[self.array("contract_id")]
+        if name == "exit_reason":
+            return np.asarray(self.reasons, dtype=object)[self.array("reason_id")]
+        return self.array(name)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Таблица сделок в привычной раскладке. Числовые колонки — представления массивов журнала;
+        side, contract_code и exit_reason — категории поверх кодов. Пустой журнал -> pd.DataFrame().
+        """
+        if self.empty:
+            return pd.DataFrame()
+        columns = {}
+        for name in COLUMNS:
+            if name in ("entry_time", "exit_time"):
+                columns[name] = self._times(name).array
+            elif name == "side":
+                codes = (self.array("direction") != 1).astype(np.int8)
+                columns[name] = pd.Categorical.from_codes(codes, ["long", "short"])
+            elif name == "contract_code":
+                columns[name] = pd.Categorical.from_codes(self.array("contract_id"), self.contracts)
+            elif name == "exit_reason":
+                columns[name] = pd.Categorical.from_codes(self.array("reason_id"), self.reasons)
+            else:
+                columns[name] = self.array(name)
+        return pd.DataFrame(columns, copy=False)
+
+    def slice(self, lo: int, hi: int) -> "TradeLedger":
+        """Строки [lo, hi) как отдельный журнал; массивы — представления этого журнала."""
+        part = TradeLedger.__new__(TradeLedger)
+        part._size = max(0, min(hi, self._size) - lo)
+        part._arrays = {name: values[lo:lo + part._size] for name, values in self._arrays.items()}
+        part.tz = self.tz
+        part.contracts, part.reasons = list(self.contracts), list(self.reasons)
+        part._contract_ids, part._reason_ids = dict(self._contract_ids), dict(self._reason_ids)
+        return part
+
+    def copy(self) -> "TradeLedger":
+        part = self.slice(0, self._size)
+        part._arrays = {name: values.copy() for name, values in part._arrays.items()}
+        return part
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state["_arrays"] = {name: values[:self._size] for name, values in self._arrays.items()}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+
+    @classmethod
+    def concat(cls, ledgers: Iterable["TradeLedger"]) -> "TradeLedger":
+        ledgers = [ledger for ledger in ledgers if not ledger.empty]
+        out = cls(capacity=sum(len(ledger) for ledger in ledgers), tz=ledgers[0].tz if ledgers else None)
+        for ledger in ledgers:
+            lo, hi = out._size, out._size + len(ledger)
+            for name in ("entry_time", "exit_time", "direction", "entry_price", "exit_price",
+                         "pnl_raw", "commission", "slippage", "pnl_net", "point_value"):
+                out._arrays[name][lo:hi] = ledger.array(name)
+            contract_map = np.array([out._intern(c, out.contracts, out._contract_ids) for c in ledger.contracts], dtype=np.int64)
+            reason_map = np.array([out._intern(r, out.reasons, out._reason_ids) for r in ledger.reasons], dtype=np.int64)
+            out._arrays["contract_id"][lo:hi] = contract_map[ledger.array("contract_id")]
+            out._arrays["reason_id"][lo:hi] = reason_map[ledger.array("reason_id")]
+            out._size = hi
+        return out
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TradeLedger":
+        """Журнал из таблицы сделок (обратное к to_frame)."""
+        ledger = cls(capacity=len(df))
+        if df.empty:
+            return ledger
+        ledger.extend(
+            df["entry_time"],
+            df["exit_time"],
+            np.where(df["side"].to_numpy() == "long", 1, -1).astype(np.int8),
+            df["entry_price"].to_numpy(dtype=float),
+            df["exit_price"].to_numpy(dtype=float),
+            df["commission"].to_numpy(dtype=float),
+            df["slippage"].to_numpy(dtype=float),
+            df["contract_code"].to_numpy(),
+            df["exit_reason"].to_numpy(),
+            df["point_value"].to_numpy(dtype=float) if "point_value" in df.columns else 1.0,
+        )
+        return ledger
+
+
+def as_ledger(trades: Union[TradeLedger, pd.DataFrame, None]) -> TradeLedger:
+    if trades is None:
+        return TradeLedger()
+    return trades if isinstance(trades, TradeLedger) else TradeLedger.from_frame(trades)
+
+
+def as_frame(trades: Union[TradeLedger, pd.DataFrame, None]) -> pd.DataFrame:
+    if trades is None:
+        return pd.DataFrame()
+    return trades.to_frame() if isinstance(trades, TradeLedger) else trades
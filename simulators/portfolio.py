@@ -0,0 +1,268 @@
+import heapq
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core.catalogs.futures_catalog import ARCHIVE_FUTURES
+from core.logger import get_logger
+from simulators.base import TradeSimulatorBase
+from simulators.intrabar import _next_index
+from simulators.ledger import TradeLedger
+
+log = get_logger(__name__)
+
+# Порядок обработки событий одного момента: сначала закрытия по open, потом входы — освободившийся слот
+# доступен сразу; закрытие по экспирации идёт по close последнего бара, то есть после входов этого момента
+_CLOSE, _ENTRY, _EXPIRE = 0, 1, 2
+
+
+def specs_by_figi(catalog: dict = ARCHIVE_FUTURES) -> dict[str, dict]:
+    """Спецификации каталога по FIGI: в свечах contract_code — это FIGI."""
+    return {spec["figi"]: spec for spec in catalog.values()}
+
+
+class _Instrument:
+    """Бары одного инструмента, решения по ним и текущая позиция."""
+
+    def __init__(self, code: str, order: int, bars: pd.DataFrame, signals: np.ndarray, spec: dict):
+        self.code = code
+        self.order = order
+        self.times = bars["datetime"].reset_index(drop=True)
+        self.time_ns = self.times.to_numpy(dtype="datetime64[ns]").view("int64")
+        self.opens = bars["open"].to_numpy(dtype=float)
+        self.closes = bars["close"].to_numpy(dtype=float)
+        # стоимость пункта одного контракта
+        self.unit_value = float(spec["step_price"]) * float(spec["lot"])
+
+        # решение на баре i принимается по сигналу бара i - 1, как в BasicTradeSimulator
+        self.decision = np.zeros(len(signals), dtype=np.int8)
+        self.decision[1:] = signals[:-1]
+        self.next_entry = _next_index(self.decision != 0)
+        self.next_reversal = {1: _next_index(self.decision == -1), -1: _next_index(self.decision == 1)}
+        # бары контракта кончаются раньше общих данных — позиция по нему закрывается на последнем баре
+        self.expires = False
+
+        self.direction = 0
+        self.quantity = 0
+        self.entry_row = -1
+        # удержание позиций для кривой капитала: (строка входа, строка выхода или len, направление × стоимость пункта, цена входа)
+        self.holdings: list[tuple[int, int, float, float]] = []
+
+
+class PortfolioSimulator(TradeSimulatorBase):
+    portfolio_aware = True
+
+    def __init__(
+        self,
+        initial_capital: float = 1_000_000,
+        position_fraction: float = 0.1,
+        max_positions: Optional[int] = None,
+        max_contracts: Optional[int] = None,
+        commission_rate: float = 0.0004,
+        slippage: float = 10,
+        specs: Optional[dict[str, dict]] = None,
+    ):
+        """
+        Портфель инструментов с общим капиталом за один проход по объединённой шкале времени.
+
+        - Правила входа/разворота по каждому инструменту — как в BasicTradeSimulator.
+        - Размер позиции: position_fraction закрытого капитала (начальный + реализованный PnL)
+          на номинал price × lot × step_price; не больше max_contracts; если не набирается и одного
+          контракта — вход пропускается.
+        - max_positions — предел одновременно открытых инструментов; пропущенный вход повторяется
+          на следующем баре с ненулевым сигналом.
+        - specs: {FIGI: {"step_price", "lot"}}; по умолчанию — ARCHIVE_FUTURES.
+        - Позиция по контракту, бары которого кончились раньше общих данных, закрывается по close
+          его последнего бара (exit_reason="contract_end") и освобождает слот и капитал; открытая
+          к концу данных позиция остаётся открытой, как в BasicTradeSimulator.
+        PnL, комиссия и проскальзывание (slippage пунктов на сторону) — в рублях.
+        Кривая капитала (с переоценкой открытых позиций по close) после simulate — в self.equity,
+        после simulate_batch — в self.equity_curves по столбцам матрицы сигналов.
+        """
+        self.initial_capital = initial_capital
+        self.position_fraction = position_fraction
+        self.max_positions = max_positions
+        self.max_contracts = max_contracts
+        self.commission_rate = commission_rate
+        self.slippage = slippage
+        self.specs = specs if specs is not None else specs_by_figi()
+        self.trades = TradeLedger()
+        self.equity = pd.DataFrame()
+        self.equity_curves: list[pd.DataFrame] = []
+
+    def _spec(self, code: str) -> dict:
+        spec = self.specs.get(code)
+        if spec is None:
+            log.warning(f"⚠️ Нет спецификации для {code} — PnL в пунктах (lot=1, step_price=1)")
+            return {"step_price": 1.0, "lot": 1}
+        return spec
+
+    def simulate(self, hourly_df: pd.DataFrame, signals: pd.Series, minute_df: pd.DataFrame = None) -> TradeLedger:
+        self.trades = TradeLedger()
+        self.equity = pd.DataFrame()
+        if hourly_df.empty:
+            return self.trades
+        if "contract_code" not in hourly_df.columns:
+            raise ValueError("Для портфеля нужна колонка contract_code")
+
+        signal_values = np.asarray(signals, dtype=np.int8)
+        instruments = []
+        for order, (code, rows) in enumerate(hourly_df.groupby("contract_code", observed=True).indices.items()):
+            bars = hourly_df.iloc[rows]
+            by_time = np.argsort(bars["datetime"].to_numpy(dtype="datetime64[ns]"), kind="stable")
+            instruments.append(_Instrument(code, order, bars.iloc[by_time], signal_values[rows][by_time], self._spec(code)))
+
+        last_ns = max(inst.time_ns[-1] for inst in instruments)
+        for inst in instruments:
+            inst.expires = inst.time_ns[-1] < last_ns
+
+        self._run_events(instruments)
+        self.equity = self._equity_curve(instruments)
+        return self.trades
+
+    def simulate_batch(self, hourly_df: pd.DataFrame, signal_matrix: np.ndarray, minute_df: pd.DataFrame = None) -> list[TradeLedger]:
+        """Столбцы — отдельными проходами (капитал у каждой стратегии свой); кривые капитала — в self.equity_curves."""
+        signal_matrix = np.asarray(signal_matrix, dtype=np.int8)
+        ledgers, curves = [], []
+        for j in range(signal_matrix.shape[1]):
+            ledgers.append(self.simulate(hourly_df, signal_matrix[:, j], minute_df=minute_df))
+            curves.append(self.equity)
+        self.equity_curves = curves
+        return ledgers
+
+    def _run_events(self, instruments: list[_Instrument]) -> None:
+        """
+        Слияние событий всех инструментов кучей по (время, закрытие/вход, инструмент).
+        В куче у каждого инструмента одно ближайшее событие: при позиции — следующий противоположный
+        сигнал (или экспирация, если его не будет), без позиции — следующий ненулевой; обрабатываются
+        только они, а не все бары.
+        """
+        heap = []
+
+        def push_next(inst: _Instrument, row: int) -> None:
+            n = len(inst.decision)
+            if inst.direction == 0:
+                nxt, phase = int(inst.next_entry[row]), _ENTRY
+            else:
+                nxt, phase = int(inst.next_reversal[inst.direction][row]), _CLOSE
+            if nxt < n:
+                heapq.heappush(heap, (int(inst.time_ns[nxt]), phase, inst.order, nxt))
+            elif inst.direction != 0 and inst.expires:
+                heapq.heappush(heap, (int(inst.time_ns[n - 1]), _EXPIRE, inst.order, n - 1))
+
+        for inst in instruments:
+            push_next(inst, 0)
+
+        realized = 0.0
+        open_positions = 0
+        skipped = 0
+        while heap:
+            _, phase, order, row = heapq.heappop(heap)
+            inst = instruments[order]
+
+            if phase == _EXPIRE:
+                realized += self._close(inst, row, float(inst.closes[row]), "contract_end")
+                open_positions -= 1
+                continue
+
+            if phase == _CLOSE:
+                realized += self._close(inst, row, float(inst.opens[row]), "signal_change")
+                open_positions -= 1
+                # разворот: вход в новую сторону на том же баре — после всех закрытий этого момента
+                heapq.heappush(heap, (int(inst.time_ns[row]), _ENTRY, inst.order, row))
+                continue
+
+            if self.max_positions is None or open_positions < self.max_positions:
+                if self._open(inst, row, self.initial_capital + realized):
+                    open_positions += 1
+                    push_next(inst, row + 1)
+                    continue
+            skipped += 1
+            push_next(inst, row + 1)
+
+        if skipped:
+            log.info(f"📉 Пропущено входов из-за лимитов капитала/позиций: {skipped}")
+
+    def _open(self, inst: _Instrument, row: int, capital: float) -> bool:
+        price = inst.opens[row]
+        notional = abs(price) * inst.unit_value
+        quantity = int(capital * self.position_fraction // notional) if notional > 0 else 0
+        if self.max_contracts is not None:
+            quantity = min(quantity, self.max_contracts)
+        if quantity < 1:
+            return False
+        inst.direction = int(inst.decision[row])
+        inst.quantity = quantity
+        inst.entry_row = row
+        return True
+
+    def _close(self, inst: _Instrument, row: int, exit_price: float, exit_reason: str) -> float:
+        """Закрытие позиции на строке row; на самой строке она уже не переоценивается — PnL реализован."""
+        entry_price = float(inst.opens[inst.entry_row])
+        point_value = inst.quantity * inst.unit_value
+        commission = (abs(entry_price) + abs(exit_price)) * self.commission_rate * point_value
+        slippage_cost = self.slippage * 2 * point_value
+        self.trades.append(
+            inst.times.iloc[inst.entry_row], inst.times.iloc[row], inst.direction, entry_price, exit_price,
+            commission, slippage_cost, inst.code, exit_reason, point_value=point_value,
+        )
+        inst.holdings.append((inst.entry_row, row, inst.direction * point_value, entry_price))
+        inst.direction, inst.quantity, inst.entry_row = 0, 0, -1
+        return float(self.trades.array("pnl_net")[-1])
+
+    def _equity_curve(self, instruments: list[_Instrument]) -> pd.DataFrame:
+        """
+        Капитал на объединённой шкале времени: начальный + реализованный PnL + переоценка открытых
+        позиций по close. Значения инструмента между его барами переносятся вперёд (searchsorted),
+        так что работа линейна по числу инструментов.
+        """
+        union_ns = np.unique(np.concatenate([inst.time_ns for inst in instruments]))
+        unrealized = np.zeros(len(union_ns))
+        open_count = np.zeros(len(union_ns), dtype=np.int64)
+
+        for inst in instruments:
+            n = len(inst.decision)
+            holdings = list(inst.holdings)
+            if inst.direction != 0:
+                holdings.append((inst.entry_row, n, inst.direction * inst.quantity * inst.unit_value,
+                                 float(inst.opens[inst.entry_row])))
+            if not holdings:
+                continue
+            # на строках [вход, выход) позиция переоценивается по close; на строке выхода она уже закрыта по open
+            value_per_point = np.zeros(n + 1)
+            entry_price = np.zeros(n + 1)
+            held = np.zeros(n + 1, dtype=np.int64)
+            for start, stop, value, price in holdings:
+                value_per_point[start] += value
+                value_per_point[stop] -= value
+                entry_price[start] += price
+                entry_price[stop] -= price
+                held[start] += 1
+                held[stop] -= 1
+            value_per_point = np.cumsum(value_per_point)[:n]
+            entry_price = np.cumsum(entry_price)[:n]
+            held = np.cumsum(held)[:n]
+            marks = np.where(held > 0, (inst.closes - entry_price) * value_per_point, 0.0)
+
+            pos = np.searchsorted(inst.time_ns, union_ns, side="right") - 1
+            known = pos >= 0
+            unrealized[known] += marks[pos[known]]
+            open_count[known] += held[pos[known]]
+
+        exit_ns = self.trades.array("exit_time")
+        by_exit = np.argsort(exit_ns, kind="stable")
+        realized_cum = np.concatenate([[0.0], np.cumsum(self.trades.array("pnl_net")[by_exit])])
+        realized = realized_cum[np.searchsorted(exit_ns[by_exit], union_ns, side="right")]
+
+        times = pd.Series(union_ns.view("datetime64[ns]"))
+        tz = getattr(instruments[0].times.dtype, "tz", None)
+        if tz is not None:
+            times = times.dt.tz_localize("UTC").dt.tz_convert(tz)
+        return pd.DataFrame({
+            "datetime": times,
+            "realized": realized,
+            "unrealized": unrealized,
+            "equity": self.initial_capital + realized + unrealized,
+            "open_positions": open_count,
+        })
@@ -1,7 +1,14 @@
+from pathlib import Path
+from typing import Union
+
+import numpy as np
 import pandas as pd
 from simulators.base import TradeSimulatorBase
 from core.logger import get_logger
 from datetime import timedelta
+from simulators.batch import Segment, sweep, trades_by_strategy
+from simulators.ledger import TradeLedger
+from providers.rollover_calendar import rollover_switch_times
 
 log = get_logger(__name__)
 
@@ -9,23 +16,127 @@ log = get_logger(__name__)
 class RolloverTradeSimulator(TradeSimulatorBase):
     rollover_aware = True
 
-    def __init__(self, commission_rate: float = 0.0004, slippage: float = 10):
+    def __init__(
+        self,
+        commission_rate: float = 0.0004,
+        slippage: float = 10,
+        calendar: Union[pd.DataFrame, Path, None] = None,
+        vectorized: bool = True,
+    ):
+        """
+        - calendar: календарь ролловеров (см. providers.rollover_calendar) или путь к нему.
+          Для контрактов, которых в нём нет, действует правило "последняя свеча минус 24 часа".
+        - vectorized: движок на массивах; False — построчный проход, эталон для сверки
+        """
         self.commission_rate = commission_rate
         self.slippage = slippage
-        self.trades = []
-
-    def simulate(self, hourly_df: pd.DataFrame, signals: pd.Series, minute_df: pd.DataFrame = None) -> pd.DataFrame:
-        self.trades = []
+        self.calendar = calendar
+        self.vectorized = vectorized
+        self.trades = TradeLedger()
+        self._switch_times: dict[object, dict[str, pd.Timestamp]] = {}
+
+    def _rollover_ready(self, df: pd.DataFrame) -> dict[str, pd.Timestamp]:
+        tz = df["datetime"].dt.tz
+        if tz not in self._switch_times:
+            self._switch_times[tz] = rollover_switch_times(self.calendar, tz)
+        ready = dict(self._switch_times[tz])
+
+        missing = set(df["contract_code"].unique()) - ready.keys()
+        if missing:
+            fallback = df[df["contract_code"].isin(missing)].groupby("contract_code", observed=True)["datetime"].max()
+            ready.update((code, ts - timedelta(hours=24)) for code, ts in fallback.items())
+        return ready
+
+    def simulate(self, hourly_df: pd.DataFrame, signals: pd.Series, minute_df: pd.DataFrame = None) -> TradeLedger:
+        if self.vectorized:
+            return self.simulate_batch(hourly_df, np.asarray(signals, dtype=np.int8)[:, None])[0]
+        return self._simulate_rows(hourly_df, signals)
+
+    def simulate_batch(self, hourly_df: pd.DataFrame, signal_matrix: np.ndarray, minute_df: pd.DataFrame = None) -> list[TradeLedger]:
+        """
+        Сделки для каждого столбца матрицы сигналов за один проход: участки активного контракта
+        от сигналов не зависят и считаются один раз на все стратегии.
+        """
+        signal_matrix = np.asarray(signal_matrix, dtype=np.int8)
+        if not self.vectorized:
+            return super().simulate_batch(hourly_df, signal_matrix, minute_df=minute_df)
+        n_strategies = signal_matrix.shape[1]
+        if len(hourly_df) == 0:
+            return [TradeLedger() for _ in range(n_strategies)]
+
+        order = np.argsort(hourly_df["datetime"].to_numpy(), kind="stable")
+        times = hourly_df["datetime"].iloc[order].reset_index(drop=True)
+        codes, code_names = pd.factorize(hourly_df["contract_code"].to_numpy()[order])
+        segments = self._active_segments(times, codes, code_names, self._rollover_ready(hourly_df))
+
+        swept = sweep(signal_matrix[order], segments)
+        return trades_by_strategy(
+            swept,
+            n_strategies,
+            times,
+            hourly_df["open"].to_numpy(dtype=float)[order],
+            hourly_df["close"].to_numpy(dtype=float)[order],
+            code_names,
+            self.commission_rate,
+            self.slippage,
+        )
+
+    @staticmethod
+    def _active_segments(times: pd.Series, codes: np.ndarray, code_names, ready: dict) -> list[Segment]:
+        """
+        Участки активного контракта — тот же автомат, что и в _simulate_rows, но по участкам, а не по строкам.
+
+        Для активного контракта c, ставшего активным на строке p:
+        - ролловер разрешается с первой строки j (> p после перехода), где datetime >= ready[c] — searchsorted;
+        - переход происходит на первой строке k >= j любого ещё не виденного контракта — searchsorted
+          по заранее посчитанным позициям строк каждого контракта;
+        - сигналы исполняются на строках c в (p, k) (строка перехода не оценивается), позиция — последний
+          ненулевой сигнал; каждый следующий вход закрывает предыдущую сделку по open;
+        - открытая к k позиция закрывается по close последней строки c до k с причиной rollover.
+        """
+        n = len(codes)
+        times = times.to_numpy(dtype="datetime64[ns]").view("int64")
+        ready_ns = np.array([pd.Timestamp(ready[name]).value for name in code_names], dtype=np.int64)
+        rows_of = [np.flatnonzero(codes == c) for c in range(len(code_names))]
+
+        segments = []
+        active = codes[0]
+        seen = np.zeros(len(code_names), dtype=bool)
+        seen[active] = True
+        check_from = eval_from = 0
+
+        while True:
+            j = max(check_from, int(np.searchsorted(times, ready_ns[active], side="left")))
+            switch = n
+            for c in np.flatnonzero(~seen):
+                pos = np.searchsorted(rows_of[c], j, side="left")
+                if pos < len(rows_of[c]):
+                    switch = min(switch, int(rows_of[c][pos]))
+
+            active_rows = rows_of[active]
+            lo = np.searchsorted(active_rows, eval_from, side="left")
+            hi = np.searchsorted(active_rows, switch, side="left")
+            rows = active_rows[lo:hi]
+            # ролловер: открытая позиция закрывается по последней строке старого контракта до перехода
+            close_row = int(active_rows[hi - 1]) if switch < n and hi > 0 else None
+            segments.append(Segment(rows=rows, signal_rows=rows, code=int(active), close_row=close_row))
+
+            if switch == n:
+                return segments
+
+            active = codes[switch]
+            seen[active] = True
+            check_from = eval_from = switch + 1
+
+    def _simulate_rows(self, hourly_df: pd.DataFrame, signals: pd.Series) -> TradeLedger:
+        self.trades = TradeLedger()
 
         df = hourly_df.copy()
         df["signal"] = signals
-        df = df.sort_values("datetime").reset_index(drop=True)
+        df = df.sort_values("datetime", kind="stable").reset_index(drop=True)
 
-        # Вычисляем момент, когда можно роллироваться с каждого контракта
-        rollover_ready = {
-            code: group["datetime"].max() - timedelta(hours=24)
-            for code, group in df.groupby("contract_code")
-        }
+        # Момент, когда можно роллироваться с каждого контракта: из календаря или max - 24h
+        rollover_ready = self._rollover_ready(df)
 
         in_position = False
         direction = 0
@@ -66,7 +177,7 @@ class RolloverTradeSimulator(TradeSimulatorBase):
                     if in_position and last_active_row is not None:
                         self._close_trade(
                             exit_time=last_active_row["datetime"],
-                            exit_price=last_active_row["close"],
+                            exit_price=float(last_active_row["close"]),
                             direction=direction,
                             entry_time=entry_time,
                             entry_price=entry_price,
@@ -98,7 +209,7 @@ class RolloverTradeSimulator(TradeSimulatorBase):
             elif in_position and signal != 0 and signal != direction:
                 self._close_trade(
                     exit_time=row["datetime"],
-                    exit_price=row["open"],
+                    exit_price=float(row["open"]),
                     direction=direction,
                     entry_time=entry_time,
                     entry_price=entry_price,
@@ -107,27 +218,14 @@ class RolloverTradeSimulator(TradeSimulatorBase):
                 )
                 in_position, direction, entry_price, entry_time = self._open_trade(signal, row)
 
-        return pd.DataFrame(self.trades)
+        return self.trades
 
     def _open_trade(self, signal, row):
-        return True, signal, row["open"], row["datetime"]
+        return True, signal, float(row["open"]), row["datetime"]
 
     def _close_trade(self, exit_time, exit_price, direction, entry_time, entry_price, contract_code, exit_reason):
-        gross_pnl = (exit_price - entry_price) * direction
         commission = (abs(entry_price) + abs(exit_price)) * self.commission_rate
-        slippage_cost = self.slippage * 2
-        net_pnl = gross_pnl - commission - slippage_cost
-
-        self.trades.append({
-            "entry_time": entry_time,
-            "exit_time": exit_time,
-            "side": "long" if direction == 1 else "short",
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "pnl_raw": gross_pnl,
-            "commission": commission,
-            "slippage": slippage_cost,
-            "pnl_net": net_pnl,
-            "contract_code": contract_code,
-            "exit_reason": exit_reason
-        })
+        self.trades.append(
+            entry_time, exit_time, direction, entry_price, exit_price,
+            commission, self.slippage * 2, contract_code, exit_reason,
+        )
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from providers.parquet import ParquetCandleProvider
+
+# Три перекрывающихся контракта по 30 дней минуток в торговые часы
+CONTRACTS = ["FUTRTS032200", "FUTRTS062200", "FUTRTS092200"]
+START = pd.Timestamp("2021-12-01", tz="UTC")
+
+
+def make_minutes(code_index: int, rng: np.random.Generator) -> pd.DataFrame:
+    start = START + pd.Timedelta(days=20 * code_index)
+    idx = pd.date_range(start, start + pd.Timedelta(days=30), freq="1min", tz="UTC")
+    idx = idx[(idx.hour >= 7) & (idx.hour < 21) & (idx.dayofweek < 5)]
+    close = 100_000 + np.cumsum(rng.normal(0, 30, len(idx))) + 500 * code_index
+    open_ = close + rng.normal(0, 5, len(idx))
+    return pd.DataFrame({
+        "datetime": idx,
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(len(idx)) * 20,
+        "low": np.minimum(open_, close) - rng.random(len(idx)) * 20,
+        "close": close,
+        "volume": rng.integers(1, 500, len(idx)),
+    })
+
+
+@pytest.fixture(scope="session")
+def candle_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("candles")
+    rng = np.random.default_rng(0)
+    for k, code in enumerate(CONTRACTS):
+        make_minutes(k, rng).to_parquet(path / f"{code}_30d_candle_interval_minute.parquet", index=False)
+    return path
+
+
+@pytest.fixture
+def provider(candle_dir):
+    return ParquetCandleProvider(data_dir=candle_dir)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzers.sma_rsi import SMARSIAnalyzer
+from core.backtester import BacktestRunner
+from core.strategy import BasicStrategy, StrategyBatch
+from simulators.basic import BasicTradeSimulator
+from simulators.rollover import RolloverTradeSimulator
+
+from conftest import CONTRACTS
+
+
+def make_strategy():
+    return BasicStrategy(SMARSIAnalyzer(sma=20, rsi=7, rsi_buy=55, rsi_sell=45), BasicTradeSimulator())
+
+
+def test_stream_run_does_not_load_full_history(provider, monkeypatch):
+    full = BacktestRunner(make_strategy, provider, tickers=CONTRACTS[0])
+    full.run()
+
+    def no_full_load(*args, **kwargs):
+        pytest.fail("потоковый прогон не должен загружать всю историю")
+
+    monkeypatch.setattr(provider, "get_hourly_candles", no_full_load)
+    monkeypatch.setattr(provider, "get_minute_candles", no_full_load)
+    streamed = BacktestRunner(make_strategy, provider, tickers=CONTRACTS[0], stream_chunk_days=5)
+    streamed.run()
+
+    assert len(streamed.results) == 1
+    assert streamed.results[0]["contract"] == f"{CONTRACTS[0]} (stream)"
+    assert streamed.results[0]["trades"] == full.results[0]["trades"]
+    np.testing.assert_allclose(streamed.results[0]["pnl_net"], full.results[0]["pnl_net"])
+
+
+def make_batch():
+    simulator = BasicTradeSimulator()
+    return StrategyBatch([
+        BasicStrategy(SMARSIAnalyzer(sma=20, rsi=7, rsi_buy=buy, rsi_sell=sell), simulator)
+        for buy, sell in [(55, 45), (60, 40)]
+    ])
+
+
+@pytest.mark.parametrize("make", [make_strategy, make_batch])
+def test_rolling_window_slices_match_masks(provider, make):
+    runner = BacktestRunner(make, provider, tickers=CONTRACTS[:2], window_days=6, stride_days=3)
+    runner.run()
+
+    # эталон: маски по всему ряду поверх одного расчёта индикаторов, как до перехода на searchsorted
+    expected = []
+    window, stride = timedelta(days=6), timedelta(days=3)
+    for ticker in CONTRACTS[:2]:
+        hourly = make().analyzer.calculate(provider.get_hourly_candles(ticker=ticker))
+        minutes = provider.get_minute_candles(ticker=ticker)
+        current = hourly["datetime"].min()
+        while current + window <= hourly["datetime"].max():
+            hour_window = hourly[(hourly["datetime"] >= current) & (hourly["datetime"] < current + window)]
+            minute_window = minutes[(minutes["datetime"] >= current) & (minutes["datetime"] < current + window)]
+            if len(hour_window) and len(minute_window):
+                result = make().run_calculated(hour_window, minute_df=minute_window)
+                expected.extend(result if isinstance(result, list) else [result])
+            current += stride
+
+    assert len(runner.results) == len(expected) > 4
+    for actual, reference in zip(runner.results, expected):
+        pd.testing.assert_frame_equal(actual["trades_df"].to_frame(), reference["trades_df"].to_frame())
+        assert actual["pnl_net"] == pytest.approx(reference["pnl_net"])
+
+
+class RecordingSimulator(BasicTradeSimulator):
+    """Запоминает свечи, отданные на симуляцию."""
+
+    def simulate(self, hourly_df, signals, minute_df=None):
+        self.seen = (hourly_df, minute_df)
+        return super().simulate(hourly_df, signals, minute_df=minute_df)
+
+
+class RecordingRolloverSimulator(RolloverTradeSimulator):
+    def simulate(self, hourly_df, signals, minute_df=None):
+        self.seen = (hourly_df, minute_df)
+        return super().simulate(hourly_df, signals, minute_df=minute_df)
+
+
+@pytest.mark.parametrize("simulator_class, tickers", [
+    (RecordingSimulator, CONTRACTS[0]),
+    (RecordingRolloverSimulator, CONTRACTS),
+])
+def test_last_bar_is_simulated(provider, simulator_class, tickers):
+    strategy = BasicStrategy(SMARSIAnalyzer(sma=20, rsi=7), simulator_class())
+    runner = BacktestRunner(lambda: strategy, provider, tickers=tickers, exclude_days_end=0)
+    runner.run()
+
+    hourly_df, minute_df = strategy.simulator.seen
+    all_hourly = provider.get_hourly_candles(tickers)
+    all_minutes = provider.get_minute_candles(tickers)
+    assert len(hourly_df) == len(all_hourly)
+    assert hourly_df["datetime"].max() == all_hourly["datetime"].max()
+    # минутки покрывают тот же последний бар целиком
+    assert minute_df["datetime"].max() == all_minutes["datetime"].max()
+    assert len(minute_df) == len(all_minutes)
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from loaders.spec_cache import InstrumentSpecCache
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+NOW = START + timedelta(days=10, minutes=30)
+
+
+def quotation(value: float) -> SimpleNamespace:
+    units = int(value)
+    return SimpleNamespace(units=units, nano=int(round((value - units) * 1e9)))
+
+
+class FakeClient:
+    """
+    Подмена AsyncClient: одна законченная свеча на каждый запрос get_all_candles.
+    Пишет время каждого запроса, наибольшее число одновременных запросов и падает первые fail_first
+    запросы по FIGI из failing.
+    """
+
+    def __init__(self, latency: float = 0.01, failing: frozenset = frozenset(), fail_first: int = 0):
+        self.latency = latency
+        self.failing = failing
+        self.fail_first = fail_first
+        self.request_times = []
+        self.failures = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_all_candles(self, figi, from_, to, interval):
+        self.request_times.append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if figi in self.failing and self.failures.get(figi, 0) < self.fail_first:
+                self.failures[figi] = self.failures.get(figi, 0) + 1
+                raise ConnectionError("RESOURCE_EXHAUSTED")
+        finally:
+            self.in_flight -= 1
+        yield SimpleNamespace(
+            time=from_, open=quotation(100.0), high=quotation(101.0), low=quotation(99.0),
+            close=quotation(100.0), volume=1, is_complete=True,
+        )
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    pytest.importorskip("tinkoff.invest")
+    pytest.importorskip("dotenv")
+    from loaders import bulk_loader, data_loader
+
+    monkeypatch.setattr(data_loader, "CANDLE_DIR", str(tmp_path))
+    monkeypatch.setattr(data_loader, "now", lambda: NOW)
+    return bulk_loader
+
+
+def download(loader, client, tickers, **kwargs):
+    from tinkoff.invest import CandleInterval
+
+    return asyncio.run(loader.download_archive_futures(
+        days=kwargs.pop("days", 3), interval=CandleInterval.CANDLE_INTERVAL_1_MIN, tickers=tickers, client=client, **kwargs,
+    ))
+
+
+def tickers(n: int) -> list[str]:
+    from core.catalogs.futures_catalog import ARCHIVE_FUTURES
+
+    return list(ARCHIVE_FUTURES)[:n]
+
+
+def test_concurrency_is_bounded(loader):
+    client = FakeClient()
+    loaded = download(loader, client, tickers(6), concurrency=2, requests_per_second=1000)
+
+    assert len(loaded) == 6
+    assert client.max_in_flight == 2
+
+
+def test_rate_limit_applies_to_every_request(loader):
+    client = FakeClient(latency=0)
+    rate = 10.0
+    # минутки — сутки на запрос: 3 дня -> 3 запроса на FIGI, 8 FIGI -> 24 запроса
+    download(loader, client, tickers(8), concurrency=8, requests_per_second=rate)
+
+    n = len(client.request_times)
+    assert n == 24
+    elapsed = client.request_times[-1] - client.request_times[0]
+    # первые capacity (= rate) запросов проходят сразу, остальные — не чаще rate в секунду
+    assert elapsed >= (n - rate - 1) / rate
+    window = [t for t in client.request_times if t - client.request_times[0] < 0.5]
+    assert len(window) <= rate + 0.5 * rate + 1
+
+
+def test_failed_requests_are_retried(loader):
+    from core.catalogs.futures_catalog import ARCHIVE_FUTURES
+
+    names = tickers(2)
+    figi = ARCHIVE_FUTURES[names[0]]["figi"]
+    client = FakeClient(failing=frozenset({figi}), fail_first=2)
+
+    loaded = download(loader, client, names, requests_per_second=1000, retries=3, base_delay=0.01)
+
+    assert set(loaded) == set(names)
+    assert client.failures[figi] == 2
+    assert loaded[names[0]].index.is_unique
+
+
+def test_exhausted_retries_skip_ticker(loader):
+    from core.catalogs.futures_catalog import ARCHIVE_FUTURES
+
+    names = tickers(2)
+    figi = ARCHIVE_FUTURES[names[0]]["figi"]
+    client = FakeClient(failing=frozenset({figi}), fail_first=100)
+
+    loaded = download(loader, client, names, requests_per_second=1000, retries=1, base_delay=0.01)
+
+    assert set(loaded) == {names[1]}
+
+
+class FakeInstruments:
+    def __init__(self):
+        self.calls = 0
+
+    async def futures(self):
+        self.calls += 1
+        future = SimpleNamespace(
+            ticker="RIH5", figi="FUTRTS032500", lot=1, name="RTS-3.25",
+            min_price_increment=quotation(10.0), min_price_increment_amount=quotation(16.3),
+        )
+        return SimpleNamespace(instruments=[future])
+
+
+def test_spec_cache_refreshes_only_after_ttl(tmp_path, monkeypatch):
+    client = SimpleNamespace(instruments=FakeInstruments())
+    clock = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    path = str(tmp_path / "futures_spec.json")
+
+    cache = InstrumentSpecCache(path=path, ttl=60)
+    spec = asyncio.run(cache.lookup("RIH5", client))
+    assert spec["figi"] == "FUTRTS032500"
+    assert spec["step_price"] == pytest.approx(1.63)
+
+    # свежий кэш — с диска, без запроса; в том числе в новом экземпляре
+    clock[0] += 30
+    assert asyncio.run(InstrumentSpecCache(path=path, ttl=60).lookup("RIH5", client)) == spec
+    assert client.instruments.calls == 1
+
+    clock[0] += 60
+    assert InstrumentSpecCache(path=path, ttl=60).get("RIH5") is None
+    asyncio.run(cache.lookup("RIH5", client))
+    assert client.instruments.calls == 2
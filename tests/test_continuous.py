@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from providers.continuous import PRICE_COLUMNS, ContinuousContractBuilder
+
+from conftest import CONTRACTS, START, make_minutes
+
+SWITCHES = {
+    CONTRACTS[0]: START + pd.Timedelta(days=26, hours=12),  # пн 27.12.2021 12:00
+    CONTRACTS[1]: START + pd.Timedelta(days=47, hours=12),  # пн 17.01.2022 12:00
+}
+
+
+@pytest.fixture(scope="module")
+def contracts():
+    rng = np.random.default_rng(3)
+    return [(code, make_minutes(k, rng).assign(contract_code=code)) for k, code in enumerate(CONTRACTS)]
+
+
+def combine_contracts(sorted_contracts):
+    """Прежняя склейка из rollover_base — эталон для векторного построителя."""
+    combined = []
+    for i, (code, df) in enumerate(sorted_contracts):
+        df = df.copy()
+        if i == 0:
+            combined.append(df)
+            continue
+        prev_max_dt = combined[-1]["datetime"].max()
+        combined.append(df[df["datetime"] > (prev_max_dt - pd.Timedelta(minutes=1))])
+    return pd.concat(combined).sort_values("datetime").reset_index(drop=True)
+
+
+def by_time_and_contract(df):
+    return df.sort_values(["datetime", "contract_code"], kind="stable").reset_index(drop=True)
+
+
+def expected_gaps(contracts, adjustment):
+    """Разрыв на каждой склейке: close нового и старого контракта на последней минуте старого до перехода."""
+    gaps = []
+    for (code, old), (_, new) in zip(contracts[:-1], contracts[1:]):
+        stitch = old.loc[old["datetime"] < SWITCHES[code], "datetime"].max()
+        old_close = old.loc[old["datetime"] == stitch, "close"].item()
+        new_close = new.loc[new["datetime"] == stitch, "close"].item()
+        gaps.append(new_close - old_close if adjustment == "panama" else new_close / old_close)
+    return gaps
+
+
+def test_build_matches_combine_contracts(contracts):
+    result = ContinuousContractBuilder().build(contracts)
+    expected = combine_contracts(contracts)
+
+    assert result["datetime"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(by_time_and_contract(result), by_time_and_contract(expected))
+
+
+def test_build_cuts_contracts_at_switch_times(contracts):
+    result = ContinuousContractBuilder().build(contracts, SWITCHES)
+
+    for code, df in contracts:
+        part = result[result["contract_code"] == code]
+        if code in SWITCHES:
+            assert part["datetime"].max() < SWITCHES[code]
+        if code != CONTRACTS[0]:
+            previous = CONTRACTS[CONTRACTS.index(code) - 1]
+            assert part["datetime"].min() >= SWITCHES[previous]
+        pd.testing.assert_frame_equal(
+            part.reset_index(drop=True),
+            df[df["datetime"].isin(part["datetime"])].reset_index(drop=True),
+        )
+
+
+@pytest.mark.parametrize("adjustment", ["panama", "ratio"])
+def test_back_adjustment_closes_gaps_at_each_switch(contracts, adjustment):
+    raw = ContinuousContractBuilder().build(contracts, SWITCHES)
+    adjusted = ContinuousContractBuilder(adjustment=adjustment).build(contracts, SWITCHES)
+    gaps = expected_gaps(contracts, adjustment)
+
+    # Контракт k корректируется на все последующие разрывы, последний остаётся как есть
+    if adjustment == "panama":
+        corrections = [gaps[0] + gaps[1], gaps[1], 0.0]
+    else:
+        corrections = [gaps[0] * gaps[1], gaps[1], 1.0]
+
+    pd.testing.assert_frame_equal(adjusted.drop(columns=list(PRICE_COLUMNS)), raw.drop(columns=list(PRICE_COLUMNS)))
+    for code, correction in zip(CONTRACTS, corrections):
+        mask = raw["contract_code"] == code
+        for col in PRICE_COLUMNS:
+            expected = raw.loc[mask, col] + correction if adjustment == "panama" else raw.loc[mask, col] * correction
+            np.testing.assert_allclose(adjusted.loc[mask, col], expected, rtol=1e-12)
+
+
+def test_load_or_build_uses_cache_until_a_source_changes(contracts, tmp_path):
+    sources = []
+    for code, df in contracts:
+        path = tmp_path / f"{code}.parquet"
+        df.to_parquet(path, index=False)
+        sources.append(path)
+
+    calls = []
+
+    def load_contracts():
+        calls.append(1)
+        return [(path.stem, pd.read_parquet(path)) for path in sources]
+
+    builder = ContinuousContractBuilder(adjustment="panama", cache_dir=tmp_path / "cache")
+    first = builder.load_or_build("RTS", sources, load_contracts, SWITCHES)
+    second = builder.load_or_build("RTS", sources, load_contracts, SWITCHES)
+    assert len(calls) == 1
+    assert builder.cache_path("RTS").exists()
+    pd.testing.assert_frame_equal(second, first)
+
+    # Другая корректировка — другой файл кэша
+    ContinuousContractBuilder(cache_dir=tmp_path / "cache").load_or_build("RTS", sources, load_contracts, SWITCHES)
+    assert len(calls) == 2
+
+    # Изменился источник: отпечаток в метаданных parquet не совпадает — ряд перестраивается
+    code, df = contracts[-1]
+    changed = df.assign(close=df["close"] + 50.0)
+    changed.to_parquet(sources[-1], index=False)
+    stat = sources[-1].stat()
+    os.utime(sources[-1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    rebuilt = builder.load_or_build("RTS", sources, load_contracts, SWITCHES)
+    assert len(calls) == 3
+    last = rebuilt["contract_code"] == code
+    np.testing.assert_allclose(rebuilt.loc[last, "close"], first.loc[first["contract_code"] == code, "close"] + 50.0)
+    pd.testing.assert_frame_equal(builder.load_or_build("RTS", sources, load_contracts, SWITCHES), rebuilt)
+    assert len(calls) == 3
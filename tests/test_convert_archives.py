@@ -0,0 +1,91 @@
+import os
+import zipfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from scripts import convert_archives_to_parquet as convert
+
+
+def csv_day(day: str, hours: range) -> str:
+    rows = [
+        f"uid;{day}T{hour:02d}:{minute:02d}:00Z;{100 + hour};{101 + hour};{99 + hour};{100.5 + hour};{hour * 10 + minute};"
+        for hour in hours
+        for minute in (0, 1)
+    ]
+    return "\n".join(rows) + "\n"
+
+
+def write_zip(path, days: dict[str, str]):
+    with zipfile.ZipFile(path, "w") as z:
+        for name, content in days.items():
+            z.writestr(name, content)
+    return path
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    raw_dir, out_dir = tmp_path / "raw", tmp_path / "out"
+    raw_dir.mkdir()
+    out_dir.mkdir()
+    monkeypatch.setattr(convert, "RAW_DATA_DIR", raw_dir)
+    monkeypatch.setattr(convert, "OUTPUT_DIR", out_dir)
+    return raw_dir, out_dir
+
+
+def test_converts_archive_and_skips_it_while_fresh(dirs, capsys):
+    raw_dir, out_dir = dirs
+    # дни в архиве лежат не по порядку, пустой CSV пропускается
+    zip_path = write_zip(raw_dir / "FUTRTS032200_2022.zip", {
+        "uid_20220104.csv": csv_day("2022-01-04", range(7, 10)),
+        "uid_20220103.csv": csv_day("2022-01-03", range(7, 10)),
+        "uid_20220105.csv": "",
+    })
+
+    message, rows = convert.convert_zip(zip_path)
+    out = out_dir / "FUTRTS032200_2022.parquet"
+    assert message == f"Saved {out}" and rows == 12
+    assert [p.name for p in out_dir.iterdir()] == [out.name]
+
+    metadata = pq.ParquetFile(out).metadata
+    assert metadata.num_row_groups == 2  # торговый день — row group
+    df = pd.read_parquet(out)
+    assert list(df.columns) == convert.SCHEMA.names
+    assert df["datetime"].is_monotonic_increasing
+    assert df["datetime"].iloc[0] == pd.Timestamp("2022-01-03 07:00", tz="UTC")
+
+    assert convert.is_up_to_date(zip_path)
+    convert.main()
+    assert "1 archives up to date, 0 to convert" in capsys.readouterr().out
+
+    # архив обновился — parquet устарел
+    stat = out.stat()
+    os.utime(zip_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not convert.is_up_to_date(zip_path)
+
+
+def test_overlapping_days_are_resorted(dirs):
+    raw_dir, out_dir = dirs
+    zip_path = write_zip(raw_dir / "FUTRTS062200_2022.zip", {
+        "uid_20220103.csv": csv_day("2022-01-03", range(7, 12)),
+        # вечерняя сессия первого дня попала в файл второго
+        "uid_20220104.csv": csv_day("2022-01-03", range(9, 10)) + csv_day("2022-01-04", range(7, 9)),
+    })
+
+    _, rows = convert.convert_zip(zip_path)
+    df = pd.read_parquet(out_dir / "FUTRTS062200_2022.parquet")
+    assert rows == len(df) == 16
+    assert df["datetime"].is_monotonic_increasing
+
+
+def test_failed_conversion_leaves_no_temporary_file(dirs):
+    raw_dir, out_dir = dirs
+    zip_path = write_zip(raw_dir / "FUTRTS092200_2022.zip", {
+        "uid_20220103.csv": csv_day("2022-01-03", range(7, 9)),
+        "uid_20220104.csv": "uid;not-a-date;1;2;3;4;5;\n",
+    })
+
+    with pytest.raises(Exception):
+        convert.convert_zip(zip_path)
+    assert list(out_dir.iterdir()) == []
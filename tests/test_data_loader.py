@@ -0,0 +1,141 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("tinkoff.invest")
+pytest.importorskip("dotenv")
+
+from tinkoff.invest import CandleInterval  # noqa: E402
+
+from loaders import data_loader  # noqa: E402
+
+FIGI = "FUTTEST00000"
+INTERVAL = CandleInterval.CANDLE_INTERVAL_HOUR
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def quotation(value: float) -> SimpleNamespace:
+    units = int(value)
+    return SimpleNamespace(units=units, nano=int(round((value - units) * 1e9)))
+
+
+class FakeClient:
+    """Подмена AsyncClient: часовые свечи с listed до now, последняя — незаконченная; запросы пишутся в calls."""
+
+    def __init__(self, listed: datetime, clock: list, price: float = 100.0, fail: bool = False):
+        self.listed = listed
+        self.clock = clock
+        self.price = price
+        self.fail = fail
+        self.calls = []
+
+    async def get_all_candles(self, figi, from_, to, interval):
+        self.calls.append((from_, to))
+        if self.fail:
+            raise ConnectionError("обрыв связи")
+        time = self.listed
+        while time < min(to, self.clock[0]):
+            if time >= from_:
+                yield SimpleNamespace(
+                    time=time,
+                    open=quotation(self.price),
+                    high=quotation(self.price + 1),
+                    low=quotation(self.price - 1),
+                    close=quotation(self.price),
+                    volume=10,
+                    is_complete=time + timedelta(hours=1) <= self.clock[0],
+                )
+            time += timedelta(hours=1)
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    clock = [START + timedelta(days=10, minutes=30)]
+    monkeypatch.setattr(data_loader, "CANDLE_DIR", str(tmp_path))
+    monkeypatch.setattr(data_loader, "now", lambda: clock[0])
+    return clock
+
+
+def load(client, days: int = 5, force_refresh: bool = False) -> pd.DataFrame:
+    return asyncio.run(data_loader.load_candles(FIGI, days, INTERVAL, force_refresh=force_refresh, client=client))
+
+
+def store_dir() -> str:
+    return data_loader._store_dir(FIGI, INTERVAL)
+
+
+def test_tail_is_appended_without_duplicates(clock):
+    client = FakeClient(START, clock)
+    first = load(client)
+    assert first.index[-1] == START + timedelta(days=10)  # незаконченная свеча отдаётся, но не хранится
+
+    clock[0] += timedelta(hours=3)
+    second = load(client)
+
+    # хвост — с начала незаконченной свечи прошлого запуска
+    assert client.calls[-1][0] == START + timedelta(days=10)
+    assert second.index.is_unique
+    assert second.index[-1] == START + timedelta(days=10, hours=3)
+    stored = data_loader._read_store(store_dir())
+    assert stored.index.is_unique
+    assert stored.index[-1] == START + timedelta(days=10, hours=2)
+
+
+def test_store_without_coverage_dedupes_boundary_candle(clock):
+    client = FakeClient(START, clock)
+    load(client)
+    stored_before = data_loader._read_store(store_dir())
+    os.remove(os.path.join(store_dir(), data_loader.COVERAGE_FILE))
+
+    clock[0] += timedelta(hours=2)
+    load(client)
+
+    # без coverage.json хвост берётся с последней сохранённой свечи — она приходит повторно
+    assert client.calls[-1][0] == stored_before.index[-1]
+    stored = data_loader._read_store(store_dir())
+    assert stored.index.is_unique
+    assert len(stored) == len(stored_before) + 2
+
+
+def test_young_contract_head_is_not_requested_again(clock):
+    client = FakeClient(START + timedelta(days=8), clock)  # листинг позже начала 5-дневного окна
+    load(client)
+    assert len(client.calls) == 1
+
+    clock[0] += timedelta(hours=1)
+    load(client)
+    assert len(client.calls) == 2
+    # только хвост: пустая голова [from_, листинг) уже покрыта
+    assert client.calls[-1][0] >= client.listed
+
+    load(client, days=7)
+    assert len(client.calls) == 4
+    head_from, head_to = client.calls[-2]
+    assert head_to == client.calls[0][0]  # голова — только новая глубина до прежнего начала покрытия
+    assert head_from < head_to
+
+
+def test_failed_force_refresh_keeps_store(clock):
+    load(FakeClient(START, clock))
+    parts = data_loader._store_parts(store_dir())
+    stored = data_loader._read_store(store_dir())
+
+    with pytest.raises(ConnectionError):
+        load(FakeClient(START, clock, fail=True), force_refresh=True)
+
+    assert data_loader._store_parts(store_dir()) == parts
+    pd.testing.assert_frame_equal(data_loader._read_store(store_dir()), stored)
+
+
+def test_force_refresh_replaces_store(clock):
+    load(FakeClient(START, clock))
+    refreshed = load(FakeClient(START, clock, price=200.0), force_refresh=True)
+
+    assert (refreshed["close"] == 200.0).all()
+    stored = data_loader._read_store(store_dir())
+    assert (stored["close"] == 200.0).all()
+    assert len(data_loader._store_parts(store_dir())) == 1
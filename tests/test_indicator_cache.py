@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from analyzers import indicator_cache
+from analyzers.indicator_cache import IndicatorCache
+from analyzers.sma_rsi import SMARSIAnalyzer
+
+from conftest import CONTRACTS
+
+
+def hourly(provider) -> pd.DataFrame:
+    return provider.get_hourly_candles(ticker=CONTRACTS[:2])
+
+
+def test_cached_indicators_match_uncached(provider, tmp_path):
+    df = hourly(provider)
+    expected = SMARSIAnalyzer(sma=20, rsi=7).calculate(df)
+
+    cold = SMARSIAnalyzer(sma=20, rsi=7, cache=IndicatorCache(tmp_path)).calculate(df)
+    warm_cache = IndicatorCache(tmp_path)  # новый процесс: только дисковый слой
+    warm = SMARSIAnalyzer(sma=20, rsi=7, cache=warm_cache).calculate(df)
+
+    pd.testing.assert_frame_equal(cold, expected)
+    pd.testing.assert_frame_equal(warm, expected)
+    assert warm_cache.misses == 0
+
+
+def test_fingerprint_is_computed_once_per_frame(provider, monkeypatch):
+    calls = []
+    original = indicator_cache.contract_fingerprints
+    monkeypatch.setattr(indicator_cache, "contract_fingerprints", lambda df: calls.append(1) or original(df))
+
+    cache = IndicatorCache()
+    df = hourly(provider)
+    for sma, rsi in [(20, 7), (40, 7), (20, 14)]:
+        SMARSIAnalyzer(sma=sma, rsi=rsi, cache=cache).calculate(df)
+    assert len(calls) == 1
+
+    # другой кадр — новый отпечаток
+    SMARSIAnalyzer(sma=20, rsi=7, cache=cache).calculate(df.copy())
+    assert len(calls) == 2
+
+
+def test_disk_layer_evicts_least_recently_used(tmp_path):
+    values = np.arange(1000, dtype=float)  # ~8 КБ на файл
+    limit_mb = 3.5 * values.nbytes / 1024 / 1024
+    cache = IndicatorCache(tmp_path, memory_limit_mb=0, disk_limit_mb=limit_mb)
+
+    for i in range(3):
+        cache.get_or_compute(f"fp{i}", "A", "sma", (i,), lambda: values)
+        path = cache._path(f"fp{i}", "A", "sma", (i,))
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+
+    # чтение fp0 делает его самым свежим — вытесняется fp1
+    cache.get_or_compute("fp0", "A", "sma", (0,), lambda: values)
+    cache.get_or_compute("fp3", "A", "sma", (3,), lambda: values)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["fp0", "fp2", "fp3"]
+    assert cache._disk_bytes <= cache.disk_limit_bytes
+
+
+def test_startup_prunes_to_budget(tmp_path):
+    values = np.arange(1000, dtype=float)
+    cache = IndicatorCache(tmp_path, disk_limit_mb=None)
+    for i in range(4):
+        cache.get_or_compute(f"fp{i}", "A", "sma", (i,), lambda: values)
+        os.utime(cache._path(f"fp{i}", "A", "sma", (i,)), (1_000_000 + i, 1_000_000 + i))
+
+    IndicatorCache(tmp_path, disk_limit_mb=2.5 * values.nbytes / 1024 / 1024)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["fp2", "fp3"]
+
+
+def fractional_tick_frame(n: int = 20_000, tick: float = 0.0025) -> pd.DataFrame:
+    """Цены на сетке дробного шага с частыми стоянками: много баров, где close == sma ровно."""
+    rng = np.random.default_rng(8)
+    close = 80 + tick * np.cumsum(rng.choice([-1, 0, 0, 0, 1], n))
+    return pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=n, freq="h", tz="UTC"),
+        "open": close,
+        "high": close + tick * rng.integers(0, 3, n),
+        "low": close - tick * rng.integers(0, 3, n),
+        "close": close,
+        "volume": rng.integers(1, 100, n),
+        "contract_code": np.where(np.arange(n) < n // 2, "A", "B"),
+    })
+
+
+def test_grid_cache_signals_match_uncached_exactly(tmp_path):
+    df = fractional_tick_frame()
+    grid = {"sma": (20, 40, 60), "rsi": (7, 14), "atr": (14,)}
+    configs = [(sma, rsi, buy, sell) for sma in grid["sma"] for rsi in grid["rsi"] for buy, sell in [(55, 45), (60, 40)]]
+
+    fresh = IndicatorCache(tmp_path, grid=grid)
+    ties = 0
+    for sma, rsi, buy, sell in configs:
+        expected_df = SMARSIAnalyzer(sma=sma, rsi=rsi, rsi_buy=buy, rsi_sell=sell).calculate(df)
+        expected = SMARSIAnalyzer(sma=sma, rsi=rsi, rsi_buy=buy, rsi_sell=sell).get_signals(expected_df)
+        ties += int((expected_df["close"] == expected_df["sma"]).sum())
+        # из промаха сетки, из памяти и с диска (новый процесс)
+        for cache in (fresh, fresh, IndicatorCache(tmp_path, grid=grid)):
+            analyzer = SMARSIAnalyzer(sma=sma, rsi=rsi, rsi_buy=buy, rsi_sell=sell, cache=cache)
+            np.testing.assert_array_equal(analyzer.get_signals(analyzer.calculate(df)), expected)
+    assert ties > 0
+
+
+def test_grid_miss_fills_every_period_of_the_indicator(provider, tmp_path):
+    df = hourly(provider)
+    cache = IndicatorCache(tmp_path, grid={"sma": (20, 40, 60), "rsi": (7, 14), "atr": (14,)})
+
+    SMARSIAnalyzer(sma=20, rsi=7, cache=cache).calculate(df)
+    misses = cache.misses
+    assert misses == 3 * len(CONTRACTS[:2])  # по промаху на индикатор и контракт
+
+    for sma, rsi in [(40, 14), (60, 7)]:
+        cached = SMARSIAnalyzer(sma=sma, rsi=rsi, cache=cache).calculate(df)
+        expected = SMARSIAnalyzer(sma=sma, rsi=rsi).calculate(df)
+        for name in ("sma", "rsi", "atr"):
+            np.testing.assert_array_equal(cached[name], expected[name])
+    assert cache.misses == misses
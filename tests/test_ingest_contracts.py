@@ -0,0 +1,63 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from scripts import ingest_contracts as ingest
+
+from conftest import CONTRACTS, make_minutes
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    input_dir, output_dir = tmp_path / "candles", tmp_path / "filtered"
+    input_dir.mkdir()
+    monkeypatch.setattr(ingest, "INPUT_DIR", input_dir)
+    monkeypatch.setattr(ingest, "OUTPUT_DIR", output_dir)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", output_dir / "ingest_manifest.json")
+
+    rng = np.random.default_rng(11)
+    for k, code in enumerate(CONTRACTS[:2]):
+        make_minutes(k, rng).to_parquet(input_dir / f"{code}_2022.parquet", index=False)
+    return input_dir, output_dir
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Контракты, для которых стадия действительно пересобирала артефакты."""
+    contracts = []
+    build_artifacts = ingest.build_artifacts
+
+    def spy(paths):
+        contracts.append(ingest.pattern.match(paths[0].stem).group("contract"))
+        return build_artifacts(paths)
+
+    monkeypatch.setattr(ingest, "build_artifacts", spy)
+    return contracts
+
+
+def test_unchanged_contracts_are_skipped_and_touched_ones_rebuilt(dirs, built):
+    input_dir, output_dir = dirs
+
+    ingest.main()
+    assert built == CONTRACTS[:2]
+    for code in CONTRACTS[:2]:
+        assert all(path.exists() for path in ingest.output_paths(code).values())
+
+    manifest = json.loads(ingest.MANIFEST_PATH.read_text(encoding="utf-8"))
+    source = input_dir / f"{CONTRACTS[1]}_2022.parquet"
+    assert manifest[CONTRACTS[1]] == ingest.sources_fingerprint([source])
+
+    ingest.main()
+    assert built == CONTRACTS[:2]
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    ingest.main()
+    assert built == [*CONTRACTS[:2], CONTRACTS[1]]
+
+    # пропавший артефакт тоже приводит к пересборке
+    ingest.output_paths(CONTRACTS[0])["hour"].unlink()
+    ingest.main()
+    assert built == [*CONTRACTS[:2], CONTRACTS[1], CONTRACTS[0]]
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzers.sma_rsi import SMARSIAnalyzer
+from simulators.basic import BasicTradeSimulator
+from simulators.intrabar import IntrabarTradeSimulator
+
+from conftest import CONTRACTS
+
+T0 = pd.Timestamp("2024-01-01 10:00", tz="UTC")
+FLAT = [(100.0, 100.2, 99.8)]
+
+
+def make_frames(minutes_per_bar: list[list[tuple]]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Минутки (open, high, low) по часовым барам; ATR каждого бара = 1."""
+    rows = []
+    for i, minutes in enumerate(minutes_per_bar):
+        for k, (open_, high, low) in enumerate(minutes):
+            rows.append((T0 + pd.Timedelta(hours=i, minutes=k), open_, high, low, open_))
+    minute_df = pd.DataFrame(rows, columns=["datetime", "open", "high", "low", "close"]).assign(contract_code="A")
+    hourly_df = (
+        minute_df.set_index("datetime")
+        .resample("1h")
+        .agg({"open": "first", "high": "max", "low": "min", "close": "last", "contract_code": "first"})
+        .reset_index()
+        .assign(atr=1.0)
+    )
+    return hourly_df, minute_df
+
+
+def simulate(minutes_per_bar, signals, **levels) -> pd.DataFrame:
+    hourly_df, minute_df = make_frames(minutes_per_bar)
+    levels = {"stop_atr": None, "target_atr": None, "trailing_atr": None, **levels}
+    simulator = IntrabarTradeSimulator(commission_rate=0.0, slippage=0, **levels)
+    return simulator.simulate(hourly_df, pd.Series(signals, dtype=np.int8), minute_df=minute_df).to_frame()
+
+
+# вход в лонг по open бара 1 = 100; ATR = 1
+@pytest.mark.parametrize("bar, levels, exit_minute, exit_price, reason", [
+    ([(100, 100.5, 99.5), (99, 99.5, 97.5)], {"stop_atr": 2}, 1, 98.0, "stop_loss"),
+    ([(100, 100.5, 99.5), (96, 96.5, 95)], {"stop_atr": 2}, 1, 96.0, "stop_loss"),  # гэп через стоп
+    ([(100, 101, 99.5), (101, 104, 100.5)], {"target_atr": 3}, 1, 103.0, "take_profit"),
+    ([(100, 101, 99.5), (105, 106, 104)], {"target_atr": 3}, 1, 105.0, "take_profit"),  # гэп через тейк
+    ([(100, 104, 97)], {"stop_atr": 2, "target_atr": 3}, 0, 98.0, "stop_loss"),  # оба уровня в одной минуте
+    # трейлинг: лучшая цена до минуты 2 — 103, стоп 102
+    ([(100, 102, 99.9), (101.8, 103, 101.5), (102.5, 102.6, 101.9)], {"trailing_atr": 1}, 2, 102.0, "trailing_stop"),
+    ([(100, 102, 99.9), (101.8, 103, 101.5), (101, 101.2, 100.5)], {"trailing_atr": 1}, 2, 101.0, "trailing_stop"),
+    # трейлинг, не поднявшийся выше фиксированного стопа, — это стоп-лосс
+    ([(100, 100.5, 99.5), (99, 99.5, 97.9)], {"stop_atr": 2, "trailing_atr": 3}, 1, 98.0, "stop_loss"),
+])
+def test_long_level_fills(bar, levels, exit_minute, exit_price, reason):
+    trades = simulate([FLAT, bar, FLAT, FLAT], [1, 0, 0, 0], **levels)
+
+    assert len(trades) == 1
+    trade = trades.iloc[0]
+    assert trade["entry_time"] == T0 + pd.Timedelta(hours=1)
+    assert trade["entry_price"] == 100.0
+    assert trade["exit_time"] == T0 + pd.Timedelta(hours=1, minutes=exit_minute)
+    assert trade["exit_price"] == exit_price
+    assert trade["exit_reason"] == reason
+
+
+@pytest.mark.parametrize("bar, exit_price", [
+    ([(100, 100.5, 99.5), (101, 102.5, 100.5)], 102.0),
+    ([(100, 100.5, 99.5), (104, 104.5, 103)], 104.0),  # гэп через стоп
+])
+def test_short_stop_fills(bar, exit_price):
+    trades = simulate([FLAT, bar, FLAT], [-1, 0, 0], stop_atr=2)
+
+    assert trades["side"].tolist() == ["short"]
+    assert trades["exit_price"].tolist() == [exit_price]
+    assert trades["exit_reason"].tolist() == ["stop_loss"]
+
+
+def test_reentry_waits_for_next_hourly_bar():
+    bar = [(100, 100.5, 99.5), (99, 99.5, 97.5), (100, 100.5, 99.5)]
+    trades = simulate([FLAT, bar, FLAT, FLAT], [1, 1, 1, 0], stop_atr=2)
+
+    assert trades["exit_reason"].tolist() == ["stop_loss"]
+    # стоп на баре 1 — новый вход только на open бара 2; эта позиция остаётся открытой
+    trades_with_reversal = simulate([FLAT, bar, FLAT, FLAT, FLAT], [1, 1, 1, -1, 0], stop_atr=2)
+    assert trades_with_reversal["entry_time"].tolist() == [T0 + pd.Timedelta(hours=1), T0 + pd.Timedelta(hours=2)]
+    assert trades_with_reversal["exit_reason"].tolist() == ["stop_loss", "signal_change"]
+
+
+def test_levels_off_matches_basic_simulator(provider):
+    hourly_df = SMARSIAnalyzer(sma=20, rsi=7).calculate(provider.get_hourly_candles(CONTRACTS))
+    minute_df = provider.get_minute_candles(CONTRACTS)
+    signals = pd.Series(np.random.default_rng(7).choice(np.array([-1, 0, 1], dtype=np.int8), len(hourly_df)))
+
+    expected = BasicTradeSimulator().simulate(hourly_df, signals).to_frame()
+    actual = IntrabarTradeSimulator(stop_atr=None, target_atr=None, trailing_atr=None).simulate(
+        hourly_df, signals, minute_df=minute_df
+    ).to_frame()
+
+    assert len(expected)
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kernels import loops, numpy_backend
+from kernels.backend import available_backends, load_backend, segment_starts, set_backend
+
+BACKENDS = [numpy_backend, loops]
+if "numba" in available_backends():
+    BACKENDS.append(load_backend("numba"))
+
+
+def backend_id(backend) -> str:
+    return getattr(backend, "NAME", "loops")
+
+
+@pytest.fixture(params=BACKENDS, ids=backend_id)
+def backend(request):
+    return request.param
+
+
+def make_prices(n: int = 400, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    prices = 100_000 + np.cumsum(rng.normal(0, 50, n))
+    prices[50:80] = prices[50]  # плоский участок
+    return prices
+
+
+def make_segments(n: int = 400) -> np.ndarray:
+    codes = np.repeat([0, 1, 2], [150, 5, n - 155])
+    return segment_starts(codes)
+
+
+def pandas_rolling_mean(values: np.ndarray, period: int, seg_start: np.ndarray) -> np.ndarray:
+    return pd.Series(values).groupby(seg_start).transform(lambda s: s.rolling(period).mean()).to_numpy()
+
+
+def test_rolling_mean_matches_pandas(backend):
+    values = make_prices()
+    seg_start = make_segments()
+    periods = np.array([1, 3, 20, 60], dtype=np.int64)
+
+    cube = backend.rolling_mean_cube(values, periods, seg_start)
+
+    for j, period in enumerate(periods):
+        expected = pandas_rolling_mean(values, period, seg_start)
+        np.testing.assert_array_equal(np.isnan(cube[:, j]), np.isnan(expected))
+        np.testing.assert_allclose(cube[:, j], expected, rtol=1e-10, equal_nan=True)
+
+
+def test_rolling_mean_flat_window_is_exact(backend):
+    values = np.array([0.0, 0.0, 0.0, 1e-3, 0.0, 0.0, 0.0])
+    seg_start = np.zeros(len(values), dtype=np.int64)
+
+    cube = backend.rolling_mean_cube(values, np.array([3], dtype=np.int64), seg_start)
+
+    assert cube[2, 0] == 0.0
+    assert cube[6, 0] == 0.0
+
+
+def test_lagged_position_matches_reference(backend):
+    rng = np.random.default_rng(1)
+    signals = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=400, p=[0.1, 0.8, 0.1])
+    seg_start = make_segments()
+
+    expected = loops.lagged_position(signals, seg_start)
+
+    np.testing.assert_array_equal(backend.lagged_position(signals, seg_start), expected)
+    assert expected[0] == 0 and expected[150] == 0  # позиция не переходит через границу отрезка
+
+
+def test_max_drawdown_matches_pandas(backend):
+    pnl = np.random.default_rng(2).normal(0, 100, 500)
+    cumulative = pd.Series(pnl).cumsum()
+    expected = float((cumulative.cummax() - cumulative).max())
+
+    assert backend.max_drawdown(pnl) == pytest.approx(expected, rel=1e-12)
+    assert np.isnan(backend.max_drawdown(np.zeros(0)))
+
+
+def test_backend_parity_against_numpy():
+    values = make_prices(seed=3)
+    seg_start = make_segments()
+    periods = np.array([5, 14, 40], dtype=np.int64)
+    reference = numpy_backend.rolling_mean_cube(values, periods, seg_start)
+
+    for backend in BACKENDS[1:]:
+        np.testing.assert_allclose(
+            backend.rolling_mean_cube(values, periods, seg_start), reference, rtol=1e-10, equal_nan=True
+        )
+
+
+def test_missing_jit_backend_falls_back_to_numpy():
+    if "numba" in available_backends():
+        pytest.skip("numba установлена — запасной путь не проверить")
+    assert set_backend("numba").NAME == "numpy"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        set_backend("fortran")
+
+
+def test_numba_backend_matches_loops():
+    pytest.importorskip("numba")
+    numba_backend = load_backend("numba")
+    signals = np.array([0, 1, 0, 0, -1, 0, 1, 0], dtype=np.int8)
+    seg_start = np.array([0, 0, 0, 0, 4, 4, 4, 4], dtype=np.int64)
+
+    np.testing.assert_array_equal(
+        numba_backend.lagged_position(signals, seg_start), loops.lagged_position(signals, seg_start)
+    )
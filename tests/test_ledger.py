@@ -0,0 +1,39 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulators.ledger import TradeLedger
+
+T0 = pd.Timestamp("2024-01-01 10:00", tz="UTC")
+
+
+def append_trade(ledger: TradeLedger, k: int = 0) -> None:
+    ledger.append(
+        entry_time=T0 + pd.Timedelta(hours=k), exit_time=T0 + pd.Timedelta(hours=k + 1), direction=1,
+        entry_price=100.0, exit_price=101.0, commission=0.1, slippage=0.2, contract_code="A",
+        exit_reason="signal_change",
+    )
+
+
+@pytest.mark.parametrize("make_empty", [
+    lambda: pickle.loads(pickle.dumps(TradeLedger())),
+    lambda: TradeLedger().slice(0, 0),
+    lambda: TradeLedger().copy(),
+    lambda: TradeLedger(capacity=0),
+])
+def test_empty_ledger_grows_on_append(make_empty):
+    ledger = make_empty()
+
+    append_trade(ledger)
+    ledger.extend(
+        entry_time=np.array([T0.value], dtype="datetime64[ns]"), exit_time=np.array([T0.value], dtype="datetime64[ns]"),
+        direction=np.array([-1]), entry_price=np.array([100.0]), exit_price=np.array([99.0]),
+        commission=0.0, slippage=0.0, contract_code="A", exit_reason="signal_change",
+    )
+    for k in range(1, 10):
+        append_trade(ledger, k)
+
+    assert len(ledger) == 11
+    np.testing.assert_allclose(ledger["pnl_net"][:2], [0.7, 1.0])
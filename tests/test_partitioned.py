@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from providers.parquet import ParquetCandleProvider
+from providers.partitioned import PartitionedCandleProvider, write_partitioned_dataset
+
+from conftest import CONTRACTS, make_minutes
+
+# Стык декабря и января: конец первого контракта и середина второго
+FROM = pd.Timestamp("2021-12-27")
+TO = pd.Timestamp("2022-01-05 23:59")
+
+
+@pytest.fixture(scope="module", params=[None, "UTC", "Europe/Moscow"], ids=["naive", "utc", "moscow"])
+def providers(request, tmp_path_factory):
+    """Исходники с наивным, UTC и московским временем; эталон — ParquetCandleProvider."""
+    tz = request.param
+    source_dir = tmp_path_factory.mktemp("source")
+    rng = np.random.default_rng(5)
+    for k, code in enumerate(CONTRACTS):
+        df = make_minutes(k, rng)
+        df["datetime"] = df["datetime"].dt.tz_convert(tz) if tz else df["datetime"].dt.tz_localize(None)
+        df.to_parquet(source_dir / f"{code}_30d_candle_interval_minute.parquet", index=False)
+
+    reference = ParquetCandleProvider(source_dir, store_dir=tmp_path_factory.mktemp("store"))
+    dataset_dir = tmp_path_factory.mktemp("partitioned")
+    write_partitioned_dataset(reference, dataset_dir)
+    return tz, reference, PartitionedCandleProvider(dataset_dir)
+
+
+def bound(ts: pd.Timestamp, tz):
+    return ts.tz_localize(tz) if tz else ts
+
+
+@pytest.mark.parametrize("tickers", [CONTRACTS[0], CONTRACTS[:2], None])
+def test_minutes_match_parquet_provider(providers, tickers):
+    tz, reference, partitioned = providers
+    queries = [{}, {"from_dt": bound(FROM, tz), "to_dt": bound(TO, tz)}]
+    for query in queries:
+        expected = reference.get_minute_candles(tickers, **query)
+        result = partitioned.get_minute_candles(tickers, **query)
+        assert len(result)
+        assert str(result["datetime"].dtype) == ("datetime64[ns]" if tz is None else f"datetime64[ns, {tz}]")
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_hourly_candles_and_time_range_match_parquet_provider(providers):
+    tz, reference, partitioned = providers
+    query = {"from_dt": bound(FROM, tz), "to_dt": bound(TO, tz)}
+    pd.testing.assert_frame_equal(
+        partitioned.get_hourly_candles(CONTRACTS[1], **query),
+        reference.get_hourly_candles(CONTRACTS[1], **query),
+        check_dtype=False,
+    )
+    assert partitioned.get_time_range(CONTRACTS[0]) == reference.get_time_range(CONTRACTS[0])
+    assert partitioned.get_available_tickers() == reference.get_available_tickers()
+
+
+def test_only_matching_partitions_are_read(providers):
+    tz, _, partitioned = providers
+    dataset = partitioned._get_dataset()
+    from_dt, to_dt = pd.Timestamp("2022-01-10"), pd.Timestamp("2022-01-20")
+    expression = partitioned._build_filter([CONTRACTS[1]], bound(from_dt, tz), bound(to_dt, tz))
+
+    fragments = [fragment.path for fragment in dataset.get_fragments(filter=expression)]
+    assert len(fragments) == 1
+    assert f"contract_code={CONTRACTS[1]}/trade_month=2022-01/" in fragments[0]
+    assert len(list(dataset.get_fragments())) > len(fragments)
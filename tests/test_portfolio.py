@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from simulators.basic import BasicTradeSimulator
+from simulators.portfolio import PortfolioSimulator
+
+UNIT = {"step_price": 1.0, "lot": 1}
+
+
+def make_bars(code: str, start_hour: int, n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100_000 + np.cumsum(rng.normal(0, 100, n))
+    return pd.DataFrame({
+        "datetime": pd.date_range("2024-01-01", periods=n, freq="h", tz="UTC") + pd.Timedelta(hours=start_hour),
+        "open": close + rng.normal(0, 20, n),
+        "high": close + 150,
+        "low": close - 150,
+        "close": close,
+        "contract_code": code,
+    })
+
+
+def sequential_contracts() -> pd.DataFrame:
+    # контракт A кончается, дальше торгуется только B
+    return pd.concat([make_bars("A", 0, 10, seed=1), make_bars("B", 10, 10, seed=2)], ignore_index=True)
+
+
+def test_expired_contract_is_closed_and_frees_slot():
+    df = sequential_contracts()
+    signals = np.ones(len(df), dtype=np.int8)  # A в лонге до последнего бара
+
+    sim = PortfolioSimulator(max_positions=1, max_contracts=1, position_fraction=1.0, specs={"A": UNIT, "B": UNIT})
+    trades = sim.simulate(df, pd.Series(signals)).to_frame()
+
+    assert len(trades) == 1
+    last_a = df[df["contract_code"] == "A"].iloc[-1]
+    assert trades["exit_reason"].iloc[0] == "contract_end"
+    assert trades["exit_time"].iloc[0] == last_a["datetime"]
+    assert trades["exit_price"].iloc[0] == last_a["close"]
+
+    equity = sim.equity.set_index("datetime")
+    # после экспирации A не переоценивается по старому close, а B занимает освободившийся слот
+    first_b = df[df["contract_code"] == "B"]["datetime"]
+    assert equity.loc[first_b.iloc[0], "open_positions"] == 0
+    assert equity.loc[first_b.iloc[0], "unrealized"] == 0.0
+    assert equity["open_positions"].iloc[-1] == 1
+    assert equity["open_positions"].max() == 1
+    np.testing.assert_allclose(equity.loc[first_b.iloc[0], "realized"], trades["pnl_net"].sum())
+
+
+def test_position_open_at_end_of_data_stays_open():
+    df = make_bars("A", 0, 20, seed=3)
+    sim = PortfolioSimulator(max_contracts=1, position_fraction=1.0, specs={"A": UNIT})
+
+    trades = sim.simulate(df, pd.Series(np.ones(len(df), dtype=np.int8)))
+
+    assert trades.empty
+    assert sim.equity["open_positions"].iloc[-1] == 1
+
+
+def test_unit_sizing_matches_basic_simulator():
+    df = make_bars("A", 0, 500, seed=4)
+    signals = pd.Series(np.random.default_rng(5).choice([-1, 0, 0, 1], len(df)).astype(np.int8))
+
+    expected = BasicTradeSimulator().simulate(df, signals).to_frame()
+    sim = PortfolioSimulator(max_contracts=1, position_fraction=1.0, specs={"A": UNIT})
+    actual = sim.simulate(df, signals).to_frame()
+
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+    np.testing.assert_allclose(sim.equity["realized"].iloc[-1], expected["pnl_net"].sum())
+
+
+def test_simulate_batch_keeps_equity_curve_per_column():
+    df = sequential_contracts()
+    rng = np.random.default_rng(6)
+    signal_matrix = rng.choice([-1, 0, 1], size=(len(df), 3)).astype(np.int8)
+
+    sim = PortfolioSimulator(max_contracts=1, position_fraction=1.0, specs={"A": UNIT, "B": UNIT})
+    ledgers = sim.simulate_batch(df, signal_matrix)
+
+    assert len(sim.equity_curves) == 3
+    for j, (ledger, curve) in enumerate(zip(ledgers, sim.equity_curves)):
+        single = PortfolioSimulator(max_contracts=1, position_fraction=1.0, specs={"A": UNIT, "B": UNIT})
+        single.simulate(df, pd.Series(signal_matrix[:, j]))
+        pd.testing.assert_frame_equal(curve, single.equity)
+        np.testing.assert_allclose(curve["realized"].iloc[-1], np.sum(ledger["pnl_net"]))
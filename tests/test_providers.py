@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from providers.bar_cache import resample_candles
+from providers.base import AbstractCandleProvider
+from providers.shared import SharedCandleDataset, SharedCandleProvider
+
+from conftest import CONTRACTS
+
+FROM = pd.Timestamp("2021-12-02 10:30", tz="UTC")
+TO = pd.Timestamp("2021-12-03 15:30", tz="UTC")
+
+
+class MinuteOnlyProvider(AbstractCandleProvider):
+    """Провайдер с одними минутками: часовые бары — реализация get_candles по умолчанию."""
+
+    def __init__(self, source):
+        self.source = source
+
+    def get_minute_candles(self, ticker=None, from_dt=None, to_dt=None):
+        return self.source.get_minute_candles(ticker, from_dt, to_dt)
+
+    def get_hourly_candles(self, ticker=None, from_dt=None, to_dt=None):
+        return self.get_candles(ticker, from_dt, to_dt, timeframe="1h")
+
+    def get_available_tickers(self):
+        return self.source.get_available_tickers()
+
+
+def expected_bars(provider) -> pd.DataFrame:
+    # полные часовые бары, открытые в [FROM, TO): 11:00 ... 15:00
+    minutes = provider.get_minute_candles(CONTRACTS[0])
+    bars = resample_candles(minutes, "1h")
+    return bars[(bars["datetime"] >= FROM) & (bars["datetime"] < TO)].reset_index(drop=True)
+
+
+@pytest.fixture
+def shared_provider(provider, tmp_path):
+    with SharedCandleDataset.publish(provider, root=tmp_path) as dataset:
+        yield SharedCandleProvider(dataset.path)
+
+
+@pytest.mark.parametrize("name", ["parquet", "shared", "base"])
+def test_bars_are_clipped_to_complete_bars_inside_range(name, provider, shared_provider):
+    source = {"parquet": provider, "shared": shared_provider, "base": MinuteOnlyProvider(provider)}[name]
+
+    bars = source.get_hourly_candles(CONTRACTS[0], from_dt=FROM, to_dt=TO)
+
+    assert bars["datetime"].min() >= FROM
+    assert bars["datetime"].max() < TO
+    expected = expected_bars(provider)
+    pd.testing.assert_frame_equal(
+        bars[["datetime", "open", "high", "low", "close"]].reset_index(drop=True),
+        expected[["datetime", "open", "high", "low", "close"]],
+        check_dtype=False,
+    )
+
+
+def test_bar_opened_at_to_dt_is_excluded(provider):
+    to_dt = pd.Timestamp("2021-12-02 12:00", tz="UTC")
+    bars = provider.get_hourly_candles(CONTRACTS[0], from_dt=to_dt - pd.Timedelta(hours=2), to_dt=to_dt)
+
+    assert list(bars["datetime"]) == [to_dt - pd.Timedelta(hours=2), to_dt - pd.Timedelta(hours=1)]
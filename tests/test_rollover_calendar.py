@@ -0,0 +1,86 @@
+import datetime as dt
+
+import pandas as pd
+
+from providers.rollover_calendar import (
+    compute_rollover_calendar,
+    rollover_switch_times,
+    save_rollover_calendar,
+)
+
+MARCH, JUNE, SEPTEMBER = "FUTRTS032200", "FUTRTS062200", "FUTRTS092200"
+DAYS = [dt.date(2022, 3, day) for day in (1, 2, 3, 4, 9, 10, 11)]
+
+
+def daily_volume() -> pd.DataFrame:
+    """Июнь обгоняет март 2-го на один день, затем с 9-го; сентябрь июнь не обгоняет."""
+    volumes = {
+        MARCH: [900, 400, 800, 700, 300, 200, 100],
+        JUNE: [100, 500, 200, 300, 600, 700, 800],
+        SEPTEMBER: [None, None, 10, 20, 30, 900, 40],
+    }
+    rows = [
+        {"date": day, "contract_code": code, "volume": volume}
+        for code, values in volumes.items()
+        for day, volume in zip(DAYS, values)
+        if volume is not None
+    ]
+    # Порядок строк не важен: контракты упорядочиваются по экспирации
+    return pd.DataFrame(rows[::-1])
+
+
+def test_first_crossover_is_the_switch_date():
+    calendar = compute_rollover_calendar(daily_volume())
+
+    assert calendar[["current", "next"]].values.tolist() == [[MARCH, JUNE], [JUNE, SEPTEMBER]]
+    first = calendar.iloc[0]
+    assert first["switch_date"] == dt.date(2022, 3, 2)
+    assert first["expiry"] == dt.date(2022, 3, 31)
+    assert first["days_before_expiry"] == 29
+    # Пересечение известно по итогам дня — переход с начала следующих суток
+    assert first["switch_time"] == pd.Timestamp("2022-03-03", tz="UTC")
+
+
+def test_rolling_days_require_a_streak_of_common_days():
+    calendar = compute_rollover_calendar(daily_volume(), rolling_days=2)
+    assert calendar.iloc[0]["switch_date"] == dt.date(2022, 3, 10)
+
+    # Сентябрь впереди только один день — серии из двух нет
+    assert calendar.iloc[1]["switch_date"] is None
+    assert pd.isna(calendar.iloc[1]["switch_time"])
+
+
+def test_contract_without_crossover_has_no_switch_time():
+    volume = daily_volume()
+    volume = volume[~((volume["contract_code"] == SEPTEMBER) & (volume["volume"] > 100))]
+    calendar = compute_rollover_calendar(volume)
+
+    second = calendar.iloc[1]
+    assert second["switch_date"] is None
+    assert pd.isna(second["days_before_expiry"])
+    assert pd.isna(second["switch_time"])
+    assert rollover_switch_times(calendar) == {MARCH: pd.Timestamp("2022-03-03")}
+
+
+def test_empty_volume_gives_empty_calendar():
+    calendar = compute_rollover_calendar(pd.DataFrame(columns=["date", "contract_code", "volume"]))
+    assert calendar.empty
+    assert rollover_switch_times(calendar) == {}
+    assert rollover_switch_times(None) == {}
+
+
+def test_switch_times_are_converted_to_the_data_timezone(tmp_path):
+    calendar = compute_rollover_calendar(daily_volume())
+    path = tmp_path / "rollover_calendar.parquet"
+    save_rollover_calendar(calendar, path)
+
+    naive = rollover_switch_times(path)
+    assert naive == {MARCH: pd.Timestamp("2022-03-03"), JUNE: pd.Timestamp("2022-03-11")}
+    assert all(ts.tzinfo is None for ts in naive.values())
+
+    moscow = rollover_switch_times(path, tz="Europe/Moscow")
+    assert moscow[MARCH] == pd.Timestamp("2022-03-03 03:00", tz="Europe/Moscow")
+    assert str(moscow[MARCH].tz) == "Europe/Moscow"
+    assert rollover_switch_times(calendar, tz="UTC")[JUNE] == pd.Timestamp("2022-03-11", tz="UTC")
+
+    assert rollover_switch_times(tmp_path / "missing.parquet") == {}
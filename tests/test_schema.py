@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzers.sma_rsi import SMARSIAnalyzer
+from core.strategy import BasicStrategy
+from providers.parquet import ParquetCandleProvider
+from providers.schema import MemoryBudget
+from providers.shared import SharedCandleDataset, SharedCandleProvider
+from simulators.rollover import RolloverTradeSimulator
+
+from conftest import CONTRACTS, make_minutes
+
+TICK = 10.0
+
+
+@pytest.fixture(scope="module")
+def tick_candle_dir(tmp_path_factory):
+    """Цены на сетке шага 10 пунктов — как у RTS: в float32 они представимы точно."""
+    path = tmp_path_factory.mktemp("tick_candles")
+    rng = np.random.default_rng(9)
+    for k, code in enumerate(CONTRACTS):
+        df = make_minutes(k, rng)
+        for col in ("open", "high", "low", "close"):
+            df[col] = np.round(df[col] / TICK) * TICK
+        df.to_parquet(path / f"{code}_30d_candle_interval_minute.parquet", index=False)
+    return path
+
+
+def run_strategy(provider) -> pd.DataFrame:
+    hourly_df = provider.get_hourly_candles(CONTRACTS)
+    minute_df = provider.get_minute_candles(CONTRACTS)
+    strategy = BasicStrategy(SMARSIAnalyzer(sma=20, rsi=7), RolloverTradeSimulator())
+    return strategy.run(hourly_df, minute_df=minute_df)["trades_df"].to_frame()
+
+
+def test_compact_frames_give_the_same_trades(tick_candle_dir, tmp_path):
+    standard = ParquetCandleProvider(tick_candle_dir, store_dir=tmp_path / "standard")
+    compact = ParquetCandleProvider(tick_candle_dir, store_dir=tmp_path / "compact", compact=True)
+    expected = run_strategy(standard)
+    assert len(expected)
+
+    with SharedCandleDataset.publish(compact, root=tmp_path) as dataset:
+        shared = SharedCandleProvider(dataset.path)
+        for provider in (compact, shared):
+            hourly_df = provider.get_hourly_candles(CONTRACTS)
+            assert hourly_df["close"].dtype == np.float32
+            assert isinstance(hourly_df["contract_code"].dtype, pd.CategoricalDtype)
+            assert isinstance(provider.get_minute_candles(CONTRACTS[0])["contract_code"].dtype, pd.CategoricalDtype)
+
+            pd.testing.assert_frame_equal(run_strategy(provider), expected, check_categorical=False)
+
+
+def test_memory_budget_evicts_least_recently_used():
+    budget = MemoryBudget(limit_mb=3 / 1024)  # 3 КБ
+    for key in "abc":
+        budget.put(key, key, 1024)
+    budget.get("a")  # "a" становится самым свежим
+    budget.put("d", "d", 1024)
+
+    assert "b" not in budget
+    assert all(key in budget for key in "acd")
+    assert budget.used_bytes == 3 * 1024
+
+
+def test_shared_provider_applies_memory_budget(provider, tmp_path):
+    with SharedCandleDataset.publish(provider, root=tmp_path) as dataset:
+        unbounded = SharedCandleProvider(dataset.path)
+        minutes = unbounded.get_minute_candles(CONTRACTS[0])
+        unbounded.get_hourly_candles(CONTRACTS[0])
+        assert "1m" in unbounded._tables and "1h" in unbounded._tables
+
+        # бюджет меньше минуток: при чтении часовых отображение минуток вытесняется
+        bounded = SharedCandleProvider(dataset.path, memory_budget_mb=unbounded._tables.used_bytes / 2**20 / 2)
+        pd.testing.assert_frame_equal(bounded.get_minute_candles(CONTRACTS[0]), minutes)
+        bounded.get_hourly_candles(CONTRACTS[0])
+        assert "1m" not in bounded._tables
+        assert bounded._tables.used_bytes <= bounded._tables.limit_bytes
+        # вытесненный таймфрейм перечитывается при следующем запросе
+        pd.testing.assert_frame_equal(bounded.get_minute_candles(CONTRACTS[0]), minutes)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from analyzers.sma_rsi import SMARSIAnalyzer
+
+from conftest import CONTRACTS
+
+NAN = np.nan
+
+
+def row_wise(analyzer: SMARSIAnalyzer, df: pd.DataFrame) -> np.ndarray:
+    return df.apply(analyzer.get_signal, axis=1).to_numpy(dtype=np.int8)
+
+
+def test_vectorized_signals_match_row_wise_on_edge_cases():
+    analyzer = SMARSIAnalyzer(rsi_buy=55, rsi_sell=45)
+    df = pd.DataFrame(
+        [
+            (100.0, NAN, NAN),    # прогрев: индикаторов ещё нет
+            (100.0, 99.0, NAN),   # RSI ещё не прогрет
+            (100.0, NAN, 70.0),   # SMA ещё не прогрета
+            (100.0, 100.0, 70.0),  # close == sma — не покупка
+            (100.0, 100.0, 30.0),  # close == sma — не продажа
+            (101.0, 100.0, 55.0),  # RSI ровно на rsi_buy — не покупка
+            (99.0, 100.0, 45.0),   # RSI ровно на rsi_sell — не продажа
+            (101.0, 100.0, 55.0001),
+            (99.0, 100.0, 44.9999),
+            (101.0, 100.0, 30.0),  # выше SMA, но RSI низкий
+            (99.0, 100.0, 70.0),   # ниже SMA, но RSI высокий
+        ],
+        columns=["close", "sma", "rsi"],
+    )
+
+    expected = row_wise(analyzer, df)
+
+    np.testing.assert_array_equal(analyzer.get_signals(df), expected)
+    np.testing.assert_array_equal(expected, [0, 0, 0, 0, 0, 0, 0, 1, -1, 0, 0])
+
+
+def test_vectorized_signals_match_row_wise_on_calculated_frame(provider):
+    hourly = provider.get_hourly_candles(CONTRACTS)
+    for sma, rsi, buy, sell in [(20, 7, 55, 45), (40, 14, 50, 50), (60, 21, 70, 30)]:
+        analyzer = SMARSIAnalyzer(sma=sma, rsi=rsi, rsi_buy=buy, rsi_sell=sell)
+        df = analyzer.calculate(hourly)
+
+        signals = analyzer.get_signals(df)
+
+        assert signals.dtype == np.int8
+        assert df["sma"].isna().any()
+        np.testing.assert_array_equal(signals, row_wise(analyzer, df))
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzers.sma_rsi import SMARSIAnalyzer
+from core.strategy import BasicStrategy, StrategyBatch
+from simulators.basic import BasicTradeSimulator
+from simulators.ledger import TradeLedger
+from simulators.rollover import RolloverTradeSimulator
+
+from conftest import CONTRACTS
+
+
+def random_signals(df: pd.DataFrame, p: float, seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    values = rng.choice(np.array([-1, 0, 1], dtype=np.int8), len(df), p=[p / 2, 1 - p, p / 2])
+    return pd.Series(values, index=df.index)
+
+
+@pytest.fixture
+def hourly(provider) -> pd.DataFrame:
+    return provider.get_hourly_candles(CONTRACTS)
+
+
+@pytest.mark.parametrize("p", [0.02, 0.2, 0.7])
+def test_basic_vectorized_matches_row_wise(hourly, p):
+    signals = random_signals(hourly, p, seed=1)
+
+    expected = BasicTradeSimulator(vectorized=False).simulate(hourly, signals).to_frame()
+    actual = BasicTradeSimulator().simulate(hourly, signals).to_frame()
+
+    assert len(expected)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_basic_simulate_stores_last_ledger(hourly, vectorized):
+    simulator = BasicTradeSimulator(vectorized=vectorized)
+    simulator.simulate(hourly, random_signals(hourly, 0.2, seed=1))
+    signals = random_signals(hourly, 0.2, seed=2)
+
+    trades = simulator.simulate(hourly, signals)
+
+    assert simulator.trades is trades
+    without_codes = hourly.drop(columns="contract_code")
+    assert simulator.simulate(without_codes, signals) is simulator.trades
+
+
+def test_basic_stream_matches_row_wise_across_chunks(hourly):
+    signals = random_signals(hourly, 0.2, seed=2)
+    df = hourly.assign(signal=signals)
+    chunks = [df.iloc[lo:lo + 97] for lo in range(0, len(df), 97)]
+
+    expected = BasicTradeSimulator(vectorized=False).simulate(hourly, signals).to_frame()
+    for vectorized in (True, False):
+        streamed = BasicTradeSimulator(vectorized=vectorized).simulate_stream(chunks)
+        actual = TradeLedger.concat(streamed).to_frame()
+        # куски отдают сделки по времени закрытия, эталон — по контрактам
+        key = ["contract_code", "entry_time"]
+        pd.testing.assert_frame_equal(
+            actual.sort_values(key, kind="stable").reset_index(drop=True),
+            expected.sort_values(key, kind="stable").reset_index(drop=True),
+        )
+
+
+@pytest.mark.parametrize("p", [0.02, 0.2, 0.7])
+@pytest.mark.parametrize("shuffled", [False, True])
+def test_rollover_vectorized_matches_row_wise(hourly, p, shuffled):
+    df = hourly.sample(frac=1, random_state=3) if shuffled else hourly
+    signals = random_signals(df, p, seed=4)
+
+    expected = RolloverTradeSimulator(vectorized=False).simulate(df, signals).to_frame()
+    actual = RolloverTradeSimulator().simulate(df, signals).to_frame()
+
+    assert (expected["exit_reason"] == "rollover").any()
+    # порядок категорий exit_reason зависит от порядка встреч причин — сравниваются значения
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+
+
+def test_rollover_with_calendar_matches_row_wise(hourly):
+    # переход на следующий контракт разрешён за 5 дней до конца пересечения
+    calendar = pd.DataFrame({
+        "current": CONTRACTS[:2],
+        "switch_time": [
+            hourly.loc[hourly["contract_code"] == code, "datetime"].max() - pd.Timedelta(days=5)
+            for code in CONTRACTS[:2]
+        ],
+    })
+    signals = random_signals(hourly, 0.2, seed=5)
+
+    expected = RolloverTradeSimulator(calendar=calendar, vectorized=False).simulate(hourly, signals).to_frame()
+    actual = RolloverTradeSimulator(calendar=calendar).simulate(hourly, signals).to_frame()
+
+    # порядок категорий exit_reason зависит от порядка встреч причин — сравниваются значения
+    pd.testing.assert_frame_equal(actual, expected, check_categorical=False)
+    default = RolloverTradeSimulator().simulate(hourly, signals).to_frame()
+    assert not actual["exit_time"][actual["exit_reason"] == "rollover"].equals(
+        default["exit_time"][default["exit_reason"] == "rollover"]
+    )
+
+
+@pytest.mark.parametrize("make_simulator", [
+    BasicTradeSimulator,
+    lambda: BasicTradeSimulator(vectorized=False),
+    RolloverTradeSimulator,
+    lambda: RolloverTradeSimulator(vectorized=False),
+])
+def test_batch_matches_one_column_at_a_time(hourly, make_simulator):
+    signal_matrix = np.column_stack([random_signals(hourly, p, seed=6 + k) for k, p in enumerate([0.02, 0.2, 0.7, 0.0])])
+
+    ledgers = make_simulator().simulate_batch(hourly, signal_matrix)
+
+    assert len(ledgers) == signal_matrix.shape[1]
+    assert ledgers[-1].empty
+    for j, ledger in enumerate(ledgers):
+        expected = make_simulator().simulate(hourly, pd.Series(signal_matrix[:, j], index=hourly.index)).to_frame()
+        pd.testing.assert_frame_equal(ledger.to_frame(), expected, check_categorical=False)
+
+
+def test_strategy_batch_matches_single_strategies(hourly):
+    thresholds = [(55, 45), (60, 40), (70, 30)]
+
+    def strategies():
+        simulator = RolloverTradeSimulator()
+        return [
+            BasicStrategy(SMARSIAnalyzer(sma=20, rsi=7, rsi_buy=buy, rsi_sell=sell), simulator)
+            for buy, sell in thresholds
+        ]
+
+    batch_results = StrategyBatch(strategies()).run(hourly)
+
+    for strategy, result in zip(strategies(), batch_results):
+        single = strategy.run(hourly)
+        pd.testing.assert_frame_equal(
+            result["trades_df"].to_frame(), single["trades_df"].to_frame(), check_categorical=False,
+        )
+        assert result["pnl_net"] == pytest.approx(single["pnl_net"])
@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzers.sma_rsi import SMARSIAnalyzer
+from core.backtester import BacktestRunner
+from core.strategy import BasicStrategy, StrategyBatch
+from core.walk_forward import load_fold_candles, make_folds, walk_forward_report
+from simulators.ledger import TradeLedger
+from simulators.rollover import RolloverTradeSimulator
+
+GRID = {(20, 7): [(55, 45), (60, 40)], (40, 14): [(50, 50), (65, 35)]}
+
+
+def test_folds_tile_the_range_with_contiguous_test_windows():
+    start = pd.Timestamp("2024-01-01", tz="UTC")
+    end = start + pd.Timedelta(days=95)
+
+    folds = make_folds(start, end, train_days=30, test_days=20)
+
+    assert [f.index for f in folds] == [0, 1, 2]
+    assert folds[0].train_start == start
+    for fold in folds:
+        assert fold.test_start - fold.train_start == pd.Timedelta(days=30)
+        assert fold.test_end - fold.test_start == pd.Timedelta(days=20)
+        assert fold.test_end <= end
+    for prev, nxt in zip(folds, folds[1:]):
+        assert nxt.test_start == prev.test_end  # out-of-sample окна стыкуются без зазоров и перекрытий
+    assert folds[-1].test_end + pd.Timedelta(days=20) > end
+    assert make_folds(start, start + pd.Timedelta(days=49), 30, 20) == []
+
+
+def make_factory(sma, rsi, thresholds):
+    def make():
+        simulator = RolloverTradeSimulator()
+        return StrategyBatch([
+            BasicStrategy(SMARSIAnalyzer(sma=sma, rsi=rsi, rsi_buy=buy, rsi_sell=sell), simulator)
+            for buy, sell in thresholds
+        ])
+    return make
+
+
+@pytest.fixture
+def fold_results(provider):
+    first, last = provider.get_time_range()
+    folds = make_folds(first, last, train_days=20, test_days=10)
+    results = []
+    for fold in folds:
+        hourly_df, minute_df = load_fold_candles(provider, fold)
+        for (sma, rsi), thresholds in GRID.items():
+            runner = BacktestRunner(make_factory(sma, rsi, thresholds), provider)
+            runner.run_fold(fold, hourly_df, minute_df)
+            results.extend(runner.results)
+    return folds, results
+
+
+def test_fold_phases_are_slices_of_one_indicator_pass(provider, fold_results):
+    folds, results = fold_results
+    assert len(folds) >= 3
+    assert len(results) == len(folds) * 2 * 4
+
+    fold = folds[1]
+    hourly_df, _ = load_fold_candles(provider, fold)
+    for (sma, rsi), thresholds in GRID.items():
+        for buy, sell in thresholds:
+            strategy = BasicStrategy(SMARSIAnalyzer(sma=sma, rsi=rsi, rsi_buy=buy, rsi_sell=sell), RolloverTradeSimulator())
+            calculated = strategy.analyzer.calculate(hourly_df)
+            for phase, lo, hi in (("train", fold.train_start, fold.test_start), ("test", fold.test_start, fold.test_end)):
+                window = calculated[(calculated["datetime"] >= lo) & (calculated["datetime"] < hi)]
+                expected = BasicStrategy(strategy.analyzer, RolloverTradeSimulator()).run_calculated(window)
+                [actual] = [
+                    r for r in results
+                    if r["fold"] == fold.index and r["phase"] == phase and r["strategy_id"] == strategy.strategy_id
+                ]
+                pd.testing.assert_frame_equal(actual["trades_df"].to_frame(), expected["trades_df"].to_frame())
+                if phase == "test" and not actual["trades_df"].empty:
+                    assert actual["trades_df"].to_frame()["entry_time"].min() >= fold.test_start
+
+
+def test_report_picks_train_winner_and_stitches_oos_trades(fold_results):
+    _, results = fold_results
+    shuffled = results[:]
+    random.Random(0).shuffle(shuffled)
+
+    folds_df, oos = walk_forward_report(shuffled, "pnl_net")
+
+    assert list(folds_df["fold"]) == sorted({r["fold"] for r in results})
+    for row in folds_df.itertuples():
+        train = [r for r in results if r["fold"] == row.fold and r["phase"] == "train"]
+        assert row.train_pnl_net == max(r["pnl_net"] for r in train)
+        [test] = [r for r in results if r["fold"] == row.fold and r["phase"] == "test" and r["strategy_id"] == row.strategy_id]
+        assert row.pnl_net == test["pnl_net"]
+
+    # склейка: все сделки победителей, по времени выхода
+    winners = [
+        r["trades_df"] for r in results
+        if r["phase"] == "test" and (r["fold"], r["strategy_id"]) in set(zip(folds_df["fold"], folds_df["strategy_id"]))
+    ]
+    assert len(oos) == sum(len(t) for t in winners)
+    assert np.all(np.diff(oos.array("exit_time")) >= 0)
+    assert oos["pnl_net"].sum() == pytest.approx(sum(t["pnl_net"].sum() for t in winners))
+
+    same, same_oos = walk_forward_report(results, "pnl_net")
+    pd.testing.assert_frame_equal(same, folds_df)
+    pd.testing.assert_frame_equal(same_oos.to_frame(), oos.to_frame())
+
+
+def test_report_skips_fold_without_test_result():
+    empty = TradeLedger()
+    results = [
+        {"fold": 0, "phase": "train", "strategy_id": "a", "pnl_net": 1.0, "start": 0},
+        {"fold": 0, "phase": "train", "strategy_id": "b", "pnl_net": 2.0, "start": 0},
+        {"fold": 0, "phase": "test", "strategy_id": "a", "pnl_net": 5.0, "start": 1, "end": 2,
+         "sharpe": 0.0, "drawdown": 0.0, "trades": 0, "trades_df": empty},
+    ]
+
+    folds_df, oos = walk_forward_report(results, "pnl_net")
+
+    assert folds_df.empty
+    assert oos.empty
@@ -1,10 +1,12 @@
 import os
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from tabulate import tabulate
 from datetime import datetime
 from pathlib import Path
 from core.logger import get_logger
+from simulators.ledger import as_frame
 
 log = get_logger(__name__)
 
@@ -36,6 +38,8 @@ def save_markdown_table(
     end: datetime = None,
     ticker: str = None
 ):
+    # принимает и журнал TradeLedger, и таблицу сделок
+    trades_df = as_frame(trades_df)
     if trades_df.empty:
         return
 
@@ -88,6 +92,41 @@ def save_markdown_table(
 
 
 
+def save_equity_curve(
+    equity_df: pd.DataFrame,
+    name: str,
+    start: datetime = None,
+    end: datetime = None,
+    ticker: str = None
+):
+    """Кривая капитала портфеля (PortfolioSimulator): график и CSV с реализованным/нереализованным PnL."""
+    if equity_df is None or equity_df.empty:
+        return
+
+    report_dir = get_report_dir()
+
+    suffix_parts = []
+    if ticker:
+        suffix_parts.append(ticker)
+    if start and end:
+        suffix_parts.append(f"{start.date()}_{end.date()}")
+    suffix = "_" + "_".join(suffix_parts) if suffix_parts else ""
+
+    path_csv = report_dir / f"{name}{suffix}_portfolio_equity.csv"
+    path_img = report_dir / f"{name}{suffix}_portfolio_equity.png"
+
+    equity_df.to_csv(path_csv, index=False)
+
+    equity_df.set_index("datetime")["equity"].plot(figsize=(10, 4), title="Portfolio Equity", grid=True)
+    plt.xlabel("Дата")
+    plt.ylabel("Капитал (₽)")
+    plt.tight_layout()
+    plt.savefig(path_img)
+    plt.close()
+
+    log.info(f"📈 Кривая капитала сохранена: {path_csv.name}")
+
+
 def save_summary_table(results: list[dict], strategy_id: str):
     report_dir = get_report_dir()
     filename = report_dir / f"summary_{strategy_id}.md"
@@ -100,14 +139,14 @@ def save_summary_table(results: list[dict], strategy_id: str):
     def calc_trade_stat(row, key: str) -> float:
         trades = getattr(row.get("strategy", None), "trades", pd.DataFrame())
         if not trades.empty and key in trades.columns:
-            return trades[key].sum()
+            return float(np.sum(trades[key]))
         return 0.0
 
     df["commission_total"] = df.apply(lambda row: calc_trade_stat(row, "commission"), axis=1)
     df["slippage_total"] = df.apply(lambda row: calc_trade_stat(row, "slippage"), axis=1)
 
     # Удаляем ненужные колонки
-    for col in ["source", "strategy", "trades_df"]:
+    for col in ["source", "strategy", "trades_df", "equity"]:
         if col in df.columns:
             df.drop(columns=[col], inplace=True)
 
@@ -157,3 +196,36 @@ def save_strategy_summary(strategy_df: pd.DataFrame):
         f.write("\n".join(lines))
 
     log.info(f"📊 Сводка по стратегиям сохранена: {path.name}")
+
+
+def save_walk_forward_summary(folds_df: pd.DataFrame, oos_trades, oos_metrics: dict, metric: str):
+    """Таблица ступеней walk-forward, итог out-of-sample и склеенная кривая капитала (через save_markdown_table)."""
+    report_dir = get_report_dir()
+    path = report_dir / "walk_forward_summary.md"
+
+    if folds_df.empty:
+        log.warning("❗Walk-forward без ступеней — отчёт не создаю")
+        return
+
+    df = folds_df.copy()
+    for col in ["train_start", "test_start", "test_end"]:
+        df[col] = pd.to_datetime(df[col]).dt.date
+
+    cols = ["train_start", "test_start", "test_end", "strategy_id", f"train_{metric}", "pnl_net", "sharpe", "drawdown", "trades"]
+    header_line = "| fold | " + " | ".join(cols) + " |"
+    separator_line = "|---" + "|---" * 4 + "|---:" * (len(cols) - 4) + "|"
+
+    lines = ["# 🔁 Walk-forward", header_line, separator_line]
+    for _, row in df.iterrows():
+        lines.append(f"| {row['fold']} | " + " | ".join(format_number(row[col]) for col in cols) + " |")
+
+    lines += ["", "## Out-of-sample итого", ""]
+    lines += [f"- {key}: {format_number(value)}" for key, value in oos_metrics.items()]
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+    if not oos_trades.empty:
+        save_markdown_table(oos_trades, name="walk_forward_oos", max_rows=1000)
+
+    log.info(f"🔁 Walk-forward сохранён: {path.name}")